@@ -1,7 +1,8 @@
 import streamlit as st
 import os
 import pandas as pd
-from utils.data_processing import load_data, search_fraud_data
+from utils.data_processing import search_fraud_data
+from utils.shared_data import get_shared_data, get_shared_dataset
 from utils.visualization import create_overview_chart
 from assets.images import get_image_url
 from utils.db_connection import init_database, get_database_connection
@@ -44,8 +45,12 @@ if 'db_initialized' not in st.session_state:
         logger.error(f"Error initializing database: {str(e)}")
 
 # Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+# The dataset is shared read-only by all sessions; session state holds only filters and selections
+data = get_shared_data()
+
+# Pull in cases added or changed since the data was loaded (also done periodically in the background)
+if st.session_state.get('db_initialized') and st.sidebar.button("Refresh Data", use_container_width=True):
+    data = get_shared_dataset().refresh()
     
 if 'search_query' not in st.session_state:
     st.session_state.search_query = ""
@@ -91,7 +96,7 @@ st.header("Fraud Trend Overview")
 # Display key metrics
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("Total Cases", f"{len(st.session_state.data):,}", delta="5%")
+    st.metric("Total Cases", f"{len(data):,}", delta="5%")
 with col2:
     st.metric("Avg. Loss Amount", "$12,450", delta="-2%")
 with col3:
@@ -101,7 +106,7 @@ with col4:
 
 # Display overview chart
 st.subheader("Fraud Trends Over Time")
-overview_chart = create_overview_chart(st.session_state.data)
+overview_chart = create_overview_chart(data)
 st.plotly_chart(overview_chart, use_container_width=True)
 
 # Quick links to main sections
@@ -135,7 +140,7 @@ with col4:
 # Recent search results if a search was performed
 if st.session_state.search_query:
     st.header(f"Search Results for '{st.session_state.search_query}'")
-    search_results = search_fraud_data(st.session_state.data, st.session_state.search_query)
+    search_results = search_fraud_data(data, st.session_state.search_query)
     
     if not search_results.empty:
         st.dataframe(search_results, use_container_width=True)
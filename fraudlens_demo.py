@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 import random
 import json
 import os
+from utils.categories import encode_categories, count_values
 
 # Set page configuration
 st.set_page_config(
@@ -57,8 +58,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load and prepare demo data
-@st.cache_data
+# Load and prepare demo data (one read-only copy shared by all sessions)
+@st.cache_resource
 def load_demo_data():
     # Check if we have the custom data file
     if os.path.exists("attached_assets/fraud_test_data.json"):
@@ -172,7 +173,8 @@ def load_demo_data():
     # Sort by detection_date
     combined_df = combined_df.sort_values('detection_date', ascending=False)
     
-    return combined_df
+    # Shared dictionary-encoded categories, as in the main app
+    return encode_categories(combined_df)
 
 # Load demo data
 fraud_data = load_demo_data()
@@ -203,7 +205,7 @@ def create_trend_chart(df):
 
 # Create fraud type breakdown chart
 def create_type_chart(df):
-    type_counts = df['fraud_type'].value_counts().reset_index()
+    type_counts = count_values(df['fraud_type']).reset_index()
     type_counts.columns = ['fraud_type', 'count']
     
     fig = px.bar(
@@ -225,7 +227,7 @@ def create_type_chart(df):
 
 # Create risk level pie chart
 def create_risk_chart(df):
-    risk_counts = df['risk_level'].value_counts().reset_index()
+    risk_counts = count_values(df['risk_level']).reset_index()
     risk_counts.columns = ['risk_level', 'count']
     
     fig = px.pie(
@@ -246,7 +248,7 @@ def create_risk_chart(df):
 
 # Create region map
 def create_region_chart(df):
-    region_counts = df['region'].value_counts().reset_index()
+    region_counts = count_values(df['region']).reset_index()
     region_counts.columns = ['region', 'count']
     
     # Map regions to coordinates (approximate centers)
@@ -596,13 +598,13 @@ elif page == "Pattern Analysis":
             }
         
         # Assign coordinates with some noise
-        df_copy['cluster_x'] = df_copy['fraud_type'].map(lambda x: cluster_centers[x]['x']) + np.random.normal(0, 1, len(df_copy))
-        df_copy['cluster_y'] = df_copy['fraud_type'].map(lambda x: cluster_centers[x]['y']) + np.random.normal(0, 1, len(df_copy))
+        df_copy['cluster_x'] = df_copy['fraud_type'].astype(object).map(lambda x: cluster_centers[x]['x']) + np.random.normal(0, 1, len(df_copy))
+        df_copy['cluster_y'] = df_copy['fraud_type'].astype(object).map(lambda x: cluster_centers[x]['y']) + np.random.normal(0, 1, len(df_copy))
         
         # Adjust coordinates based on risk level
         risk_offset = {'High': 0.5, 'Medium': 0, 'Low': -0.5}
-        df_copy['cluster_x'] += df_copy['risk_level'].map(risk_offset)
-        df_copy['cluster_y'] += df_copy['risk_level'].map(risk_offset)
+        df_copy['cluster_x'] += df_copy['risk_level'].astype(object).map(risk_offset)
+        df_copy['cluster_y'] += df_copy['risk_level'].astype(object).map(risk_offset)
         
         # Color by fraud type
         fig = px.scatter(
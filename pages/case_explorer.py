@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_processing import load_data, search_fraud_data, get_case_details
+from utils.data_processing import search_fraud_data, get_case_details, filter_fraud_data
+from utils.campaigns import largest_campaigns, with_campaigns
 from utils.pattern_recognition import find_similar_cases
+from utils.shared_data import get_shared_data
 from assets.images import get_image_url
 
 # Page config
@@ -13,9 +15,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+# Shared read-only dataset; session state holds only filters and selections
+data = get_shared_data()
 
 if 'selected_case' not in st.session_state:
     st.session_state.selected_case = None
@@ -57,6 +58,16 @@ with st.sidebar.expander("Status", expanded=True):
     statuses = ["Open", "In Progress", "Resolved", "Closed"]
     selected_statuses = st.multiselect("Select Status", statuses)
 
+with st.sidebar.expander("Campaign", expanded=False):
+    # Groups of cases with near-duplicate summaries
+    campaign_sizes = largest_campaigns(data)
+    selected_campaigns = st.multiselect(
+        "Select Campaigns",
+        campaign_sizes.index.tolist(),
+        format_func=lambda campaign: f"{campaign} ({campaign_sizes[campaign]:,} cases)",
+        help="Cases whose summaries are near-duplicates of each other"
+    )
+
 # Apply search button
 search_button = st.sidebar.button("Search Cases", use_container_width=True)
 
@@ -68,14 +79,39 @@ if st.session_state.selected_case is None:
     # Display cases table
     st.header("Fraud Cases")
     
-    # This would show actual search results in a real application
-    st.info("Case data will appear when loaded or searched")
-    
-    # Sample empty table structure
-    empty_table = pd.DataFrame(
-        [], columns=['Case ID', 'Date', 'Type', 'Amount', 'Risk Level', 'Status']
-    )
-    st.dataframe(empty_table, use_container_width=True)
+    if selected_campaigns:
+        # Campaign labels come from the full dataset; the sidebar filters then narrow it down
+        campaign_cases = with_campaigns(data)
+        if search_query and search_query.strip():
+            matches = search_fraud_data(data, search_query)
+            campaign_cases = campaign_cases[campaign_cases['case_id'].isin(matches.get('case_id', []))]
+        campaign_cases = filter_fraud_data(campaign_cases, {
+            'campaign': selected_campaigns,
+            'date_range': date_range if len(date_range) == 2 else None,
+            'fraud_type': selected_types,
+            'risk_level': selected_risks,
+            'status': selected_statuses
+        })
+        st.caption(f"{len(campaign_cases):,} cases in the selected campaigns")
+        cases_table = pd.DataFrame({
+            'Case ID': campaign_cases.get('case_id'),
+            'Date': campaign_cases.get('detection_date'),
+            'Type': campaign_cases.get('fraud_type'),
+            'Amount': campaign_cases.get('reported_amount'),
+            'Risk Level': campaign_cases.get('risk_level'),
+            'Status': campaign_cases.get('status'),
+            'Campaign': campaign_cases.get('campaign')
+        }, columns=['Case ID', 'Date', 'Type', 'Amount', 'Risk Level', 'Status', 'Campaign'])
+        st.dataframe(cases_table, use_container_width=True)
+    else:
+        # This would show actual search results in a real application
+        st.info("Case data will appear when loaded or searched")
+        
+        # Sample empty table structure
+        empty_table = pd.DataFrame(
+            [], columns=['Case ID', 'Date', 'Type', 'Amount', 'Risk Level', 'Status']
+        )
+        st.dataframe(empty_table, use_container_width=True)
     
     # Case selection (would be populated with real options in production)
     case_selection = st.text_input("Enter Case ID to view details")
@@ -174,20 +210,24 @@ else:
         st.info("This section would show cases with similar patterns or characteristics")
         
         # Similarity filters
-        col1, col2, col3 = st.columns(3)
+        col1, col2 = st.columns(2)
         with col1:
             similarity_threshold = st.slider("Minimum Similarity Score", 0.0, 1.0, 0.7)
         with col2:
             max_results = st.number_input("Max Results", 5, 50, 10)
-        with col3:
-            st.markdown("<br>", unsafe_allow_html=True)
-            find_similar = st.button("Find Similar Cases")
         
-        # Similar cases table (would be populated with real data in production)
-        empty_similar = pd.DataFrame(
-            [], columns=['Case ID', 'Similarity Score', 'Fraud Type', 'Amount', 'Date']
+        # Neighbour index lookups are sub-millisecond, so results follow the controls directly
+        similar = find_similar_cases(
+            data, st.session_state.selected_case, n=int(max_results), min_similarity=similarity_threshold
         )
-        st.dataframe(empty_similar, use_container_width=True)
+        similar_table = pd.DataFrame({
+            'Case ID': similar.get('case_id'),
+            'Similarity Score': similar.get('similarity_score'),
+            'Fraud Type': similar.get('fraud_type'),
+            'Amount': similar.get('reported_amount'),
+            'Date': similar.get('detection_date')
+        }, columns=['Case ID', 'Similarity Score', 'Fraud Type', 'Amount', 'Date'])
+        st.dataframe(similar_table, use_container_width=True)
         
         # Similarity network visualization
         st.subheader("Case Similarity Network")
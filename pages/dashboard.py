@@ -2,12 +2,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_processing import load_data, filter_fraud_data
+from utils.data_processing import filter_fraud_data, prepare_time_series_data
 from utils.visualization import (
     create_fraud_type_chart, 
     create_heatmap, 
     create_geographic_map
 )
+from utils.shared_data import get_shared_data
 from assets.images import get_image_url
 
 # Page config
@@ -17,9 +18,8 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+# Shared read-only dataset; session state holds only filters and selections
+data = get_shared_data()
 
 # Header with image
 st.image(get_image_url("data visualization", 0), width=150)
@@ -66,24 +66,35 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Fraud Cases by Type")
-    fraud_type_chart = create_fraud_type_chart(st.session_state.data)
+    fraud_type_chart = create_fraud_type_chart(data)
     st.plotly_chart(fraud_type_chart, use_container_width=True, key="fraud_type_chart")
 
 with col2:
     st.subheader("Trend by Month")
+    # Monthly totals come from the rollup cube, not a pass over the cases
+    monthly = prepare_time_series_data(data, 'month', median=False)
     date_trend_chart = go.Figure()
     date_trend_chart.update_layout(
         template="plotly_dark",
         height=400,
         margin=dict(l=40, r=40, t=40, b=40)
     )
-    date_trend_chart.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Visualization will appear when data is loaded",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    if monthly.empty:
+        date_trend_chart.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Visualization will appear when data is loaded",
+            showarrow=False,
+            font=dict(size=14)
+        )
+    else:
+        date_trend_chart.add_trace(go.Scatter(
+            x=monthly['time_period'],
+            y=monthly['count'],
+            mode='lines+markers',
+            name="Cases"
+        ))
+        date_trend_chart.update_layout(xaxis_title="Month", yaxis_title="Number of Cases", hovermode="x unified")
     st.plotly_chart(date_trend_chart, use_container_width=True, key="date_trend_chart")
 
 # Second row of visualizations
@@ -92,19 +103,28 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Risk Level Distribution")
+    risk_counts = prepare_time_series_data(data, None, by=['risk_level'], median=False) if 'risk_level' in data.columns else pd.DataFrame()
     risk_chart = go.Figure()
     risk_chart.update_layout(
         template="plotly_dark",
         height=400,
         margin=dict(l=40, r=40, t=40, b=40)
     )
-    risk_chart.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Visualization will appear when data is loaded",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    if risk_counts.empty:
+        risk_chart.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Visualization will appear when data is loaded",
+            showarrow=False,
+            font=dict(size=14)
+        )
+    else:
+        risk_chart.add_trace(go.Bar(
+            x=risk_counts['risk_level'].astype(str),
+            y=risk_counts['count'],
+            marker_color='#EF553B'
+        ))
+        risk_chart.update_layout(xaxis_title="Risk Level", yaxis_title="Number of Cases")
     st.plotly_chart(risk_chart, use_container_width=True, key="risk_level_chart")
 
 with col2:
@@ -126,7 +146,7 @@ with col2:
 
 # Geographic distribution
 st.header("Geographic Distribution")
-geo_map = create_geographic_map(st.session_state.data)
+geo_map = create_geographic_map(data)
 st.plotly_chart(geo_map, use_container_width=True, key="geographic_map")
 
 # Heatmap analysis
@@ -139,7 +159,7 @@ with heatmap_options[1]:
 with heatmap_options[2]:
     z_var = st.selectbox("Value", ["Count", "Average Amount", "Max Amount"])
 
-heatmap = create_heatmap(st.session_state.data, x_var, y_var, z_var)
+heatmap = create_heatmap(data, x_var, y_var, z_var)
 st.plotly_chart(heatmap, use_container_width=True, key="heatmap_analysis")
 
 # Export options
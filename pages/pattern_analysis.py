@@ -3,12 +3,21 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_processing import load_data
 from utils.pattern_recognition import (
     identify_patterns, 
+    cluster_profiles,
     visualize_clusters,
-    detect_anomalies
+    detect_anomalies,
+    visualize_anomalies,
+    find_association_rules,
+    visualize_rules
 )
+from utils.clustering import CLUSTER_FEATURES
+from utils.anomaly import feature_rarity
+from utils.association_rules import case_items
+from utils.shared_data import get_shared_data
+from utils.data_processing import filter_fraud_data
+from utils.campaigns import largest_campaigns, with_campaigns
 from assets.images import get_image_url
 
 # Page config
@@ -18,13 +27,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+# Shared read-only dataset; session state holds only filters and selections
+data = get_shared_data()
 
 if 'patterns' not in st.session_state:
     st.session_state.patterns = None
 
+if 'anomaly_method' not in st.session_state:
+    st.session_state.anomaly_method = None
+
+if 'rule_support' not in st.session_state:
+    st.session_state.rule_support = None
+
 # Header with image
 st.image(get_image_url("cybersecurity", 2), width=150)
 st.title("Pattern Analysis")
@@ -62,6 +76,19 @@ else:  # Association Rules
         min_support = st.slider("Minimum Support", 0.01, 0.5, 0.1)
         min_confidence = st.slider("Minimum Confidence", 0.1, 1.0, 0.5)
 
+# Restrict the analysis to campaigns (groups of near-duplicate cases)
+with st.sidebar.expander("Campaign", expanded=False):
+    campaign_sizes = largest_campaigns(data)
+    selected_campaigns = st.multiselect(
+        "Analyze Campaigns",
+        campaign_sizes.index.tolist(),
+        format_func=lambda campaign: f"{campaign} ({campaign_sizes[campaign]:,} cases)",
+        help="Leave empty to analyze all cases"
+    )
+
+if selected_campaigns:
+    data = filter_fraud_data(with_campaigns(data), {'campaign': selected_campaigns})
+
 # Apply settings button
 apply_button = st.sidebar.button("Run Analysis", use_container_width=True)
 
@@ -75,58 +102,76 @@ if analysis_method == "Clustering":
     Each cluster represents a distinct pattern of fraud with common features.
     """)
     
-    # Cluster visualization
-    if st.session_state.patterns is not None:
-        # This would show actual clustering results in a real application
-        st.info("Cluster visualization would appear here with real data")
-    
-    # Create empty visualization structure
-    clusters_viz = visualize_clusters(st.session_state.data, None)
-    st.plotly_chart(clusters_viz, use_container_width=True, key="clusters_main_viz")
-    
-    # Cluster details
-    st.subheader("Cluster Details")
-    
-    # Tabs for cluster information
-    cluster_tabs = st.tabs([f"Cluster {i+1}" for i in range(5)])
-    
-    for i, tab in enumerate(cluster_tabs):
-        with tab:
-            col1, col2 = st.columns([1, 2])
-            
-            with col1:
-                st.markdown(f"##### Cluster {i+1} Characteristics")
-                st.markdown("**Size:** (Count would appear here)")
-                st.markdown("**Avg. Amount:** (Amount would appear here)")
-                st.markdown("**Common Types:** (Types would appear here)")
-                st.markdown("**Risk Level:** (Level would appear here)")
-            
-            with col2:
-                st.markdown("##### Top Features")
-                features_chart = go.Figure()
-                features_chart.update_layout(
-                    template="plotly_dark",
-                    height=200,
-                    margin=dict(l=20, r=20, t=20, b=20)
-                )
-                features_chart.add_annotation(
-                    x=0.5, y=0.5,
-                    xref="paper", yref="paper",
-                    text="Feature visualization would appear here",
-                    showarrow=False,
-                    font=dict(size=12)
-                )
-                st.plotly_chart(features_chart, use_container_width=True, key=f"features_cluster_{i}")
+    # Clusters are computed on Run Analysis and cached per data version, k and features
+    if apply_button:
+        st.session_state.patterns = {
+            'n_clusters': n_clusters,
+            'features': [CLUSTER_FEATURES[feature] for feature in feature_set]
+        }
     
-    # Sample cases in each cluster
-    st.subheader("Sample Cases in Selected Cluster")
-    cluster_select = st.selectbox("Select Cluster", [f"Cluster {i+1}" for i in range(5)])
+    settings = st.session_state.patterns
+    if settings is not None and not settings['features']:
+        st.warning("Select at least one feature to cluster on")
+        settings = None
     
-    # This would show actual cases in the selected cluster in a real application
-    empty_cluster_cases = pd.DataFrame(
-        [], columns=['Case ID', 'Fraud Type', 'Amount', 'Risk Level', 'Date']
-    )
-    st.dataframe(empty_cluster_cases, use_container_width=True)
+    if settings is None or data.empty:
+        st.info("Choose the clustering settings and click Run Analysis")
+        clusters_viz = visualize_clusters(data, None)
+        st.plotly_chart(clusters_viz, use_container_width=True, key="clusters_main_viz")
+    else:
+        clusters = identify_patterns(data, **settings)
+        profiles = cluster_profiles(data, **settings)
+        
+        clusters_viz = visualize_clusters(data, clusters['cluster'])
+        st.plotly_chart(clusters_viz, use_container_width=True, key="clusters_main_viz")
+        
+        # Cluster details
+        st.subheader("Cluster Details")
+        
+        # Tabs for cluster information
+        cluster_tabs = st.tabs([f"Cluster {i+1}" for i in range(len(profiles))])
+        
+        for i, tab in enumerate(cluster_tabs):
+            profile = profiles.iloc[i]
+            with tab:
+                col1, col2 = st.columns([1, 2])
+                
+                with col1:
+                    st.markdown(f"##### Cluster {i+1} Characteristics")
+                    st.markdown(f"**Size:** {profile['size']:,} cases ({profile['share']:.1%})")
+                    st.markdown(f"**Avg. Amount:** ${profile['mean_amount']:,.2f}")
+                    st.markdown(f"**Common Types:** {', '.join(profile['top_fraud_types']) or 'n/a'}")
+                    st.markdown(f"**Risk Level:** {profile['dominant_risk_level'] or 'n/a'}")
+                
+                with col2:
+                    st.markdown("##### Top Fraud Types")
+                    features_chart = go.Figure(go.Bar(
+                        x=profile['top_fraud_type_counts'],
+                        y=profile['top_fraud_types'],
+                        orientation='h'
+                    ))
+                    features_chart.update_layout(
+                        template="plotly_dark",
+                        height=200,
+                        margin=dict(l=20, r=20, t=20, b=20),
+                        yaxis=dict(autorange="reversed")
+                    )
+                    st.plotly_chart(features_chart, use_container_width=True, key=f"features_cluster_{i}")
+        
+        # Sample cases in each cluster
+        st.subheader("Sample Cases in Selected Cluster")
+        cluster_select = st.selectbox("Select Cluster", [f"Cluster {i+1}" for i in range(len(profiles))])
+        selected_cluster = int(cluster_select.split()[-1]) - 1
+        
+        cluster_cases = data[clusters['cluster'].to_numpy() == selected_cluster].head(100)
+        cluster_table = pd.DataFrame({
+            'Case ID': cluster_cases.get('case_id'),
+            'Fraud Type': cluster_cases.get('fraud_type'),
+            'Amount': cluster_cases.get('reported_amount'),
+            'Risk Level': cluster_cases.get('risk_level'),
+            'Date': cluster_cases.get('detection_date')
+        }, columns=['Case ID', 'Fraud Type', 'Amount', 'Risk Level', 'Date'])
+        st.dataframe(cluster_table, use_container_width=True)
 
 elif analysis_method == "Anomaly Detection":
     st.header("Fraud Anomaly Detection")
@@ -137,68 +182,88 @@ elif analysis_method == "Anomaly Detection":
     These anomalies may represent new fraud schemes, sophisticated attacks, or misclassifications.
     """)
     
-    # Anomaly visualization
-    anomaly_viz = go.Figure()
-    anomaly_viz.update_layout(
-        title="Anomaly Detection Results",
-        template="plotly_dark",
-        height=500,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-    anomaly_viz.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Anomaly visualization would appear here",
-        showarrow=False,
-        font=dict(size=14)
-    )
-    st.plotly_chart(anomaly_viz, use_container_width=True, key="anomaly_viz")
-    
-    # Anomaly details
-    st.subheader("Detected Anomalies")
-    
-    # This would show actual anomalies in a real application
-    empty_anomalies = pd.DataFrame(
-        columns=['Case ID', 'Anomaly Score', 'Fraud Type', 'Amount', 'Risk Level']
-    )
-    st.dataframe(empty_anomalies, use_container_width=True)
-    
-    # Anomaly explanation
-    st.subheader("Anomaly Explanation")
-    
-    # Tabs for anomaly information
-    anomaly_tabs = st.tabs([f"Anomaly {i+1}" for i in range(3)])
+    # The model is fitted on Run Analysis and cached per data version and
+    # method; the contamination slider only moves the threshold
+    if apply_button:
+        st.session_state.anomaly_method = detection_method
     
-    for i, tab in enumerate(anomaly_tabs):
-        with tab:
-            col1, col2 = st.columns([1, 2])
-            
-            with col1:
-                st.markdown(f"##### Anomaly {i+1} Details")
-                st.markdown("**Case ID:** (ID would appear here)")
-                st.markdown("**Anomaly Score:** (Score would appear here)")
-                st.markdown("**Type:** (Type would appear here)")
-                st.markdown("**Amount:** (Amount would appear here)")
+    method = st.session_state.anomaly_method
+    if method is None or data.empty:
+        st.info("Choose the detection method and click Run Analysis")
+        anomaly_viz = visualize_anomalies(data, None)
+        st.plotly_chart(anomaly_viz, use_container_width=True, key="anomaly_viz")
+    else:
+        anomalies = detect_anomalies(data, contamination=contamination, method=method)
+        
+        anomaly_viz = visualize_anomalies(data, anomalies)
+        st.plotly_chart(anomaly_viz, use_container_width=True, key="anomaly_viz")
+        
+        # Anomaly details
+        st.subheader("Detected Anomalies")
+        st.markdown(f"**{method}** flagged {int(anomalies['is_anomaly'].sum()):,} of {len(data):,} cases")
+        
+        # Highest-scoring flagged cases first
+        scores = anomalies['anomaly_score'].to_numpy()
+        top_positions = np.argsort(-scores, kind='stable')[:100]
+        top_positions = top_positions[anomalies['is_anomaly'].to_numpy()[top_positions]]
+        top_cases = data.iloc[top_positions]
+        anomaly_table = pd.DataFrame({
+            'Case ID': top_cases.get('case_id'),
+            'Anomaly Score': scores[top_positions].round(4),
+            'Fraud Type': top_cases.get('fraud_type'),
+            'Amount': top_cases.get('reported_amount'),
+            'Risk Level': top_cases.get('risk_level')
+        }, columns=['Case ID', 'Anomaly Score', 'Fraud Type', 'Amount', 'Risk Level'])
+        st.dataframe(anomaly_table, use_container_width=True)
+        
+        # Anomaly explanation
+        st.subheader("Anomaly Explanation")
+        
+        explained = top_positions[:3]
+        if len(explained) == 0:
+            st.info("No anomalies at this contamination level")
+        else:
+            # Tabs for the highest-scoring anomalies
+            anomaly_tabs = st.tabs([f"Anomaly {i+1}" for i in range(len(explained))])
+            feature_labels = {column: label for label, column in CLUSTER_FEATURES.items()}
             
-            with col2:
-                st.markdown("##### Why is this an anomaly?")
-                st.info("Explanation of why this case was flagged as anomalous would appear here")
-                
-                st.markdown("##### Feature Deviation")
-                deviation_chart = go.Figure()
-                deviation_chart.update_layout(
-                    template="plotly_dark",
-                    height=200,
-                    margin=dict(l=20, r=20, t=20, b=20)
-                )
-                deviation_chart.add_annotation(
-                    x=0.5, y=0.5,
-                    xref="paper", yref="paper",
-                    text="Feature deviation chart would appear here",
-                    showarrow=False,
-                    font=dict(size=12)
-                )
-                st.plotly_chart(deviation_chart, use_container_width=True, key=f"deviation_chart_{i}")
+            for i, tab in enumerate(anomaly_tabs):
+                case = data.iloc[explained[i]]
+                rarity = feature_rarity(data, explained[i])
+                with tab:
+                    col1, col2 = st.columns([1, 2])
+                    
+                    with col1:
+                        st.markdown(f"##### Anomaly {i+1} Details")
+                        st.markdown(f"**Case ID:** {case.get('case_id')}")
+                        st.markdown(f"**Anomaly Score:** {scores[explained[i]]:.4f}")
+                        st.markdown(f"**Type:** {case.get('fraud_type')}")
+                        st.markdown(f"**Amount:** ${case.get('reported_amount', 0):,.2f}")
+                    
+                    with col2:
+                        st.markdown("##### Why is this an anomaly?")
+                        unusual = rarity[rarity >= 0.9].sort_values(ascending=False)
+                        if unusual.empty:
+                            st.info("No single feature stands out: the combination of values is uncommon")
+                        else:
+                            st.info("Unusual " + ", ".join(
+                                f"{feature_labels.get(feature, feature).lower()} ({case.get(feature)}, more unusual than {share:.0%} of cases)"
+                                for feature, share in unusual.items()
+                            ))
+                        
+                        st.markdown("##### Feature Deviation")
+                        deviation_chart = go.Figure(go.Bar(
+                            x=rarity.to_numpy(),
+                            y=[feature_labels.get(feature, feature) for feature in rarity.index],
+                            orientation='h'
+                        ))
+                        deviation_chart.update_layout(
+                            template="plotly_dark",
+                            height=200,
+                            margin=dict(l=20, r=20, t=20, b=20),
+                            xaxis=dict(range=[0, 1], tickformat=".0%")
+                        )
+                        st.plotly_chart(deviation_chart, use_container_width=True, key=f"deviation_chart_{i}")
 
 else:  # Association Rules
     st.header("Fraud Association Rules")
@@ -209,46 +274,81 @@ else:  # Association Rules
     These rules help identify which factors commonly occur together in fraud incidents.
     """)
     
-    # Association rules visualization
-    rules_viz = go.Figure()
-    rules_viz.update_layout(
-        title="Association Rules Network",
-        template="plotly_dark",
-        height=500,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-    rules_viz.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Association rules visualization would appear here",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    # Itemsets are mined on Run Analysis and cached per data version and
+    # support; the confidence slider only filters their rules
+    if apply_button:
+        st.session_state.rule_support = min_support
+    
+    support = st.session_state.rule_support
+    rules = None
+    if support is None or data.empty:
+        st.info("Choose the support and confidence and click Run Analysis")
+    else:
+        rules = find_association_rules(data, min_support=support, min_confidence=min_confidence)
+    
+    rules_viz = visualize_rules(rules)
     st.plotly_chart(rules_viz, use_container_width=True)
     
     # Association rules details
     st.subheader("Top Association Rules")
     
-    # This would show actual rules in a real application
-    empty_rules = pd.DataFrame(
-        columns=['Rule', 'Support', 'Confidence', 'Lift']
-    )
-    st.dataframe(empty_rules, use_container_width=True)
+    def format_rule(rule):
+        return f"{{{', '.join(rule['antecedent'])}}} → {{{', '.join(rule['consequent'])}}}"
+    
+    if rules is None:
+        rules_table = pd.DataFrame(columns=['Rule', 'Support', 'Confidence', 'Lift'])
+    else:
+        st.markdown(f"{len(rules):,} rules at support ≥ {support:.0%} and confidence ≥ {min_confidence:.0%}")
+        top_rules = rules.head(100)
+        rules_table = pd.DataFrame({
+            'Rule': [format_rule(rule) for _, rule in top_rules.iterrows()],
+            'Support': top_rules['support'].round(4),
+            'Confidence': top_rules['confidence'].round(4),
+            'Lift': top_rules['lift'].round(2)
+        }, columns=['Rule', 'Support', 'Confidence', 'Lift'])
+    st.dataframe(rules_table, use_container_width=True)
     
     # Rule explanation
     st.subheader("Rule Interpretation")
     
-    # Example interpretation of a rule
-    st.info("Explanation of what these rules mean and how they can be used in fraud detection would appear here")
+    if rules is None or rules.empty:
+        st.info("Rules read as: cases with the items on the left usually also have the items on the right. "
+                "Lower the support or confidence if no rules are found.")
+    else:
+        best = rules.iloc[0]
+        st.info(
+            f"{best['confidence']:.0%} of cases with {', '.join(best['antecedent'])} also have "
+            f"{', '.join(best['consequent'])}, {best['lift']:.1f}x as often as across all cases "
+            f"({best['support']:.1%} of cases match the whole rule)."
+        )
     
     # Rule application
     st.subheader("Apply Rules to New Cases")
     
     col1, col2 = st.columns([1, 1])
     with col1:
-        st.text_input("Enter Case ID")
+        rule_case_id = st.text_input("Enter Case ID")
     with col2:
-        st.button("Apply Rules to Case")
+        apply_rules = st.button("Apply Rules to Case")
+    
+    if apply_rules and rules is not None and rule_case_id:
+        matches = np.flatnonzero(data['case_id'].to_numpy() == rule_case_id.strip())
+        if len(matches) == 0:
+            st.warning(f"Case {rule_case_id} not found")
+        else:
+            items = case_items(data, matches[0])
+            applicable = rules[[set(antecedent) <= items for antecedent in rules['antecedent']]]
+            if applicable.empty:
+                st.info("No rule applies to this case")
+            else:
+                # A case breaking a confident rule is unusual for its attributes
+                holds = [set(consequent) <= items for consequent in applicable['consequent']]
+                st.dataframe(pd.DataFrame({
+                    'Rule': [format_rule(rule) for _, rule in applicable.iterrows()],
+                    'Confidence': applicable['confidence'].round(4).to_numpy(),
+                    'Lift': applicable['lift'].round(2).to_numpy(),
+                    'Case': np.where(holds, "Follows rule", "Breaks rule")
+                }).head(100), use_container_width=True)
 
 # Export options
 st.header("Export Options")
@@ -3,8 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_processing import load_data, prepare_time_series_data
+from utils.data_processing import prepare_time_series_data
+from utils.time_cube import DIMENSION_LABELS, get_time_cube
 from utils.visualization import create_trend_forecast
+from utils.forecasting import forecast_series, complete_periods
+from utils.seasonality import get_seasonality
+from utils.shared_data import get_shared_data
 from assets.images import get_image_url
 
 # Page config
@@ -14,9 +18,61 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+# Shared read-only dataset; session state holds only filters and selections
+data = get_shared_data()
+
+# Rollup measures behind each primary metric; Detection Rate is cases per day
+TREND_METRICS = {
+    "Number of Cases": 'count',
+    "Total Amount": 'amount_sum',
+    "Average Amount": 'amount_mean',
+    "Detection Rate": 'count',
+}
+
+# Periods fitted to judge the trend direction
+TREND_WINDOW = 6
+
+# pandas period per Time Grouping option
+PERIOD_CODES = {"Day": "D", "Week": "W", "Month": "M", "Quarter": "Q", "Year": "Y"}
+
+def metric_values(series, metric, unit, start_date, end_date):
+    """
+    The metric per row of a prepare_time_series_data() result.
+    """
+    values = series[TREND_METRICS[metric]].astype(float)
+    if metric == "Detection Rate":
+        # Days of each period inside the selected range
+        starts = series['time_period']
+        ends = starts.dt.to_period(PERIOD_CODES[unit]).dt.end_time.dt.normalize()
+        if start_date is not None:
+            starts = starts.clip(lower=pd.Timestamp(start_date))
+        if end_date is not None:
+            ends = ends.clip(upper=pd.Timestamp(end_date))
+        values = values / ((ends - starts).dt.days + 1).clip(lower=1)
+    return values
+
+def metric_history(by=None):
+    """
+    The metric per complete period up to the end of the selected range
+    (one column per breakdown category), as fitted by the forecasts.
+    """
+    history = prepare_time_series_data(data, time_unit, by=by, end_date=end_date, in_database=True, median=False)
+    if history.empty:
+        return pd.DataFrame()
+    history = history.assign(value=metric_values(history, trend_metric, time_unit, None, end_date).to_numpy())
+    values = history.pivot(index='time_period', columns=by, values='value') if by else history.set_index('time_period')[['value']]
+    # Only periods the data fully covers, from its first detection day to the end of the range
+    days = get_time_cube(data).days
+    last_day = days.max() if end_date is None else min(days.max(), pd.Timestamp(end_date))
+    return complete_periods(values, time_unit, days.min(), last_day)
+
+def forecast_metric(history, horizon):
+    """
+    Forecast, lower and upper bound of each history column for the next horizon periods.
+    """
+    # Periods without cases have no count or amount; an average is just unknown
+    fill_value = None if trend_metric == "Average Amount" else 0
+    return forecast_series(data, history, time_unit, horizon, confidence_interval / 100, fill_value=fill_value)
 
 # Header with image
 st.image(get_image_url("data visualization", 2), width=150)
@@ -64,6 +120,8 @@ with st.sidebar.expander("Forecast Settings", expanded=True):
     if show_forecast:
         forecast_periods = st.number_input("Forecast Periods", 1, 24, 6)
         confidence_interval = st.slider("Confidence Interval (%)", 50, 95, 80)
+    else:
+        forecast_periods, confidence_interval = 0, 80
 
 # Apply settings button
 apply_button = st.sidebar.button("Update Trends", use_container_width=True)
@@ -72,24 +130,77 @@ apply_button = st.sidebar.button("Update Trends", use_container_width=True)
 st.header("Fraud Trend Overview")
 
 # Overall trend chart
-overall_trend = create_trend_forecast(st.session_state.data, forecast_periods=6 if show_forecast else 0)
+overall_trend = create_trend_forecast(data, forecast_periods=forecast_periods, time_unit=time_unit.lower(), confidence=confidence_interval / 100)
 st.plotly_chart(overall_trend, use_container_width=True)
 
+# Time series over the selected range: one GROUP BY query when the data comes
+# from the database, re-aggregated from the rollup cube otherwise
+if isinstance(trend_date_range, (list, tuple)):
+    start_date, end_date = (list(trend_date_range) + [None, None])[:2]
+else:
+    start_date, end_date = trend_date_range, None
+trend_series = prepare_time_series_data(data, time_unit, start_date=start_date, end_date=end_date, in_database=True, median=False)
+if not trend_series.empty:
+    trend_series = trend_series.assign(value=metric_values(trend_series, trend_metric, time_unit, start_date, end_date).to_numpy())
+
 # Trend metrics
 col1, col2, col3, col4 = st.columns(4)
 with col1:
-    st.metric("Current Period", "(Value would appear here)", delta="(Change would appear here)")
+    if len(trend_series) >= 2:
+        current, previous = trend_series['value'].iloc[-1], trend_series['value'].iloc[-2]
+        change = f"{(current - previous) / previous:+.1%}" if previous else None
+        st.metric("Current Period", f"{current:,.2f}" if trend_metric != "Number of Cases" else f"{current:,.0f}", delta=change)
+    elif len(trend_series) == 1:
+        st.metric("Current Period", f"{trend_series['value'].iloc[-1]:,.2f}")
+    else:
+        st.metric("Current Period", "No data")
 with col2:
-    st.metric("Trend Direction", "(Direction would appear here)", delta="(Change would appear here)")
+    window = trend_series['value'].tail(TREND_WINDOW).to_numpy() if not trend_series.empty else np.empty(0)
+    if len(window) >= 2 and np.isfinite(window).all():
+        slope = np.polyfit(np.arange(len(window)), window, 1)[0]
+        mean = np.abs(window).mean()
+        relative = slope / mean if mean else 0.0
+        direction = "Rising" if relative > 0.02 else "Falling" if relative < -0.02 else "Stable"
+        st.metric("Trend Direction", direction, delta=f"{relative:+.1%} per period")
+    else:
+        st.metric("Trend Direction", "Not enough periods")
 with col3:
-    st.metric("Forecast Next Period", "(Value would appear here)", delta="(Change would appear here)")
+    history = metric_history() if show_forecast else pd.DataFrame()
+    if len(history) >= 2:
+        forecast, lower, upper = forecast_metric(history, 1)
+        predicted, last = forecast['value'].iloc[0], history['value'].iloc[-1]
+        number_format = "{:,.0f}" if trend_metric == "Number of Cases" else "{:,.2f}"
+        st.metric(
+            "Forecast Next Period",
+            number_format.format(predicted),
+            delta=f"{(predicted - last) / last:+.1%}" if last else None,
+            help=f"Period starting {forecast.index[0]:%Y-%m-%d}; {confidence_interval}% interval "
+                 f"{number_format.format(lower['value'].iloc[0])} to {number_format.format(upper['value'].iloc[0])}"
+        )
+    else:
+        st.metric("Forecast Next Period", "Not enough periods" if show_forecast else "Forecast off")
+# Seasonality of the metric over every complete period up to the end of the range
+seasonality = get_seasonality(data, time_unit, measure=TREND_METRICS[trend_metric], end_date=end_date)
 with col4:
-    st.metric("Seasonality Detected", "(Yes/No would appear here)")
+    if not seasonality.summary.empty:
+        overall = seasonality.summary.iloc[0]
+        st.metric(
+            "Seasonality Detected",
+            "Yes" if overall['seasonal'] else "No",
+            delta=f"every {overall['period']} {time_unit.lower()}s" if overall['period'] else None,
+            delta_color="off",
+            help=f"Autocorrelation {overall['strength']:.2f} at the strongest cycle"
+        )
+    else:
+        st.metric("Seasonality Detected", "Not enough periods")
 
 # Breakdown analysis
 if breakdown_variable != "None":
     st.header(f"Trend Breakdown by {breakdown_variable}")
     
+    breakdown_column = DIMENSION_LABELS[breakdown_variable]
+    breakdown = prepare_time_series_data(data, time_unit, by=[breakdown_column], start_date=start_date, end_date=end_date, in_database=True, median=False)
+    
     breakdown_chart = go.Figure()
     breakdown_chart.update_layout(
         title=f"{trend_metric} by {breakdown_variable} Over Time",
@@ -97,53 +208,169 @@ if breakdown_variable != "None":
         height=500,
         margin=dict(l=40, r=40, t=40, b=40)
     )
-    breakdown_chart.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Breakdown visualization would appear here",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    if breakdown.empty or breakdown_column not in breakdown.columns:
+        breakdown_chart.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="No cases in the selected date range",
+            showarrow=False,
+            font=dict(size=14)
+        )
+        values = pd.DataFrame()
+    else:
+        breakdown = breakdown.assign(value=metric_values(breakdown, trend_metric, time_unit, start_date, end_date).to_numpy())
+        values = breakdown.pivot(index='time_period', columns=breakdown_column, values='value')
+        colors = px.colors.qualitative.Plotly
+        for i, category in enumerate(values.columns):
+            breakdown_chart.add_trace(go.Scatter(
+                x=values.index,
+                y=values[category],
+                mode='lines+markers',
+                name=str(category),
+                legendgroup=str(category),
+                line=dict(color=colors[i % len(colors)])
+            ))
+        # Every category forecast in one batch, continuing its line dashed
+        history = metric_history([breakdown_column]) if show_forecast else pd.DataFrame()
+        if len(history) >= 2:
+            forecast, _, _ = forecast_metric(history, forecast_periods)
+            for i, category in enumerate(values.columns):
+                if category in forecast.columns:
+                    breakdown_chart.add_trace(go.Scatter(
+                        x=forecast.index,
+                        y=forecast[category],
+                        mode='lines',
+                        name=f"{category} (forecast)",
+                        legendgroup=str(category),
+                        showlegend=False,
+                        line=dict(color=colors[i % len(colors)], dash='dash')
+                    ))
+        breakdown_chart.update_layout(xaxis_title="Period", yaxis_title=trend_metric, hovermode="x unified")
     st.plotly_chart(breakdown_chart, use_container_width=True)
     
     # Breakdown metrics
     st.subheader("Key Insights")
     
     metrics_cols = st.columns(3)
-    with metrics_cols[0]:
-        st.info("Fastest growing category would appear here")
-    with metrics_cols[1]:
-        st.info("Most declining category would appear here")
-    with metrics_cols[2]:
-        st.info("Most volatile category would appear here")
+    if len(values) >= 2:
+        # Fitted slope per period relative to each category's mean, and relative spread
+        filled = values.fillna(0)
+        steps = np.arange(len(filled)) - (len(filled) - 1) / 2
+        slopes = pd.Series(steps @ (filled.to_numpy() - filled.to_numpy().mean(axis=0)) / (steps @ steps), index=filled.columns)
+        growth = slopes / filled.mean().replace(0, np.nan)
+        volatility = filled.std() / filled.mean().replace(0, np.nan)
+        with metrics_cols[0]:
+            if growth.notna().any():
+                st.info(f"Fastest growing: **{growth.idxmax()}** ({growth.max():+.1%} per period)")
+            else:
+                st.info("No category has cases in the selected range")
+        with metrics_cols[1]:
+            if growth.notna().any():
+                st.info(f"Most declining: **{growth.idxmin()}** ({growth.min():+.1%} per period)")
+            else:
+                st.info("No category has cases in the selected range")
+        with metrics_cols[2]:
+            if volatility.notna().any():
+                st.info(f"Most volatile: **{volatility.idxmax()}** (variation {volatility.max():.0%})")
+            else:
+                st.info("No category varies across periods")
+    else:
+        for column in metrics_cols:
+            with column:
+                st.info("Select a date range covering at least two periods")
+
+# Forecast of every fraud type x region series, fitted in one batch
+if show_forecast and {'fraud_type', 'region'} <= set(data.columns):
+    st.header("Forecast Outlook by Fraud Type and Region")
+    history = metric_history(['fraud_type', 'region'])
+    if len(history) >= 2:
+        forecast, lower, upper = forecast_metric(history, forecast_periods)
+        # Projected total over the horizon against the same number of past periods
+        recent = history.fillna(0).tail(forecast_periods).sum() if trend_metric != "Average Amount" else history.tail(forecast_periods).mean()
+        projected = forecast.sum() if trend_metric != "Average Amount" else forecast.mean()
+        outlook = pd.DataFrame({
+            'Last Period': history.iloc[-1],
+            'Next Period': forecast.iloc[0],
+            f'{confidence_interval}% Interval': [f"{low:,.1f} – {high:,.1f}" for low, high in zip(lower.iloc[0], upper.iloc[0])],
+            f'Projected Change ({forecast_periods} periods)': (projected - recent) / recent.replace(0, np.nan),
+        })
+        outlook.index = outlook.index.set_names(['Fraud Type', 'Region'])
+        outlook = outlook.sort_values(outlook.columns[-1], ascending=False, na_position='last').reset_index()
+        st.write(f"{len(forecast.columns)} series forecast for {forecast_periods} {time_unit.lower()} periods; fastest projected growth first")
+        st.dataframe(outlook.head(20).style.format({
+            'Last Period': "{:,.2f}",
+            'Next Period': "{:,.2f}",
+            outlook.columns[-1]: "{:+.1%}",
+        }, na_rep="–"), use_container_width=True)
+    else:
+        st.info("Not enough complete periods up to the end of the selected range to forecast")
 
 # Seasonal analysis
 st.header("Seasonal Patterns")
 
+# Categories ranked by seasonality: the breakdown, or fraud types by default
+seasonal_column = DIMENSION_LABELS[breakdown_variable] if breakdown_variable != "None" else 'fraud_type'
+seasonal_label = breakdown_variable if breakdown_variable != "None" else "Fraud Type"
+by_category = get_seasonality(data, time_unit, by=[seasonal_column], measure=TREND_METRICS[trend_metric], end_date=end_date)
+
 seasonal_chart = go.Figure()
 seasonal_chart.update_layout(
-    title="Seasonal Fraud Patterns",
+    title=f"Seasonal Fraud Patterns ({trend_metric} against its trend)",
     template="plotly_dark",
     height=400,
     margin=dict(l=40, r=40, t=40, b=40)
 )
-seasonal_chart.add_annotation(
-    x=0.5, y=0.5,
-    xref="paper", yref="paper",
-    text="Seasonal pattern visualization would appear here",
-    showarrow=False,
-    font=dict(size=14)
-)
+if not seasonality.profiles.empty:
+    profile = seasonality.profiles.iloc[:, 0]
+    seasonal_chart.add_trace(go.Bar(x=profile.index, y=profile, name="All cases", marker_color='#4F8BF9'))
+    if breakdown_variable != "None":
+        for category in by_category.profiles.columns:
+            seasonal_chart.add_trace(go.Scatter(
+                x=by_category.profiles.index,
+                y=by_category.profiles[category],
+                mode='lines+markers',
+                name=str(category)
+            ))
+    seasonal_chart.update_layout(yaxis=dict(tickformat="+.0%", title="Deviation from trend"), hovermode="x unified")
+else:
+    seasonal_chart.add_annotation(
+        x=0.5, y=0.5,
+        xref="paper", yref="paper",
+        text="Not enough complete periods for seasonal patterns (Year grouping has none)",
+        showarrow=False,
+        font=dict(size=14)
+    )
 st.plotly_chart(seasonal_chart, use_container_width=True)
 
 # Seasonal insights
 col1, col2 = st.columns(2)
-with col1:
-    st.subheader("Seasonal Peaks")
-    st.info("Information about seasonal peaks would appear here")
-with col2:
-    st.subheader("Seasonal Lows")
-    st.info("Information about seasonal lows would appear here")
+if not seasonality.profiles.empty:
+    profile = seasonality.profiles.iloc[:, 0].dropna()
+    with col1:
+        st.subheader("Seasonal Peaks")
+        st.info(f"Highest in **{profile.idxmax()}** ({profile.max():+.1%} against the trend)")
+    with col2:
+        st.subheader("Seasonal Lows")
+        st.info(f"Lowest in **{profile.idxmin()}** ({profile.min():+.1%} against the trend)")
+    
+    if not by_category.summary.empty:
+        st.subheader(f"Most Seasonal by {seasonal_label}")
+        ranking = by_category.ranked()
+        st.dataframe(pd.DataFrame({
+            seasonal_label: ranking.index.astype(str),
+            'Seasonal': np.where(ranking['seasonal'], "Yes", "No"),
+            f'Cycle ({time_unit.lower()}s)': ranking['period'],
+            'Strength': ranking['strength'].round(2),
+            'Peak': ranking['peak'],
+            'Low': ranking['low'],
+        }), hide_index=True, use_container_width=True)
+else:
+    with col1:
+        st.subheader("Seasonal Peaks")
+        st.info("Not enough complete periods to find seasonal peaks")
+    with col2:
+        st.subheader("Seasonal Lows")
+        st.info("Not enough complete periods to find seasonal lows")
 
 # Advanced trend analysis
 st.header("Advanced Trend Analysis")
@@ -0,0 +1,156 @@
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columns of a growing DataFrame kept in arrays with spare capacity, so
+# appending rows writes only the new rows instead of copying the frame.
+# Each frame handed out is a view of the first rows of the arrays; rows
+# written past its end are invisible to it, so published frames never
+# change. Only the frame ending at the last written row may append in
+# place; appending to an older one copies into new arrays.
+
+# Spare rows allocated when a buffer is (re)built, as a share of its rows
+GROWTH_FACTOR = 0.25
+MIN_SPARE_ROWS = 4096
+
+# id(df) -> (weak reference, AppendBuffer) for frames built here
+_buffers = {}
+_buffers_lock = threading.Lock()
+_append_lock = threading.Lock()
+
+class AppendBuffer:
+    """
+    Column storage behind frames built by append_rows().
+
+    Numeric, datetime and categorical columns live in preallocated NumPy
+    arrays (categoricals as their codes). Other columns, such as Arrow
+    strings, are kept as Series and appended with pd.concat, which only
+    adds a chunk for Arrow-backed data.
+    """
+
+    def __init__(self, arrays, series, dtypes, columns, capacity):
+        self.arrays = arrays
+        self.series = series
+        self.dtypes = dtypes
+        self.columns = columns
+        self.capacity = capacity
+        # Rows written so far; shared by every frame over these arrays
+        self.length = 0
+
+    @classmethod
+    def from_frame(cls, df, extra_rows=0):
+        """
+        Copy df into new arrays with room for extra_rows and some growth.
+        """
+        num_rows = len(df) + extra_rows
+        capacity = num_rows + max(MIN_SPARE_ROWS, int(num_rows * GROWTH_FACTOR))
+        arrays, series, dtypes = {}, {}, {}
+        for column in df.columns:
+            values = df[column]
+            dtypes[column] = values.dtype
+            storage = _storage(values)
+            if storage is None:
+                series[column] = values.reset_index(drop=True)
+                continue
+            array = np.empty(capacity, dtype=storage.dtype)
+            array[:len(df)] = storage
+            arrays[column] = array
+        buffer = cls(arrays, series, dtypes, list(df.columns), capacity)
+        buffer.length = len(df)
+        return buffer
+
+    def accepts(self, df, rows):
+        """
+        Whether rows can be written after df's last row in place.
+        """
+        if len(df) != self.length or self.length + len(rows) > self.capacity:
+            return False
+        if list(df.columns) != self.columns or list(rows.columns) != self.columns:
+            return False
+        return all(rows[column].dtype == self.dtypes[column] for column in self.arrays)
+
+    def append(self, rows):
+        """
+        Write rows after the last row and return the frame of all rows.
+        """
+        start, end = self.length, self.length + len(rows)
+        for column, array in self.arrays.items():
+            array[start:end] = _storage(rows[column])
+        for column in self.series:
+            self.series[column] = pd.concat([self.series[column], rows[column]], ignore_index=True)
+        self.length = end
+        return self.frame()
+
+    def frame(self):
+        """
+        DataFrame viewing the rows written so far.
+        """
+        columns = {}
+        for column in self.columns:
+            if column in self.series:
+                columns[column] = self.series[column]
+                continue
+            values = self.arrays[column][:self.length]
+            dtype = self.dtypes[column]
+            if isinstance(dtype, pd.CategoricalDtype):
+                values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            columns[column] = pd.Series(values, dtype=dtype, copy=False)
+        df = pd.DataFrame(columns, copy=False)
+        _register(df, self)
+        return df
+
+def _storage(values):
+    """
+    The NumPy array a column is buffered as, or None if it is kept as a Series.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return np.asarray(values.array.codes)
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        return values.to_numpy()
+    return None
+
+def _register(df, buffer):
+    key = id(df)
+    with _buffers_lock:
+        _buffers[key] = (weakref.ref(df), buffer)
+    weakref.finalize(df, _buffers.pop, key, None)
+
+def _buffer_of(df):
+    with _buffers_lock:
+        entry = _buffers.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    return None
+
+def append_rows(df, rows):
+    """
+    Return df with rows appended (a new frame with a fresh RangeIndex; df
+    is not modified).
+
+    When df was built by append_rows() and is the newest frame over its
+    buffer, only the new rows are written. Otherwise df is copied once into
+    a buffer with spare capacity, so the following appends are cheap.
+    """
+    if rows.empty:
+        return df
+    rows = rows.reindex(columns=df.columns)
+    # Two appends to the same frame must not both write its tail
+    with _append_lock:
+        buffer = _buffer_of(df)
+        if buffer is None or not buffer.accepts(df, rows):
+            if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+                return pd.concat([df, rows], ignore_index=True)
+            buffer = AppendBuffer.from_frame(df, len(rows))
+            if not buffer.accepts(df, rows):
+                # Dtypes differ (e.g. new categories): let pandas reconcile them
+                return pd.concat([df, rows], ignore_index=True)
+        merged = buffer.append(rows)
+    merged.attrs.update(df.attrs)
+    return merged
@@ -0,0 +1,227 @@
+import itertools
+import numpy as np
+import pandas as pd
+import logging
+from utils.data_version import get_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Association rules between case attributes, mined with Eclat over packed
+# bitsets: each item ("Region: Europe") holds one bit per case in uint64
+# words, so the support of an itemset is the popcount of the AND of its
+# items' bitsets. Frequent itemsets and all their rules are cached per
+# (data version, support); a new confidence only filters the rules.
+
+# Single-valued attribute columns and their item labels
+ITEM_COLUMNS = {
+    'fraud_type': 'Fraud Type',
+    'region': 'Region',
+    'risk_level': 'Risk Level',
+    'detection_method': 'Detection Method',
+    'status': 'Status',
+}
+
+# Comma-separated tags (custom data); a case can hold several
+TAGS_COLUMN = 'tags'
+
+# Largest itemset mined: one value per attribute column plus a few tags
+MAX_ITEMSET_SIZE = 5
+
+# Mined itemsets and rules for the most recent (data version, support) pairs
+_rules_cache = VersionedCache(max_entries=8)
+
+# Item bitsets for the most recent dataset versions
+_bitset_cache = VersionedCache(max_entries=2)
+
+def _pack(mask):
+    """
+    Pack a boolean row mask into uint64 words (bit i of the bitset is row i).
+    """
+    packed = np.packbits(mask, bitorder='little')
+    padding = -len(packed) % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(padding, dtype=np.uint8)])
+    return packed.view(np.uint64)
+
+class ItemBitsets:
+    """
+    The items of a dataset and one packed bitset of cases per item.
+
+    Items of the same attribute column share a group and never occur
+    together, so itemsets are only extended with items of other groups.
+    Every tag is its own group.
+    """
+
+    def __init__(self, labels, groups, bitsets, num_rows):
+        self.labels = labels
+        self.groups = groups
+        self.bitsets = bitsets
+        self.num_rows = num_rows
+
+    @classmethod
+    def build(cls, df):
+        labels, groups, bitsets = [], [], []
+        for group, (column, name) in enumerate(ITEM_COLUMNS.items()):
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, values = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, values = pd.factorize(series)
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            for code in np.flatnonzero(counts):
+                labels.append(f"{name}: {values[code]}")
+                groups.append(group)
+                bitsets.append(_pack(codes == code))
+
+        if TAGS_COLUMN in df.columns:
+            # Split each distinct tag string once, then map cases through its code
+            codes, values = pd.factorize(df[TAGS_COLUMN])
+            strings_per_tag = {}
+            for value_code, value in enumerate(values):
+                for tag in str(value).lower().split(','):
+                    if tag.strip():
+                        strings_per_tag.setdefault(tag.strip(), []).append(value_code)
+            for tag, value_codes in strings_per_tag.items():
+                labels.append(f"Tag: {tag}")
+                groups.append(len(ITEM_COLUMNS) + len(groups))
+                bitsets.append(_pack(np.isin(codes, value_codes)))
+
+        words = (len(df) + 63) // 64
+        bitsets = np.vstack(bitsets) if bitsets else np.zeros((0, words), dtype=np.uint64)
+        return cls(labels, np.asarray(groups, dtype=np.int32), bitsets, len(df))
+
+    def supports(self, items=None, prefix_bits=None):
+        """
+        Case counts of items (all by default), each ANDed with prefix_bits.
+        """
+        bitsets = self.bitsets if items is None else self.bitsets[items]
+        if prefix_bits is not None:
+            bitsets = bitsets & prefix_bits
+        return np.bitwise_count(bitsets).sum(axis=1, dtype=np.int64), bitsets
+
+    def memory_usage(self):
+        return self.bitsets.nbytes
+
+def _get_bitsets(df):
+    return _bitset_cache.get_or_build(get_data_version(df), lambda: ItemBitsets.build(df))
+
+class AssociationRules:
+    """
+    Frequent itemsets of a dataset at one minimum support, and every rule
+    they yield (antecedent => consequent) with its support, confidence and lift.
+    """
+
+    def __init__(self, itemsets, rules, num_rows):
+        self.itemsets = itemsets
+        self.rules = rules
+        self.num_rows = num_rows
+
+    @classmethod
+    def mine(cls, df, min_support, max_size=MAX_ITEMSET_SIZE):
+        """
+        Mine the itemsets of df with support >= min_support (share of cases)
+        depth-first (Eclat), then derive their rules.
+        """
+        items = _get_bitsets(df)
+        min_count = max(1, int(np.ceil(min_support * items.num_rows)))
+        counts, _ = items.supports()
+        frequent = np.flatnonzero(counts >= min_count)
+        # Least frequent first keeps the intersections small early on
+        frequent = frequent[np.argsort(counts[frequent], kind='stable')]
+
+        itemset_counts = {(int(item),): int(counts[item]) for item in frequent}
+        # Each entry: prefix itemset, its bitset and the items it may be extended with
+        stack = [((int(item),), items.bitsets[item], frequent[i + 1:]) for i, item in enumerate(frequent)]
+        while stack:
+            prefix, prefix_bits, candidates = stack.pop()
+            if len(prefix) >= max_size:
+                continue
+            candidates = candidates[~np.isin(items.groups[candidates], items.groups[list(prefix)])]
+            if len(candidates) == 0:
+                continue
+            candidate_counts, candidate_bits = items.supports(candidates, prefix_bits)
+            keep = np.flatnonzero(candidate_counts >= min_count)
+            for i in keep:
+                itemset = prefix + (int(candidates[i]),)
+                itemset_counts[tuple(sorted(itemset))] = int(candidate_counts[i])
+                # Copied so the stack does not keep the whole candidate block alive
+                stack.append((itemset, candidate_bits[i].copy(), candidates[keep[keep > i]]))
+
+        itemsets = pd.DataFrame({
+            'items': [[items.labels[item] for item in itemset] for itemset in itemset_counts],
+            'count': list(itemset_counts.values()),
+        })
+        itemsets['support'] = itemsets['count'] / max(items.num_rows, 1)
+        rules = cls._derive_rules(itemset_counts, items.labels, items.num_rows)
+        return cls(itemsets, rules, items.num_rows)
+
+    @staticmethod
+    def _derive_rules(itemset_counts, labels, num_rows):
+        """
+        Every split of each frequent itemset into antecedent and consequent;
+        all subsets of a frequent itemset are frequent, so their counts are known.
+        """
+        antecedents, consequents, rule_counts, antecedent_counts, consequent_counts = [], [], [], [], []
+        for itemset, count in itemset_counts.items():
+            for size in range(1, len(itemset)):
+                for antecedent in itertools.combinations(itemset, size):
+                    consequent = tuple(item for item in itemset if item not in antecedent)
+                    antecedents.append(antecedent)
+                    consequents.append(consequent)
+                    rule_counts.append(count)
+                    antecedent_counts.append(itemset_counts[antecedent])
+                    consequent_counts.append(itemset_counts[consequent])
+
+        rule_counts = np.asarray(rule_counts, dtype=np.float64)
+        confidence = rule_counts / np.maximum(np.asarray(antecedent_counts, dtype=np.float64), 1)
+        consequent_support = np.asarray(consequent_counts, dtype=np.float64) / max(num_rows, 1)
+        rules = pd.DataFrame({
+            'antecedent': [[labels[item] for item in antecedent] for antecedent in antecedents],
+            'consequent': [[labels[item] for item in consequent] for consequent in consequents],
+            'support': rule_counts / max(num_rows, 1),
+            'confidence': confidence,
+            'lift': confidence / np.where(consequent_support > 0, consequent_support, 1),
+        })
+        return rules.sort_values(['lift', 'confidence', 'support'], ascending=False, kind='stable').reset_index(drop=True)
+
+    def filter(self, min_confidence):
+        """
+        Rules with confidence >= min_confidence, best lift first.
+        """
+        return self.rules[self.rules['confidence'] >= min_confidence].reset_index(drop=True)
+
+def get_association_rules(df, min_support=0.1):
+    """
+    Return the AssociationRules of df at min_support, mining them once per
+    data version and support.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+    min_support : float
+        Minimum share of cases an itemset must occur in
+
+    Returns:
+    --------
+    AssociationRules
+    """
+    min_support = round(float(min_support), 6)
+    key = (get_data_version(df), min_support)
+    return _rules_cache.get_or_build(key, lambda: AssociationRules.mine(df, min_support))
+
+def case_items(df, position):
+    """
+    Item labels of the case at position, as used in the mined rules.
+    """
+    case = df.iloc[position]
+    items = {f"{name}: {case[column]}" for column, name in ITEM_COLUMNS.items()
+             if column in df.columns and pd.notna(case[column])}
+    tags = case.get(TAGS_COLUMN)
+    if isinstance(tags, str):
+        items.update(f"Tag: {tag.strip()}" for tag in tags.lower().split(',') if tag.strip())
+    return items
@@ -0,0 +1,1185 @@
+"""
+Performance benchmarks for FraudLens data paths.
+
+Run from the repository root, for example:
+
+    python -m utils.benchmarks load-data --rows 1000000
+    python -m utils.benchmarks bulk-load --rows 10000000 --database-url postgresql://...
+
+Benchmarks that touch a database use a temporary SQLite file unless
+--database-url points at a scratch database (it is seeded if empty).
+Each measured path runs in a fresh subprocess so the reported peak RSS
+belongs to that path alone.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import logging
+from contextlib import contextmanager
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _peak_rss_mb():
+    """
+    Peak resident set size of the current process in MB (Unix only).
+    """
+    import resource
+    import sys
+
+    try:
+        # VmHWM honours _reset_peak_rss(); ru_maxrss also counts the parent's peak
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _current_rss_mb():
+    """
+    Current resident set size in MB, or the peak where /proc is unavailable.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _reset_peak_rss():
+    """
+    Reset the kernel's peak RSS counter so imports and setup are not counted (Linux).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _run_measured(target, args, queue):
+    """
+    Subprocess entry point. target(*args) does imports and setup and returns
+    the callable to measure, which must return the number of rows processed.
+    """
+    run = target(*args)
+    _reset_peak_rss()
+    baseline = _current_rss_mb()
+    start = time.perf_counter()
+    rows = run()
+    elapsed = time.perf_counter() - start
+    queue.put((rows, elapsed, _peak_rss_mb() - baseline))
+
+
+def measure(target, *args):
+    """
+    Run the callable returned by target(*args) in a fresh interpreter.
+
+    Returns:
+    --------
+    dict
+        rows processed, seconds, rows/sec and peak RSS growth in MB
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_measured, args=(target, args, queue))
+    process.start()
+    rows, elapsed, peak_mb = queue.get()
+    process.join()
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+        'peak_rss_mb': peak_mb,
+    }
+
+
+def print_results(title, results):
+    """
+    Print a small table of measure() results keyed by path name.
+    """
+    print(f"\n{title}")
+    print(f"{'path':<28}{'rows':>12}{'seconds':>10}{'rows/sec':>14}{'peak RSS MB':>14}")
+    for name, result in results.items():
+        print(
+            f"{name:<28}{result['rows']:>12,}{result['seconds']:>10.2f}"
+            f"{result['rows_per_sec']:>14,.0f}{result['peak_rss_mb']:>14.1f}"
+        )
+
+
+def _create_benchmark_database(database_url, num_rows):
+    """
+    Create fraud_cases in database_url and fill it with num_rows synthetic cases.
+    """
+    from sqlalchemy import create_engine, func, select
+    from utils.bulk_loader import bulk_load_fraud_cases
+    from utils.db_connection import Base, FraudCase
+    from utils.sample_data_generator import iter_sample_fraud_data
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.connect() as connection:
+        if connection.execute(select(func.count()).select_from(FraudCase.__table__)).scalar():
+            engine.dispose()
+            return
+    bulk_load_fraud_cases(iter_sample_fraud_data(num_rows, seed=0), engine=engine, batch_size=50000)
+    engine.dispose()
+
+
+# load_data read paths
+
+def _read_with_orm(database_url):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from utils.db_connection import FraudCase, query_to_dataframe
+
+    engine = create_engine(database_url)
+
+    def run():
+        with Session(engine) as session:
+            return len(query_to_dataframe(session.query(FraudCase).all()))
+    return run
+
+
+def _read_columnar(database_url):
+    from sqlalchemy import create_engine
+    from utils.db_connection import fetch_dataframe
+
+    engine = create_engine(database_url)
+    return lambda: len(fetch_dataframe(engine=engine))
+
+
+@contextmanager
+def _benchmark_database(num_rows, database_url=None):
+    """
+    Yield a seeded database URL: database_url if given, else a temporary SQLite file.
+    """
+    if database_url:
+        _create_benchmark_database(database_url, num_rows)
+        yield database_url
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        _create_benchmark_database(database_url, num_rows)
+        yield database_url
+
+
+def benchmark_load_data(num_rows, database_url=None):
+    """
+    Compare the ORM + __dict__ read path with the columnar bulk read.
+    """
+    with _benchmark_database(num_rows, database_url) as url:
+        results = {
+            'orm + query_to_dataframe': measure(_read_with_orm, url),
+            'columnar fetch_dataframe': measure(_read_columnar, url),
+        }
+    print_results(f"load_data read paths ({num_rows:,} rows)", results)
+    return results
+
+
+# Ingestion paths
+
+# The ORM path is only measured up to this many rows; beyond it takes too long
+ORM_LOAD_LIMIT = 100000
+
+
+def _template_chunks(template, num_rows):
+    """
+    Yield num_rows synthetic cases as chunks, reusing one generated template
+    chunk with fresh case IDs so generation time is not measured.
+    """
+    suffix = template['case_id'].str.replace('CASE-', '', regex=False)
+    for number, start in enumerate(range(0, num_rows, len(template))):
+        chunk = template.iloc[:min(len(template), num_rows - start)].copy()
+        chunk['case_id'] = f"B{number:05d}-" + suffix.iloc[:len(chunk)]
+        yield chunk
+
+
+def _prepare_load_target(database_url, num_rows, chunk_size=100000):
+    """
+    Create an empty fraud_cases table and a template chunk to load into it.
+    """
+    from sqlalchemy import create_engine
+    from utils.db_connection import Base, FraudCase
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(FraudCase.__table__.delete())
+    return engine, generate_sample_fraud_data(min(chunk_size, num_rows))
+
+
+def _load_with_orm(database_url, num_rows):
+    from sqlalchemy.orm import Session
+    from utils.db_connection import FraudCase
+
+    engine, template = _prepare_load_target(database_url, num_rows)
+
+    def run():
+        loaded = 0
+        for chunk in _template_chunks(template, num_rows):
+            with Session(engine) as session:
+                session.add_all([
+                    FraudCase(
+                        case_id=row['case_id'],
+                        detection_date=row['detection_date'].date(),
+                        fraud_type=row['fraud_type'],
+                        reported_amount=float(row['reported_amount']),
+                        risk_level=row['risk_level'],
+                        status=row['status'],
+                        region=row['region'],
+                        detection_method=row['detection_method'],
+                        case_summary=row['case_summary']
+                    )
+                    for _, row in chunk.iterrows()
+                ])
+                session.commit()
+            loaded += len(chunk)
+        return loaded
+    return run
+
+
+def _load_with_bulk_loader(database_url, num_rows, method, batch_size):
+    from utils.bulk_loader import bulk_load_fraud_cases
+
+    engine, template = _prepare_load_target(database_url, num_rows)
+    return lambda: bulk_load_fraud_cases(
+        _template_chunks(template, num_rows), engine=engine, batch_size=batch_size, method=method
+    )
+
+
+def benchmark_bulk_load(num_rows, database_url=None, batch_size=10000):
+    """
+    Compare per-row ORM inserts with the batched bulk loader (and COPY on PostgreSQL).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        results = {}
+        if num_rows <= ORM_LOAD_LIMIT:
+            results['orm add_all'] = measure(_load_with_orm, url, num_rows)
+        results['bulk executemany'] = measure(_load_with_bulk_loader, url, num_rows, 'executemany', batch_size)
+        if url.startswith('postgresql'):
+            results['bulk COPY'] = measure(_load_with_bulk_loader, url, num_rows, 'copy', batch_size)
+    print_results(f"Ingestion paths ({num_rows:,} rows, batch size {batch_size:,})", results)
+    return results
+
+
+# Startup with and without the dataset snapshot
+
+def _startup_load_data(database_url, snapshot_dir):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['FRAUDLENS_SNAPSHOT_DIR'] = snapshot_dir
+    from utils.data_processing import load_data
+
+    return lambda: len(load_data())
+
+
+def benchmark_snapshot(num_rows, database_url=None):
+    """
+    Compare load_data() startup without a snapshot, on a cold start (database
+    read plus snapshot write) and on a warm start (memory-mapped snapshot).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        _create_benchmark_database(url, num_rows)
+        snapshot_dir = os.path.join(tmp, 'snapshots')
+        results = {
+            'no snapshot': measure(_startup_load_data, url, ''),
+            'cold (read + write)': measure(_startup_load_data, url, snapshot_dir),
+            'warm (memory-mapped)': measure(_startup_load_data, url, snapshot_dir),
+        }
+    print_results(f"load_data startup ({num_rows:,} rows)", results)
+    return results
+
+
+# Incremental refresh
+
+def _refresh_after_changes(database_url, num_new, num_updated, incremental):
+    from sqlalchemy import create_engine, text
+    from utils.bulk_loader import bulk_load_fraud_cases
+    from utils.data_processing import fetch_fraud_cases, refresh_data
+    from utils.db_connection import add_updated_at_column, add_deletion_log
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.search_index import get_search_index
+
+    engine = create_engine(database_url)
+    add_updated_at_column(engine)
+    add_deletion_log(engine)
+    df = fetch_fraud_cases(engine)
+    get_search_index(df)
+
+    new_cases = generate_sample_fraud_data(num_new + 1)
+    new_cases['case_id'] = f"NEW{os.getpid()}-" + new_cases['case_id'].astype(str)
+    if incremental:
+        # A running app has refreshed before: the first refresh copies the
+        # frame once into columns with spare capacity, later ones append
+        bulk_load_fraud_cases(new_cases.iloc[:1], engine=engine)
+        df = refresh_data(df, engine)
+    bulk_load_fraud_cases(new_cases.iloc[1:], engine=engine)
+    if num_updated:
+        with engine.begin() as connection:
+            connection.execute(
+                text("UPDATE fraud_cases SET status = 'Closed' WHERE id % :step = 0"),
+                {'step': max(1, len(df) // num_updated)}
+            )
+
+    if incremental:
+        return lambda: len(refresh_data(df, engine))
+    return lambda: len(fetch_fraud_cases(engine))
+
+
+def benchmark_refresh(num_rows, database_url=None, num_new=1000, num_updated=100):
+    """
+    Time refresh_data() after num_new inserts and ~num_updated updates
+    against reloading the whole table.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        _create_benchmark_database(url, num_rows)
+        results = {
+            'full reload': measure(_refresh_after_changes, url, num_new, num_updated, False),
+            'refresh_data': measure(_refresh_after_changes, url, num_new, num_updated, True),
+            'refresh_data (inserts only)': measure(_refresh_after_changes, url, num_new, 0, True),
+        }
+    print_results(f"Refresh after {num_new:,} new and ~{num_updated:,} updated cases ({num_rows:,} rows)", results)
+    return results
+
+
+# Sessions sharing one dataset
+
+SESSION_COUNTS = [1, 10, 100]
+
+
+def _open_sessions(database_url, num_sessions, shared):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['FRAUDLENS_SNAPSHOT_DIR'] = ''
+    os.environ['FRAUDLENS_REFRESH_INTERVAL'] = '0'
+    from utils.data_processing import load_data
+    from utils.shared_data import get_shared_data
+
+    def run():
+        # Each simulated session keeps what a page script would keep alive
+        sessions = []
+        for _ in range(num_sessions):
+            if shared:
+                sessions.append({'filters': {}, 'selected_case': None})
+                data = get_shared_data()
+            else:
+                data = load_data()
+                sessions.append({'filters': {}, 'selected_case': None, 'data': data})
+        return sum(len(data) for _ in sessions)
+
+    return run
+
+
+def benchmark_sessions(num_rows, database_url=None):
+    """
+    Memory and load time for 1, 10 and 100 simulated sessions, each loading
+    its own copy of the data versus all sharing the process-wide dataset.
+    """
+    with _benchmark_database(num_rows, database_url) as url:
+        results = {}
+        for num_sessions in SESSION_COUNTS:
+            results[f"per-session copy x{num_sessions}"] = measure(_open_sessions, url, num_sessions, False)
+            results[f"shared x{num_sessions}"] = measure(_open_sessions, url, num_sessions, True)
+    print_results(f"Sessions ({num_rows:,} rows; rows = rows reachable from all sessions)", results)
+    return results
+
+
+# Case similarity
+
+def benchmark_similarity(num_rows, database_url=None, k=10, num_queries=50):
+    """
+    Time one-vs-all scoring and top-k lookups of the similarity engine
+    against the pairwise calculate_similarity it replaces.
+    """
+    import numpy as np
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.similarity import NeighborIndex, SimilarityEngine
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    start = time.perf_counter()
+    engine = SimilarityEngine.build(df)
+    build_seconds = time.perf_counter() - start
+    queries = np.random.default_rng(0).integers(0, num_rows, num_queries)
+
+    def per_query_ms(func):
+        timings = []
+        for position in queries:
+            start = time.perf_counter()
+            func(position)
+            timings.append((time.perf_counter() - start) * 1000)
+        return float(np.median(timings))
+
+    # The pairwise path: two boolean-mask row lookups per pair, fields compared in Python
+    case_ids = df['case_id'].to_numpy()
+    query_id = case_ids[queries[0]]
+    sample = case_ids[:200]
+    start = time.perf_counter()
+    for other_id in sample:
+        case1 = df[df['case_id'] == query_id].iloc[0]
+        case2 = df[df['case_id'] == other_id].iloc[0]
+        _ = [case1[c] == case2[c] for c in ['fraud_type', 'region', 'detection_method', 'risk_level', 'reported_amount']]
+    pairwise_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+    start = time.perf_counter()
+    engine.top_k(queries, k)
+    batch_ms = (time.perf_counter() - start) * 1000 / num_queries
+
+    start = time.perf_counter()
+    index = NeighborIndex.build(df)
+    index_seconds = time.perf_counter() - start
+
+    rows = {
+        'score vs all cases': per_query_ms(engine.score),
+        f'top {k}': per_query_ms(lambda position: engine.top_k(position, k)),
+        f'top {k}, batch of {num_queries}': batch_ms,
+        'pairwise loop (estimated)': pairwise_ms * num_rows,
+        f'neighbour index top {k}': per_query_ms(lambda position: index.query(position, k)),
+        'neighbour index >= 0.9': per_query_ms(lambda position: index.query(position, min_similarity=0.9)),
+        f'neighbour index top {k} >= 0.7': per_query_ms(lambda position: index.query(position, k, 0.7)),
+    }
+    print(f"\nCase similarity ({num_rows:,} rows), engine build {build_seconds:.2f} s, "
+          f"neighbour index build {index_seconds:.2f} s")
+    print(f"{'path':<32}{'ms per query case':>20}")
+    for name, milliseconds in rows.items():
+        print(f"{name:<32}{milliseconds:>20,.2f}")
+
+
+# Text similarity
+
+def _with_unique_notes(df, words_per_note=8, vocabulary_size=20000):
+    """
+    Give every case analyst notes of random made-up words, so (unlike the
+    templated summaries) every document is distinct.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    vocabulary = pd.Series([''.join(word) for word in letters[rng.integers(0, 26, (vocabulary_size, 7))]])
+    # Zipf-like word frequencies, as in real notes
+    picks = np.minimum(rng.zipf(1.3, (len(df), words_per_note)) - 1, vocabulary_size - 1)
+    notes = vocabulary.iloc[picks[:, 0]].reset_index(drop=True)
+    for column in range(1, words_per_note):
+        notes = notes + ' ' + vocabulary.iloc[picks[:, column]].reset_index(drop=True)
+    df = df.copy()
+    df['analyst_notes'] = notes.to_numpy()
+    return df
+
+
+def benchmark_text_similarity(num_rows, database_url=None, k=10, num_queries=64):
+    """
+    Fit time, memory and top-k latency of the TF-IDF text model on the
+    templated generated summaries and on summaries plus unique notes.
+    """
+    import numpy as np
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.text_similarity import TextModel
+
+    generated = generate_sample_fraud_data(num_rows, seed=0)
+    corpora = {
+        'generated summaries': generated,
+        'summaries + unique notes': _with_unique_notes(generated),
+    }
+    queries = np.random.default_rng(0).integers(0, num_rows, num_queries)
+
+    print(f"\nTF-IDF text similarity ({num_rows:,} documents)")
+    print(f"{'corpus':<28}{'fit s':>8}{'documents':>12}{'terms':>8}{'MB':>8}{'top-k ms':>10}{'batch ms/q':>12}")
+    for name, df in corpora.items():
+        start = time.perf_counter()
+        model = TextModel.build(df)
+        fit_seconds = time.perf_counter() - start
+        model.top_k(queries[0], k)
+
+        timings = []
+        for position in queries[:20]:
+            start = time.perf_counter()
+            model.top_k(position, k)
+            timings.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        model.top_k(queries, k)
+        batch_ms = (time.perf_counter() - start) * 1000 / num_queries
+
+        documents, terms = model.matrix.shape
+        print(f"{name:<28}{fit_seconds:>8.2f}{documents:>12,}{terms:>8,}{model.memory_usage() / 1e6:>8.1f}"
+              f"{float(np.median(timings)):>10.2f}{batch_ms:>12.2f}")
+
+
+def benchmark_campaigns(num_rows, database_url=None, update_ratio=0.01):
+    """
+    Build time and memory of the MinHash LSH campaign index on templated
+    summaries and on summaries made distinct with random words, and the
+    time to add the last update_ratio of the rows incrementally.
+    """
+    import numpy as np
+    import pandas as pd
+    from utils.campaigns import CAMPAIGN_COLUMNS, CampaignIndex
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.text_similarity import case_texts
+
+    generated = generate_sample_fraud_data(num_rows, seed=0)
+    distinct = _with_unique_notes(generated, words_per_note=4)
+    corpora = {
+        'generated summaries': generated,
+        'distinct summaries': distinct.assign(case_summary=distinct['case_summary'] + ' ' + distinct['analyst_notes']),
+    }
+    num_updated = max(1, int(num_rows * update_ratio))
+
+    print(f"\nMinHash LSH campaigns ({num_rows:,} cases, update adds {num_updated:,})")
+    print(f"{'corpus':<24}{'build s':>9}{'documents':>12}{'campaigns':>11}{'in campaign':>13}{'MB':>8}{'update s':>10}")
+    for name, df in corpora.items():
+        start = time.perf_counter()
+        index = CampaignIndex.build(df)
+        build_seconds = time.perf_counter() - start
+        campaigns = pd.Series(index.campaign_labels())
+
+        base = CampaignIndex.build(df.iloc[:-num_updated])
+        texts = case_texts(df.iloc[-num_updated:], CAMPAIGN_COLUMNS).to_numpy(dtype=object)
+        start = time.perf_counter()
+        base.with_changes(texts, np.arange(num_rows - num_updated, num_rows), num_rows)
+        update_seconds = time.perf_counter() - start
+
+        print(f"{name:<24}{build_seconds:>9.2f}{len(index.documents):>12,}{campaigns.nunique():>11,}"
+              f"{campaigns.notna().mean():>13.1%}{index.memory_usage() / 1e6:>8.1f}{update_seconds:>10.2f}")
+
+
+# Pattern clustering
+
+def _cluster_full_matrix(num_rows, n_clusters, features):
+    import numpy as np
+    from sklearn.cluster import KMeans
+    from utils.clustering import FeatureEncoder
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+
+    def run():
+        # Materializes every encoded row at once, then fits and profiles with pandas
+        features_matrix = FeatureEncoder(df, features).encode(np.arange(len(df)))
+        labels = KMeans(n_clusters=n_clusters, n_init=1, random_state=0).fit_predict(features_matrix)
+        grouped = df.assign(cluster=labels).groupby('cluster')
+        grouped['reported_amount'].mean()
+        grouped['fraud_type'].value_counts()
+        grouped['risk_level'].agg(lambda risk: risk.mode().iloc[0])
+        return len(df)
+    return run
+
+
+def _cluster_partial_fit(num_rows, n_clusters, features):
+    from utils.clustering import ClusterResult
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    return lambda: len(ClusterResult.fit(df, n_clusters, features).labels)
+
+
+def benchmark_clustering(num_rows, database_url=None, n_clusters=8):
+    """
+    Compare k-means on the fully materialized feature matrix (plus pandas
+    profiles) with MiniBatchKMeans partial_fit over batches and one
+    chunked assignment and profile pass.
+    """
+    from utils.clustering import CLUSTER_FEATURES
+
+    features = sorted(CLUSTER_FEATURES.values())
+    results = {
+        'kmeans full matrix': measure(_cluster_full_matrix, num_rows, n_clusters, features),
+        'minibatch partial_fit': measure(_cluster_partial_fit, num_rows, n_clusters, features),
+    }
+    print_results(f"Pattern clustering ({num_rows:,} rows, k={n_clusters}, all features)", results)
+    return results
+
+
+# Anomaly detection
+
+def _fit_anomaly_model(num_rows, method):
+    from utils.anomaly import AnomalyScores
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    return lambda: len(AnomalyScores.fit(df, method).scores)
+
+
+def benchmark_anomalies(num_rows, database_url=None, contamination=0.05, svm_rows=50000):
+    """
+    Training on a sample and chunked scoring of every row per anomaly
+    method, then the cost of a new contamination (re-threshold only),
+    reloading a saved model and scoring svm_rows with libsvm versus the
+    matrix-product One-Class SVM path.
+    """
+    import numpy as np
+    from utils import anomaly
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    results = {
+        method: measure(_fit_anomaly_model, num_rows, method)
+        for method in anomaly.TRAINING_SAMPLE_SIZES
+    }
+    print_results(f"Anomaly model fit and scoring ({num_rows:,} rows)", results)
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        os.environ['FRAUDLENS_SNAPSHOT_DIR'] = snapshot_dir
+        result = anomaly.get_anomaly_scores(df, 'one_class_svm')
+
+        start = time.perf_counter()
+        result.flags(contamination + 0.01)
+        threshold_ms = (time.perf_counter() - start) * 1000
+
+        anomaly._score_cache.clear()
+        start = time.perf_counter()
+        anomaly.get_anomaly_scores(df, 'one_class_svm')
+        load_ms = (time.perf_counter() - start) * 1000
+        del os.environ['FRAUDLENS_SNAPSHOT_DIR']
+
+    encoder = anomaly.FeatureEncoder(df, [f for f in anomaly.ANOMALY_FEATURES if f in df.columns])
+    block = encoder.encode(np.arange(min(svm_rows, len(df))))
+    start = time.perf_counter()
+    expected = -result.model.score_samples(block)
+    libsvm_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = anomaly._score_block('one_class_svm', result.model, block)
+    blas_seconds = time.perf_counter() - start
+
+    print(f"\nRe-threshold at a new contamination: {threshold_ms:.2f} ms")
+    print(f"Reload saved model and scores: {load_ms:.2f} ms")
+    print(f"One-Class SVM scoring of {len(block):,} rows ({len(result.model.support_vectors_):,} support vectors): "
+          f"libsvm {libsvm_seconds:.2f}s, matrix products {blas_seconds:.2f}s "
+          f"(max difference {np.abs(scores - expected).max():.1e})")
+    return results
+
+
+# Association rules
+
+def _mine_boolean_matrix(num_rows, min_support):
+    import itertools
+    import numpy as np
+    import pandas as pd
+    from utils.association_rules import ITEM_COLUMNS
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+
+    def run():
+        # Level-wise Apriori over a one-hot boolean frame: one byte per case and item
+        onehot = pd.get_dummies(df[list(ITEM_COLUMNS)].astype(object))
+        min_count = np.ceil(min_support * len(df))
+        columns = {name: onehot[name].to_numpy() for name in onehot.columns}
+        level = [(name,) for name, column in columns.items() if column.sum() >= min_count]
+        frequent = list(level)
+        while level:
+            items = sorted({item for itemset in level for item in itemset})
+            known = set(level)
+            candidates = {tuple(sorted(set(itemset) | {item})) for itemset in level for item in items if item not in itemset}
+            candidates = [c for c in candidates if all(subset in known for subset in itertools.combinations(c, len(c) - 1))]
+            level = [c for c in candidates if np.logical_and.reduce([columns[item] for item in c]).sum() >= min_count]
+            frequent.extend(level)
+        return len(df)
+    return run
+
+
+def _mine_bitsets(num_rows, min_support):
+    from utils.association_rules import AssociationRules
+    from utils.data_version import get_data_version
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    # The app hashes the dataset version once at load, not per analysis
+    get_data_version(df)
+    return lambda: AssociationRules.mine(df, min_support).num_rows
+
+
+def benchmark_association_rules(num_rows, database_url=None, min_support=0.01, min_confidence=0.5):
+    """
+    Compare level-wise Apriori over a one-hot boolean frame with Eclat over
+    packed item bitsets, then time a confidence change on the mined rules.
+    """
+    from utils.association_rules import AssociationRules
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    results = {
+        'apriori boolean matrix': measure(_mine_boolean_matrix, num_rows, min_support),
+        'eclat packed bitsets': measure(_mine_bitsets, num_rows, min_support),
+    }
+    print_results(f"Association rule mining ({num_rows:,} cases, support {min_support:.0%})", results)
+
+    mined = AssociationRules.mine(generate_sample_fraud_data(num_rows, seed=0), min_support)
+    start = time.perf_counter()
+    rules = mined.filter(min_confidence)
+    filter_ms = (time.perf_counter() - start) * 1000
+    print(f"\n{len(mined.itemsets):,} itemsets, {len(mined.rules):,} rules; "
+          f"confidence {min_confidence:.0%} keeps {len(rules):,} in {filter_ms:.2f} ms")
+    return results
+
+
+# Time-series rollups
+
+# (time unit, breakdown, filters) of the Dashboard and Trend Analysis queries timed
+_TIME_SERIES_QUERIES = [
+    ('month', [], None),
+    ('week', ['fraud_type'], None),
+    ('day', ['region'], {'risk_level': ['High', 'Critical']}),
+    (None, ['fraud_type', 'region'], None),
+]
+
+
+def _time_series_from_cases(df, time_unit, by, filters):
+    """
+    A rollup computed straight from the cases, as prepare_time_series_data used to.
+    """
+    import pandas as pd
+
+    if filters:
+        for column, values in filters.items():
+            df = df[df[column].isin(values)]
+    keys = list(by)
+    if time_unit is not None:
+        dates = pd.to_datetime(df['detection_date'])
+        period = dates.dt.floor('D') if time_unit == 'day' else dates.dt.to_period(time_unit[0].upper()).dt.start_time
+        df = df.assign(time_period=period)
+        keys = ['time_period'] + keys
+    return df.groupby(keys, observed=True)['reported_amount'].agg(['size', 'sum', 'mean', 'min', 'max'])
+
+
+def benchmark_time_cube(num_rows, database_url=None, repeats=5):
+    """
+    Time Dashboard and Trend Analysis rollups computed from the cases
+    against the same rollups answered from the pre-aggregated cube, and
+    the cube's build and incremental update.
+    """
+    import numpy as np
+    import pandas as pd
+    from utils.data_version import get_data_version
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.time_cube import TimeCube, get_time_cube, update_time_cube
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    start = time.perf_counter()
+    cube = get_time_cube(df)
+    build_seconds = time.perf_counter() - start
+
+    print(f"\nTime-series rollups ({num_rows:,} cases, {len(cube.cells):,} cube cells, built in {build_seconds:.2f}s)")
+    print(f"{'query':<44}{'cases ms':>10}{'cube first ms':>15}{'cube ms':>10}{'rows':>8}")
+    for time_unit, by, filters in _TIME_SERIES_QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            _time_series_from_cases(df, time_unit, by, filters)
+        cases_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        # The first query on a set of dimensions derives its view from the cells
+        start = time.perf_counter()
+        result = cube.rollup(time_unit, by=by, filters=filters)
+        first_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for _ in range(repeats):
+            cube.rollup(time_unit, by=by, filters=filters)
+        cube_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        name = f"{time_unit or 'total'} by {', '.join(by) or '-'}" + (f" where {', '.join(filters)}" if filters else '')
+        print(f"{name:<44}{cases_ms:>10.1f}{first_ms:>15.1f}{cube_ms:>10.1f}{len(result):>8,}")
+
+    # Incremental update after appending 1% new cases
+    added = generate_sample_fraud_data(max(1, num_rows // 100), seed=1)
+    merged = pd.concat([df, added], ignore_index=True)
+    get_data_version(merged)
+    start = time.perf_counter()
+    update_time_cube(df, merged, np.arange(len(df), len(merged)))
+    update_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    TimeCube.build(merged)
+    rebuild_seconds = time.perf_counter() - start
+    print(f"\nAppend {len(added):,} cases: incremental update {update_seconds:.2f}s, full rebuild {rebuild_seconds:.2f}s")
+
+
+def benchmark_db_aggregation(num_rows, database_url=None, repeats=3):
+    """
+    Time the Trend Analysis rollups computed by fetching the cases and
+    grouping them in pandas against one GROUP BY query in the database.
+    """
+    from sqlalchemy import create_engine, select
+    from utils.db_connection import FraudCase, aggregate_time_series, fetch_dataframe
+
+    table = FraudCase.__table__
+    columns = ['detection_date', 'reported_amount', 'fraud_type', 'region', 'risk_level']
+    with _benchmark_database(num_rows, database_url) as url:
+        engine = create_engine(url)
+        print(f"\nTime-series aggregation ({engine.dialect.name}, {num_rows:,} cases)")
+        print(f"{'query':<44}{'fetch + group ms':>18}{'GROUP BY ms':>13}{'rows':>8}")
+        for time_unit, by, filters in _TIME_SERIES_QUERIES:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                cases = fetch_dataframe(select(*(table.c[column] for column in columns)), engine)
+                _time_series_from_cases(cases, time_unit, by, filters)
+            fetch_ms = (time.perf_counter() - start) * 1000 / repeats
+            del cases
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = aggregate_time_series(engine, time_unit, by=by, filters=filters)
+            query_ms = (time.perf_counter() - start) * 1000 / repeats
+
+            name = f"{time_unit or 'total'} by {', '.join(by) or '-'}" + (f" where {', '.join(filters)}" if filters else '')
+            print(f"{name:<44}{fetch_ms:>18.1f}{query_ms:>13.1f}{len(result):>8,}")
+        engine.dispose()
+
+
+# Forecasting
+
+def benchmark_forecast(num_rows, database_url=None, repeats=3):
+    """
+    Time Holt-Winters fits of every fraud_type x region x risk_level series
+    in one vectorized batch against fitting the series one at a time.
+    """
+    from utils.forecasting import HoltWinters, complete_periods
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.time_cube import get_time_cube
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    cube = get_time_cube(df)
+    by = ['fraud_type', 'region', 'risk_level']
+    print(f"\nHolt-Winters fits ({num_rows:,} cases)")
+    print(f"{'time unit':<12}{'series':>8}{'periods':>9}{'batch ms':>10}{'one at a time ms':>18}")
+    for time_unit in ['month', 'week']:
+        rollup = cube.rollup(time_unit, by=by)
+        series = complete_periods(rollup.pivot(index='time_period', columns=by, values='count'), time_unit)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            HoltWinters.fit(series, time_unit, fill_value=0)
+        batch_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        start = time.perf_counter()
+        for column in series.columns:
+            HoltWinters.fit(series[[column]], time_unit, fill_value=0)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{time_unit:<12}{series.shape[1]:>8,}{series.shape[0]:>9,}{batch_ms:>10.1f}{single_ms:>18.1f}")
+
+
+# Seasonality detection
+
+def benchmark_seasonality(num_rows, database_url=None, repeats=5):
+    """
+    Time seasonality detection over every fraud_type x region x risk_level
+    series as one 2-D array against detecting the series one at a time.
+    """
+    from utils.forecasting import complete_periods
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.seasonality import Seasonality
+    from utils.time_cube import get_time_cube
+
+    df = generate_sample_fraud_data(num_rows, seed=0)
+    cube = get_time_cube(df)
+    by = ['fraud_type', 'region', 'risk_level']
+    print(f"\nSeasonality detection ({num_rows:,} cases)")
+    print(f"{'time unit':<12}{'series':>8}{'periods':>9}{'batch ms':>10}{'one at a time ms':>18}{'seasonal':>10}")
+    for time_unit in ['day', 'week', 'month']:
+        rollup = cube.rollup(time_unit, by=by)
+        series = rollup.pivot(index='time_period', columns=by, values='count')
+        series = complete_periods(series, time_unit, cube.days.min(), cube.days.max())
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = Seasonality.detect(series, time_unit)
+        batch_ms = (time.perf_counter() - start) * 1000 / repeats
+
+        start = time.perf_counter()
+        for column in series.columns:
+            Seasonality.detect(series[[column]], time_unit)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{time_unit:<12}{series.shape[1]:>8,}{series.shape[0]:>9,}{batch_ms:>10.1f}{single_ms:>18.1f}"
+              f"{int(result.summary['seasonal'].sum()):>10,}")
+
+
+# Custom data ingestion
+
+def _write_custom_export(path, num_rows, compress=False, ndjson=False):
+    """
+    Write num_rows analyst-export records (the attached sample's format) as
+    a JSON array or NDJSON, optionally gzipped.
+    """
+    import gzip
+    import json
+    import random
+
+    rng = random.Random(0)
+    tags = ['phishing', 'carding', 'account takeover', 'social engineering', 'gift card', 'Apple ID', 'false positive']
+    statuses = ['confirmed_fraud', 'false_positive', 'under_investigation']
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('' if ndjson else '[\n')
+        for i in range(num_rows):
+            record = json.dumps({
+                'case_id': f"C{i:09d}",
+                'date': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'tags': rng.sample(tags, rng.randint(1, 3)),
+                'description': f"Customer reported suspicious activity on account {rng.randint(0, 10 ** 8)}.",
+                'status': rng.choice(statuses),
+                'analyst_notes': "Pattern matches earlier reports in the same campaign.",
+            })
+            if ndjson:
+                f.write(record + '\n')
+            else:
+                f.write(('  ' if i == 0 else ',\n  ') + record)
+        f.write('' if ndjson else '\n]\n')
+
+
+def _custom_json_load(path):
+    import json
+    import pandas as pd
+    from utils.categories import encode_categories
+    from utils.custom_data_loader import standardize_fraud_data
+
+    def run():
+        # The previous load_custom_fraud_data(): whole file parsed, then one DataFrame
+        with open(path) as f:
+            data = json.load(f)
+        return len(encode_categories(standardize_fraud_data(pd.DataFrame(data))))
+    return run
+
+
+def _custom_streamed_load(path):
+    from utils.custom_data_loader import load_custom_fraud_data
+
+    return lambda: len(load_custom_fraud_data(path))
+
+
+def _custom_streamed_batches(path):
+    from utils.custom_data_loader import iter_custom_fraud_batches
+
+    return lambda: sum(len(batch) for batch in iter_custom_fraud_batches(path))
+
+
+def _custom_streamed_ingest(path, database_url):
+    from sqlalchemy import create_engine
+    from utils.custom_data_loader import ingest_custom_fraud_data
+    from utils.db_connection import Base
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    return lambda: ingest_custom_fraud_data(path, engine=engine)
+
+
+def benchmark_custom_ingest(num_rows, database_url=None):
+    """
+    Compare reading a custom JSON export with json.load against streaming
+    it in batches (into memory, batch by batch, and into the database).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        array_path = os.path.join(tmp, 'export.json')
+        ndjson_path = os.path.join(tmp, 'export.ndjson.gz')
+        _write_custom_export(array_path, num_rows)
+        _write_custom_export(ndjson_path, num_rows, compress=True, ndjson=True)
+        url = database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"\nExport sizes: JSON array {os.path.getsize(array_path) / 2 ** 20:,.1f} MB, "
+              f"gzipped NDJSON {os.path.getsize(ndjson_path) / 2 ** 20:,.1f} MB")
+        results = {
+            'json.load + DataFrame': measure(_custom_json_load, array_path),
+            'streamed load (array)': measure(_custom_streamed_load, array_path),
+            'streamed batches (gz)': measure(_custom_streamed_batches, ndjson_path),
+            'streamed ingest (gz)': measure(_custom_streamed_ingest, ndjson_path, url),
+        }
+    print_results(f"Custom data ingestion ({num_rows:,} records)", results)
+    return results
+
+
+# Synthetic data generation
+
+def _generate_sample_chunks(num_rows, chunk_size):
+    from utils.sample_data_generator import iter_sample_fraud_data
+
+    return lambda: sum(len(chunk) for chunk in iter_sample_fraud_data(num_rows, chunk_size, seed=0))
+
+
+def benchmark_generate(num_rows, database_url=None, chunk_size=1000000):
+    """
+    Measure synthetic data generation throughput (no output written).
+    """
+    results = {'generate chunks': measure(_generate_sample_chunks, num_rows, chunk_size)}
+    print_results(f"Sample data generation ({num_rows:,} rows, chunk size {chunk_size:,})", results)
+    return results
+
+
+# Dictionary-encoded category columns
+
+def benchmark_categories(num_rows, database_url=None):
+    """
+    Report memory of the category columns as object strings versus shared
+    categoricals (per million rows), and filter_fraud_data latency on each.
+    """
+    from utils.categories import CATEGORY_COLUMNS, category_memory_usage
+    from utils.data_processing import filter_fraud_data
+    from utils.sample_data_generator import generate_sample_fraud_data
+
+    encoded = generate_sample_fraud_data(num_rows, seed=0)
+    as_object = encoded.astype({column: object for column in CATEGORY_COLUMNS})
+    per_million = 1e6 / num_rows / 1e6
+
+    print(f"\nCategory columns ({num_rows:,} rows), MB per million rows")
+    print(f"{'column':<20}{'object':>12}{'categorical':>14}")
+    totals = [0, 0]
+    for column, (object_bytes, category_bytes) in category_memory_usage(encoded).items():
+        totals[0] += object_bytes
+        totals[1] += category_bytes
+        print(f"{column:<20}{object_bytes * per_million:>12.1f}{category_bytes * per_million:>14.1f}")
+    print(f"{'total':<20}{totals[0] * per_million:>12.1f}{totals[1] * per_million:>14.1f}")
+
+    filters = {
+        'fraud_type': ['Wire Fraud', 'Payment Fraud'],
+        'risk_level': ['High', 'Critical'],
+        'region': ['Europe'],
+        'status': ['Open', 'In Progress'],
+    }
+    timings = []
+    for df in (as_object, encoded):
+        start = time.perf_counter()
+        filter_fraud_data(df, filters)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{'filter_fraud_data ms':<20}{timings[0]:>12.1f}{timings[1]:>14.1f}")
+
+
+# Query plans for the search filters
+
+def _filter_combinations():
+    """
+    Filter clauses used by search_fraud_data and filter_fraud_data, keyed by label.
+    """
+    from datetime import date, timedelta
+    from itertools import combinations
+    from utils.db_connection import FraudCase
+
+    today = date.today()
+    clauses = {
+        'fraud_type IN': FraudCase.fraud_type.in_(['Wire Fraud', 'Loan Fraud']),
+        'risk_level IN': FraudCase.risk_level.in_(['Critical']),
+        'detection_date BETWEEN': FraudCase.detection_date.between(today - timedelta(days=30), today),
+        'reported_amount BETWEEN': FraudCase.reported_amount.between(50000, 100000),
+    }
+    combos = {}
+    for size in range(1, len(clauses) + 1):
+        for labels in combinations(clauses, size):
+            combos[' + '.join(labels)] = [clauses[label] for label in labels]
+    combos['region IN'] = [FraudCase.region.in_(['Europe'])]
+    combos['status IN'] = [FraudCase.status.in_(['Open'])]
+    combos['region IN + detection_date BETWEEN'] = combos['region IN'] + [clauses['detection_date BETWEEN']]
+    return combos
+
+
+def benchmark_index_plans(num_rows, database_url=None):
+    """
+    Print the query plan for every search filter combination and whether it uses an index.
+    """
+    from sqlalchemy import create_engine, select
+    from utils.db_connection import FraudCase, upgrade_schema
+
+    with _benchmark_database(num_rows, database_url) as url:
+        engine = create_engine(url)
+        upgrade_schema(engine)
+        is_sqlite = engine.dialect.name == 'sqlite'
+        explain = 'EXPLAIN QUERY PLAN ' if is_sqlite else 'EXPLAIN '
+        index_markers = ('USING INDEX', 'USING COVERING INDEX') if is_sqlite else ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+        with engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+            print(f"\nQuery plans for search filters ({engine.dialect.name}, {num_rows:,} rows)")
+            for label, clauses in _filter_combinations().items():
+                statement = select(FraudCase.id).where(*clauses)
+                sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+                plan = '\n'.join(str(row[-1] if is_sqlite else row[0]) for row in connection.exec_driver_sql(explain + sql))
+                uses_index = any(marker in plan for marker in index_markers)
+                print(f"\n[{'index' if uses_index else 'SCAN '}] {label}")
+                print('    ' + plan.replace('\n', '\n    '))
+        engine.dispose()
+
+
+# In-memory search
+
+SEARCH_QUERIES = ['wire fraud', 'CASE-0012', 'ASE-001', 'europe', 'omated', 'mon', 'zzz']
+
+
+def _scan_search(df, query):
+    """
+    The str.contains scan the pandas search fallback used before the inverted index.
+    """
+    query = query.lower()
+    mask = df['case_id'].str.lower().str.contains(query, na=False, regex=False)
+    for column in ['fraud_type', 'region', 'detection_method', 'case_summary']:
+        mask |= df[column].str.lower().str.contains(query, na=False, regex=False)
+    return int(mask.sum())
+
+
+def benchmark_search(num_rows, database_url=None):
+    """
+    Time building the inverted index and per-query latency against a full scan.
+    """
+    from utils.sample_data_generator import generate_sample_fraud_data
+    from utils.search_index import InvertedIndex
+
+    df = generate_sample_fraud_data(num_rows)
+    start = time.perf_counter()
+    index = InvertedIndex.build(df)
+    print(f"\nIn-memory search ({num_rows:,} rows)")
+    print(f"index build: {time.perf_counter() - start:.2f} s, "
+          f"{len(index.vocabulary):,} tokens, {len(index.postings):,} postings "
+          f"({index.postings.nbytes / 1e6:.1f} MB)")
+    print(f"{'query':<16}{'matches':>10}{'index ms':>12}{'scan ms':>12}")
+    for query in SEARCH_QUERIES:
+        start = time.perf_counter()
+        matches = len(index.search(query))
+        index_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        _scan_search(df, query)
+        scan_ms = (time.perf_counter() - start) * 1000
+        print(f"{query:<16}{matches:>10,}{index_ms:>12.2f}{scan_ms:>12.1f}")
+
+
+BENCHMARKS = {
+    'load-data': benchmark_load_data,
+    'index-plans': benchmark_index_plans,
+    'search': benchmark_search,
+    'bulk-load': benchmark_bulk_load,
+    'generate': benchmark_generate,
+    'categories': benchmark_categories,
+    'snapshot': benchmark_snapshot,
+    'refresh': benchmark_refresh,
+    'sessions': benchmark_sessions,
+    'similarity': benchmark_similarity,
+    'text-similarity': benchmark_text_similarity,
+    'campaigns': benchmark_campaigns,
+    'clustering': benchmark_clustering,
+    'anomalies': benchmark_anomalies,
+    'association-rules': benchmark_association_rules,
+    'time-cube': benchmark_time_cube,
+    'db-aggregation': benchmark_db_aggregation,
+    'forecast': benchmark_forecast,
+    'seasonality': benchmark_seasonality,
+    'custom-ingest': benchmark_custom_ingest,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FraudLens performance benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=100000, help="Number of fraud cases to use")
+    parser.add_argument('--database-url', help="Scratch database to benchmark against (default: temporary SQLite)")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.rows, database_url=args.database_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import io
+import logging
+import pandas as pd
+from utils.db_connection import get_database_connection, FraudCase
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columns written by the bulk loader; id is assigned by the database
+LOAD_COLUMNS = [c.name for c in FraudCase.__table__.columns if c.name != 'id']
+
+def _iter_chunks(data, batch_size):
+    """
+    Yield DataFrames of at most batch_size rows from a DataFrame or an iterable of DataFrames.
+    """
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        for start in range(0, len(frame), batch_size):
+            yield frame.iloc[start:start + batch_size]
+
+def prepare_chunk(chunk):
+    """
+    Restrict a chunk to the fraud_cases columns and convert values to what
+    the database driver expects (dates as datetime.date, missing values as None).
+    """
+    columns = [c for c in LOAD_COLUMNS if c in chunk.columns]
+    if 'case_id' not in columns or 'detection_date' not in columns:
+        raise ValueError("Bulk load data needs at least case_id and detection_date columns")
+
+    prepared = chunk[columns].copy()
+    prepared['detection_date'] = pd.to_datetime(prepared['detection_date']).dt.date
+    # object dtype lets NaN/NaT become None for the driver
+    return prepared.astype(object).where(prepared.notna(), None)
+
+def _copy_chunk(raw_connection, chunk):
+    """
+    Stream one chunk into fraud_cases with PostgreSQL COPY FROM STDIN.
+    """
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    columns = ', '.join(chunk.columns)
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY fraud_cases ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _executemany_chunk(cursor, dialect, chunk):
+    """
+    Insert one chunk with a single DBAPI executemany call, passing plain
+    tuples (or dicts for named paramstyles) straight to the driver.
+    """
+    statement = FraudCase.__table__.insert().compile(dialect=dialect, column_keys=list(chunk.columns))
+    if dialect.positional:
+        parameters = list(chunk.itertuples(index=False, name=None))
+    else:
+        parameters = chunk.to_dict('records')
+    cursor.executemany(str(statement), parameters)
+
+def bulk_load_fraud_cases(data, engine=None, batch_size=10000, method='auto'):
+    """
+    Insert fraud cases in batches instead of one ORM object per row.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame or iterable of pandas.DataFrame
+        Cases to load; columns outside the fraud_cases schema are ignored
+    engine : sqlalchemy Engine, optional
+        Engine to use; defaults to the process-wide engine
+    batch_size : int
+        Rows per COPY / executemany batch
+    method : str
+        'copy' (PostgreSQL COPY FROM STDIN), 'executemany' (DBAPI
+        executemany), or 'auto' to use COPY when the driver is psycopg2
+
+    Returns:
+    --------
+    int
+        Number of rows loaded
+    """
+    engine = engine or get_database_connection()
+    if engine is None:
+        raise RuntimeError("No database connection available for bulk loading")
+
+    if method == 'auto':
+        method = 'copy' if engine.dialect.driver == 'psycopg2' else 'executemany'
+
+    loaded = 0
+    raw_connection = engine.raw_connection()
+    try:
+        if method == 'copy':
+            for chunk in _iter_chunks(data, batch_size):
+                _copy_chunk(raw_connection, prepare_chunk(chunk))
+                loaded += len(chunk)
+        else:
+            cursor = raw_connection.cursor()
+            for chunk in _iter_chunks(data, batch_size):
+                _executemany_chunk(cursor, engine.dialect, prepare_chunk(chunk))
+                loaded += len(chunk)
+            cursor.close()
+        raw_connection.commit()
+    except Exception:
+        raw_connection.rollback()
+        raise
+    finally:
+        raw_connection.close()
+
+    logger.info(f"Bulk loaded {loaded} fraud cases using {method}")
+    return loaded
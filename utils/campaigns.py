@@ -0,0 +1,406 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+import logging
+from utils.data_version import get_data_version, peek_data_version, derive_data_version, VersionedCache
+from utils.text_similarity import case_texts
+from utils.categories import count_values
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Near-duplicate case summaries (one phishing or carding campaign producing
+# many almost identical reports) are grouped with MinHash signatures and
+# LSH banding: texts are only compared when they share a band bucket, so
+# grouping costs roughly linear time instead of all pairs.
+
+# Text compared for near-duplicates
+CAMPAIGN_COLUMNS = ['case_summary']
+
+# Consecutive words per shingle
+SHINGLE_SIZE = 2
+
+# Signature length, split into NUM_BANDS bands of NUM_PERMUTATIONS // NUM_BANDS
+# values; with 10 bands of 6, pairs at Jaccard 0.8 share a bucket 95% of the time
+NUM_PERMUTATIONS = 60
+NUM_BANDS = 10
+
+# Estimated Jaccard similarity a bucket pair needs to be linked
+MIN_JACCARD = 0.8
+
+# Rows a group of near-duplicates needs to count as a campaign
+MIN_CAMPAIGN_SIZE = 2
+
+# Shingles hashed per block when computing signatures (sized to stay in cache)
+SIGNATURE_CHUNK_SIZE = 1 << 12
+
+# Indexes, and frames labelled by with_campaigns(), for the most recent dataset versions
+_index_cache = VersionedCache(max_entries=4)
+_labelled_cache = VersionedCache(max_entries=4)
+
+_rng = np.random.default_rng(20240611)
+# One affine permutation of the 32-bit shingle hashes per signature value
+# (odd multipliers); shingle hashes are already mixed, so these suffice
+_HASH_MULTIPLIERS = (_rng.integers(0, 2**31, NUM_PERMUTATIONS, dtype=np.uint32) * 2 + 1).astype(np.uint32)[:, np.newaxis]
+_HASH_OFFSETS = _rng.integers(0, 2**32, NUM_PERMUTATIONS, dtype=np.uint32)[:, np.newaxis]
+_BAND_SALTS = _rng.integers(0, 2**63, NUM_BANDS, dtype=np.uint64)
+
+def _mix(values):
+    """
+    splitmix64 finalizer over a uint64 array.
+    """
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def _shingles(documents):
+    """
+    Hashed word shingles of each document.
+
+    Words are hashed by content (not by a per-call vocabulary), so the
+    signatures of documents added later are comparable. Documents must be
+    normalized as by case_texts(). A document shorter
+    than SHINGLE_SIZE words is one shingle of all its words.
+
+    Returns:
+    --------
+    tuple of numpy.ndarray
+        (document numbers, 32-bit shingle hashes), ordered by document
+    """
+    # Documents are normalized by case_texts() (ASCII words separated by
+    # single spaces), so all of them are split at once and each word's
+    # document is the number of newlines before it in the joined text
+    documents = list(documents)
+    joined = '\n'.join(documents)
+    words = np.array(joined.replace('\n', ' ').split(' '), dtype=object)
+    characters = np.frombuffer(joined.encode('ascii'), dtype=np.uint8)
+    separators = (characters == ord(' ')) | (characters == ord('\n'))
+    word_starts = np.r_[0, np.flatnonzero(separators) + 1]
+    doc = np.r_[0, np.cumsum(characters == ord('\n'))][word_starts]
+    # Empty documents leave empty words behind
+    present = words != ''
+    words, doc = words[present], doc[present]
+    if len(words) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint32)
+    hashes = pd.util.hash_array(words)
+
+    position = np.arange(len(doc))
+    starts = np.flatnonzero(np.r_[True, doc[1:] != doc[:-1]])
+    counts = np.diff(np.r_[starts, len(doc)])
+    start = np.repeat(starts, counts)
+    end = start + np.repeat(counts, counts)
+    keep = (position + SHINGLE_SIZE <= end) | ((position == start) & (end - start < SHINGLE_SIZE))
+
+    shingles = hashes[keep]
+    for offset in range(1, SHINGLE_SIZE):
+        following = np.minimum(position[keep] + offset, len(doc) - 1)
+        present = following < end[keep]
+        shingles = _mix(shingles ^ np.where(present, hashes[following], np.uint64(0)))
+    return doc[keep], (shingles >> np.uint64(32)).astype(np.uint32)
+
+def minhash_signatures(documents):
+    """
+    MinHash signatures (len(documents) x NUM_PERMUTATIONS, uint32) of the
+    documents' word shingles, and a mask of documents that have any words.
+    Two signatures agree at each value with probability equal to the
+    Jaccard similarity of the shingle sets.
+    """
+    signatures = np.full((len(documents), NUM_PERMUTATIONS), np.iinfo(np.uint32).max, dtype=np.uint32)
+    doc, shingles = _shingles(documents)
+    for start in range(0, len(doc), SIGNATURE_CHUNK_SIZE):
+        block_docs = doc[start:start + SIGNATURE_CHUNK_SIZE]
+        # Permutation-major blocks: each permutation reduces over contiguous memory
+        values = _HASH_MULTIPLIERS * shingles[np.newaxis, start:start + SIGNATURE_CHUNK_SIZE]
+        values += _HASH_OFFSETS
+        # Shingles are grouped by document, so each document's minimum is one reduceat segment
+        bounds = np.flatnonzero(np.r_[True, block_docs[1:] != block_docs[:-1]])
+        targets = block_docs[bounds]
+        minima = np.minimum.reduceat(values, bounds, axis=1).T
+        signatures[targets] = np.minimum(signatures[targets], minima)
+    has_words = np.bincount(doc, minlength=len(documents)) > 0
+    return signatures, has_words
+
+def _band_keys(signatures):
+    """
+    One uint64 bucket key per signature band (documents x NUM_BANDS);
+    the band number is mixed in, so keys of different bands never meet.
+    """
+    bands = signatures.reshape(len(signatures), NUM_BANDS, -1).astype(np.uint64)
+    keys = np.broadcast_to(_BAND_SALTS, bands.shape[:2])
+    for column in range(bands.shape[2]):
+        keys = _mix(keys ^ bands[:, :, column])
+    return keys
+
+class CampaignIndex:
+    """
+    MinHash LSH index grouping cases with near-duplicate texts.
+
+    Each distinct normalized text is one document with a MinHash signature.
+    Documents sharing a band bucket are linked to the bucket's first
+    document and to the document placed before them when their signatures
+    agree on at least MIN_JACCARD of the values, and campaigns are the connected groups of linked documents
+    covering at least MIN_CAMPAIGN_SIZE rows. A group is labelled by its
+    lowest document number, so labels survive appends.
+    """
+
+    def __init__(self, documents, codes, signatures, has_words, buckets, heads, tails, labels):
+        # Index of the normalized document texts; rows map to them through codes
+        self.documents = documents
+        self.codes = codes
+        self.signatures = signatures
+        self.has_words = has_words
+        # Sorted band bucket keys and the first and last documents placed in each
+        self.buckets = buckets
+        self.heads = heads
+        self.tails = tails
+        # Group label (lowest document number in the group) of each document
+        self.labels = labels
+        self.num_rows = len(codes)
+        self._campaigns = None
+
+    @classmethod
+    def build(cls, df, columns=None):
+        """
+        Index the texts of df.
+        """
+        codes, documents = pd.factorize(case_texts(df, columns or CAMPAIGN_COLUMNS))
+        signatures, has_words = minhash_signatures(documents)
+        documents = pd.Index(documents)
+
+        docs, keys = cls._bucket_entries(signatures, has_words, 0)
+        buckets, bucket_codes = np.unique(keys, return_inverse=True)
+        unset = np.full(len(buckets), -1, dtype=np.int32)
+        candidates, heads, tails = cls._bucket_links(bucket_codes, docs, unset, unset)
+        edges = cls._verified_edges(signatures, candidates)
+        graph = sp.coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(len(documents),) * 2)
+        _, components = connected_components(graph, directed=False)
+        lowest = np.full(components.max() + 1 if len(components) else 0, len(documents), dtype=np.int64)
+        np.minimum.at(lowest, components, np.arange(len(documents)))
+        labels = lowest[components]
+
+        return cls(documents, codes.astype(np.int32), signatures, has_words, buckets, heads, tails, labels)
+
+    @staticmethod
+    def _bucket_entries(signatures, has_words, first_document):
+        """
+        (document number, bucket key) for every band of the documents with
+        words, ordered by document.
+        """
+        with_words = np.flatnonzero(has_words)
+        keys = _band_keys(signatures[with_words])
+        docs = np.repeat(with_words + first_document, NUM_BANDS)
+        return docs, keys.ravel()
+
+    @staticmethod
+    def _bucket_links(bucket_codes, docs, heads, tails):
+        """
+        Candidate links of bucket entries (ordered by document) to the
+        first document of their bucket and to the one placed before them.
+        heads and tails hold each bucket's first and last documents so far
+        (-1 for new buckets); updated copies are returned.
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (candidate (document, document) pairs, heads, tails)
+        """
+        order = np.argsort(bucket_codes, kind='stable')
+        sorted_codes, sorted_docs = bucket_codes[order], docs[order]
+        first = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+        previous = np.r_[-1, sorted_docs[:-1]]
+        previous[first] = tails[sorted_codes[first]]
+
+        heads, tails = heads.copy(), tails.copy()
+        fresh = first & (heads[sorted_codes] < 0)
+        heads[sorted_codes[fresh]] = sorted_docs[fresh]
+        last = np.r_[first[1:], True]
+        tails[sorted_codes[last]] = sorted_docs[last]
+
+        candidates = np.concatenate([
+            np.column_stack([sorted_docs, heads[sorted_codes]]),
+            np.column_stack([sorted_docs, previous]),
+        ])
+        return candidates, heads, tails
+
+    @staticmethod
+    def _verified_edges(signatures, candidates):
+        """
+        Unique candidate pairs of distinct documents whose signatures agree
+        on at least MIN_JACCARD of the values.
+        """
+        keep = (candidates[:, 1] >= 0) & (candidates[:, 0] != candidates[:, 1])
+        # One int64 per pair makes dropping the pairs found in several bands a hash lookup
+        stride = np.int64(len(signatures))
+        packed = pd.unique(candidates[keep, 0] * stride + candidates[keep, 1])
+        pairs = np.column_stack([packed // stride, packed % stride])
+        if len(pairs) == 0:
+            return pairs
+        agreement = np.empty(len(pairs), dtype=np.float32)
+        for start in range(0, len(pairs), SIGNATURE_CHUNK_SIZE):
+            block = pairs[start:start + SIGNATURE_CHUNK_SIZE]
+            agreement[start:start + len(block)] = (signatures[block[:, 0]] == signatures[block[:, 1]]).mean(axis=1)
+        return pairs[agreement >= MIN_JACCARD]
+
+    def with_changes(self, texts, positions, num_rows):
+        """
+        Index for a dataset in which the rows at positions now have texts
+        (replacing or appending rows up to num_rows). Only new texts are
+        hashed; they are looked up in the existing buckets and merge the
+        groups they link.
+
+        Texts no row uses any more keep their links, so a group may stay
+        joined through a replaced text until the next full build.
+        """
+        codes = np.full(num_rows, -1, dtype=np.int32)
+        codes[:self.num_rows] = self.codes
+        texts = pd.Index(texts)
+        found = self.documents.get_indexer(texts)
+        new_texts = pd.Index(texts[found < 0].unique())
+        first_new = len(self.documents)
+        found[found < 0] = first_new + new_texts.get_indexer(texts[found < 0])
+        codes[positions] = found
+        if not len(new_texts):
+            return CampaignIndex(self.documents, codes, self.signatures, self.has_words,
+                                 self.buckets, self.heads, self.tails, self.labels)
+
+        new_signatures, new_has_words = minhash_signatures(new_texts)
+        signatures = np.concatenate([self.signatures, new_signatures])
+        docs, keys = self._bucket_entries(new_signatures, new_has_words, first_new)
+
+        # Keys seen for the first time get bucket codes after the existing ones
+        num_buckets = len(self.buckets)
+        slots = np.searchsorted(self.buckets, keys)
+        known = self.buckets[np.minimum(slots, num_buckets - 1)] == keys if num_buckets else np.zeros(len(keys), dtype=bool)
+        fresh_keys, fresh_codes = np.unique(keys[~known], return_inverse=True)
+        bucket_codes = np.where(known, slots, 0)
+        bucket_codes[~known] = num_buckets + fresh_codes
+        unset = np.full(len(fresh_keys), -1, dtype=np.int32)
+        candidates, heads, tails = self._bucket_links(
+            bucket_codes, docs, np.concatenate([self.heads, unset]), np.concatenate([self.tails, unset])
+        )
+        # Then merge the new buckets into the sorted keys
+        insert_at = np.searchsorted(self.buckets, fresh_keys)
+        buckets = np.insert(self.buckets, insert_at, fresh_keys)
+        heads = np.insert(heads[:num_buckets], insert_at, heads[num_buckets:])
+        tails = np.insert(tails[:num_buckets], insert_at, tails[num_buckets:])
+
+        labels = np.concatenate([self.labels, np.arange(first_new, first_new + len(new_texts))])
+        edges = self._verified_edges(signatures, candidates)
+        if len(edges):
+            # Merge the groups the new links connect, relabelling each by its lowest label
+            joined = pd.Index(np.unique(labels[edges]))
+            ends = joined.get_indexer(labels[edges].ravel()).reshape(-1, 2)
+            graph = sp.coo_matrix((np.ones(len(ends), dtype=np.int8), (ends[:, 0], ends[:, 1])), shape=(len(joined),) * 2)
+            _, components = connected_components(graph, directed=False)
+            lowest = np.full(components.max() + 1, np.iinfo(np.int64).max, dtype=np.int64)
+            np.minimum.at(lowest, components, joined.to_numpy())
+            affected = joined.get_indexer(labels)
+            labels = np.where(affected >= 0, lowest[components[affected]], labels)
+
+        return CampaignIndex(self.documents.append(new_texts), codes, signatures,
+                             np.concatenate([self.has_words, new_has_words]),
+                             buckets, heads, tails, labels)
+
+    def campaign_labels(self):
+        """
+        Campaign of every row as a categorical of names like 'CMP-000042',
+        missing for rows that are not part of a campaign.
+        """
+        if self._campaigns is None:
+            row_labels = self.labels[self.codes]
+            sizes = np.bincount(row_labels, minlength=len(self.labels))
+            in_campaign = (sizes[row_labels] >= MIN_CAMPAIGN_SIZE) & self.has_words[self.codes]
+            campaigns = np.unique(row_labels[in_campaign])
+            codes = np.full(self.num_rows, -1, dtype=np.int32)
+            codes[in_campaign] = np.searchsorted(campaigns, row_labels[in_campaign])
+            names = pd.Index([f"CMP-{label + 1:06d}" for label in campaigns], dtype=object)
+            self._campaigns = pd.Categorical.from_codes(codes, categories=names)
+        return self._campaigns
+
+    def memory_usage(self):
+        """
+        Bytes held by the index's arrays (excluding the document texts).
+        """
+        arrays = (self.codes, self.signatures, self.has_words, self.buckets, self.heads, self.tails, self.labels)
+        return sum(array.nbytes for array in arrays)
+
+def get_campaign_index(df):
+    """
+    Return the campaign index for df, building it once per dataset version.
+    """
+    return _index_cache.get_or_build(get_data_version(df), lambda: CampaignIndex.build(df))
+
+def update_campaign_index(old_df, new_df, changed_positions):
+    """
+    Register an index for new_df built from old_df's cached index by
+    hashing only the changed rows' texts.
+
+    new_df must keep old_df's rows at the same positions, with changed rows
+    replaced in place or appended. If old_df has no cached index, nothing
+    is registered and the next get_campaign_index() call builds one.
+    """
+    old_version = peek_data_version(old_df)
+    previous = _index_cache.get(old_version) if old_version else None
+    if previous is None:
+        return None
+
+    changed = np.unique(np.asarray(changed_positions, dtype=np.int64))
+    texts = case_texts(new_df.iloc[changed], CAMPAIGN_COLUMNS)
+    index = previous.with_changes(texts.to_numpy(dtype=object), changed, len(new_df))
+    return _index_cache.put(get_data_version(new_df), index)
+
+def get_campaigns(df):
+    """
+    The campaign of each case in df: cases whose summaries are near-duplicates
+    (estimated Jaccard similarity of word shingles of at least MIN_JACCARD,
+    directly or through other cases) share a campaign.
+
+    Campaigns are named after their lowest row in df, so labels computed on
+    a subset differ from those of the full dataset. Compute them on the
+    full dataset (with_campaigns) and carry the column into any subset.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+
+    Returns:
+    --------
+    pandas.Series
+        Categorical 'campaign' aligned with df, missing for cases without
+        near-duplicates
+    """
+    if 'campaign' in df.columns:
+        return df['campaign']
+    if df.empty:
+        return pd.Series(pd.Categorical([]), index=df.index, name='campaign')
+    return pd.Series(get_campaign_index(df).campaign_labels(), index=df.index, name='campaign')
+
+def with_campaigns(df):
+    """
+    df with a 'campaign' column added (a new frame; df is not modified).
+
+    The labelled frame is cached per version of df and gets a version
+    derived from df's, so reruns reuse it, and the structures cached for
+    it, without hashing it again.
+    """
+    if 'campaign' in df.columns:
+        return df
+
+    def label():
+        labelled = df.assign(campaign=get_campaigns(df))
+        derive_data_version(labelled, df)
+        return labelled
+
+    return _labelled_cache.get_or_build(get_data_version(df), label)
+
+def largest_campaigns(df, n=50):
+    """
+    Case counts of the n largest campaigns in df, largest first.
+    """
+    counts = count_values(get_campaigns(df))
+    return counts.head(n)
@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# fraud_type, risk_level, status, region and detection_method are carried as
+# categoricals over one shared dictionary, so a value has the same code
+# whether it came from the database, the custom JSON file or the generator.
+
+# Known values per column; a value's code is its position in the list.
+# Only ever append to these lists so existing codes stay stable.
+CATEGORY_VALUES = {
+    'fraud_type': [
+        "Identity Theft", "Payment Fraud", "Account Takeover",
+        "Synthetic Identity", "Wire Fraud", "Loan Fraud",
+        "Credit Card Fraud", "Check Fraud", "Money Laundering",
+        "Phishing", "Card Skimming", "Merchant Fraud",
+        "Social Engineering", "Carding", "False Positive", "Unknown"
+    ],
+    'risk_level': ["Low", "Medium", "High", "Critical"],
+    'status': ["Open", "In Progress", "Resolved", "Closed", "Confirmed"],
+    'region': [
+        "North America", "Europe", "Asia Pacific",
+        "Latin America", "Middle East", "Africa",
+        "Asia", "South America", "Australia", "Unknown"
+    ],
+    'detection_method': [
+        "Automated System", "Manual Review", "Customer Report",
+        "Fraud Pattern Detection", "Transaction Monitoring",
+        "AI/ML Detection", "External Tip",
+        "Machine Learning", "Rule-Based System", "Threshold Alert"
+    ],
+}
+
+# Columns whose categories have a meaningful order (Low < ... < Critical)
+ORDERED_COLUMNS = {'risk_level'}
+
+CATEGORY_COLUMNS = list(CATEGORY_VALUES)
+
+def category_dtype(column, extra_values=()):
+    """
+    CategoricalDtype for a column: the shared values followed by any
+    extra_values not in the dictionary, sorted so the result is deterministic.
+    """
+    known = CATEGORY_VALUES[column]
+    extra = sorted(set(extra_values) - set(known))
+    return pd.CategoricalDtype(known + extra, ordered=column in ORDERED_COLUMNS)
+
+def encode_categories(df, columns=None):
+    """
+    Convert the category columns of df to shared categoricals in place.
+
+    Values missing from CATEGORY_VALUES are appended after the shared ones,
+    so known values keep their codes. Returns df for chaining.
+    """
+    for column in columns or CATEGORY_COLUMNS:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            present = series.cat.categories
+        else:
+            present = pd.unique(series.dropna())
+        dtype = category_dtype(column, [str(value) for value in present])
+        if series.dtype != dtype:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.where(series.isna(), series.astype(str))
+            df[column] = series.astype(dtype)
+    return df
+
+def align_categories(left, right):
+    """
+    Give the category columns of two frames identical dtypes (the union of
+    their categories) so concat and row assignment keep them categorical.
+    Frames are modified in place; returns (left, right).
+    """
+    for column in CATEGORY_COLUMNS:
+        if column not in left.columns or column not in right.columns:
+            continue
+        if left[column].dtype == right[column].dtype:
+            continue
+        values = set()
+        for frame in (left, right):
+            series = frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values.update(series.cat.categories)
+            else:
+                values.update(str(value) for value in series.dropna().unique())
+        dtype = category_dtype(column, values)
+        left[column] = left[column].astype(dtype)
+        right[column] = right[column].astype(dtype)
+    return left, right
+
+def categorical_from_codes(column, codes, values):
+    """
+    Build a shared categorical from codes into a local list of values
+    without materializing strings (used by the sample data generator).
+    """
+    dtype = category_dtype(column, values)
+    lookup = dtype.categories.get_indexer(values)
+    return pd.Categorical.from_codes(lookup[codes], dtype=dtype)
+
+def isin_mask(series, values):
+    """
+    Boolean NumPy mask of series.isin(values), computed on category codes
+    with a lookup table when series is categorical.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.isin(values).to_numpy()
+    categories = series.cat.categories
+    wanted = categories.get_indexer(list(values))
+    # One spare False slot at the end: missing values have code -1
+    table = np.zeros(len(categories) + 1, dtype=bool)
+    table[wanted[wanted >= 0]] = True
+    return table[series.cat.codes.to_numpy()]
+
+def count_values(series):
+    """
+    value_counts() without the zero rows a categorical reports for unused categories.
+    """
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+def category_memory_usage(df, columns=None):
+    """
+    Memory used by the category columns as object strings and as categoricals.
+
+    Returns:
+    --------
+    dict
+        column -> (object bytes, categorical bytes)
+    """
+    usage = {}
+    for column in columns or CATEGORY_COLUMNS:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        as_object = series.astype(object).memory_usage(deep=True, index=False)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            as_category = series.memory_usage(deep=True, index=False)
+        else:
+            as_category = encode_categories(df[[column]].copy())[column].memory_usage(deep=True, index=False)
+        usage[column] = (as_object, as_category)
+    return usage
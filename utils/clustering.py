@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+import logging
+from sklearn.cluster import MiniBatchKMeans, kmeans_plusplus
+from utils.data_version import get_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fraud pattern clusters: MiniBatchKMeans trained with partial_fit over
+# shuffled row batches, so only one batch of encoded features is ever in
+# memory, then a second chunked pass assigns every case and accumulates
+# the cluster profiles.
+
+# "Features to Include" labels on the Pattern Analysis page and the columns they use
+CLUSTER_FEATURES = {
+    'Fraud Type': 'fraud_type',
+    'Amount': 'reported_amount',
+    'Region': 'region',
+    'Risk Level': 'risk_level',
+    'Detection Method': 'detection_method',
+}
+
+DEFAULT_CLUSTER_FEATURES = ['fraud_type', 'reported_amount', 'risk_level']
+
+# Rows per partial_fit call and passes over the data; batches of a few
+# thousand get within about 1.5% of full k-means inertia in two passes
+CLUSTER_BATCH_SIZE = 4096
+CLUSTER_EPOCHS = 2
+
+# Rows encoded at once when assigning clusters
+ASSIGN_CHUNK_SIZE = 100000
+
+# Rows sampled (across the whole dataset) to seed the centers with k-means++
+INIT_SAMPLE_SIZE = 20000
+
+# Fraud types listed per cluster profile
+TOP_FRAUD_TYPES = 3
+
+# Results per (data version, k, feature set)
+_cluster_cache = VersionedCache(max_entries=8)
+
+def _column_codes(series):
+    """
+    Integer codes (-1 for missing) and values of a categorical-like column.
+    """
+    if series is None:
+        return None, pd.Index([])
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int32), series.cat.categories
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int32), uniques
+
+class FeatureEncoder:
+    """
+    Encodes rows of the chosen features into dense float32 blocks on demand.
+
+    Categorical features are one-hot with weight sqrt(1/2), so cases
+    differing in one category are at squared distance 1; the amount is
+    log10(1 + amount) standardized, so one standard deviation weighs the
+    same. Missing values encode as all zeros (or the mean amount).
+    """
+
+    def __init__(self, df, features):
+        self.features = list(features)
+        self.codes = {}
+        self.offsets = {}
+        width = 0
+        for feature in self.features:
+            if feature == 'reported_amount':
+                continue
+            codes, values = _column_codes(df[feature])
+            self.codes[feature] = codes
+            self.offsets[feature] = width
+            width += len(values)
+
+        self.amounts = None
+        if 'reported_amount' in self.features:
+            amounts = np.log10(1 + pd.to_numeric(df['reported_amount'], errors='coerce').clip(lower=0).to_numpy(dtype=np.float64))
+            known = amounts[np.isfinite(amounts)]
+            mean, std = (known.mean(), known.std()) if len(known) else (0.0, 0.0)
+            standardized = (amounts - mean) / (std if std > 0 else 1)
+            self.amounts = np.nan_to_num(standardized, nan=0.0, posinf=0.0, neginf=0.0).astype(np.float32)
+            self.amount_column = width
+            width += 1
+        self.width = width
+
+    def encode(self, positions):
+        """
+        Dense feature block (len(positions) x width) for the rows at positions.
+        """
+        block = np.zeros((len(positions), self.width), dtype=np.float32)
+        rows = np.arange(len(positions))
+        for feature, codes in self.codes.items():
+            row_codes = codes[positions]
+            present = row_codes >= 0
+            block[rows[present], self.offsets[feature] + row_codes[present]] = np.sqrt(0.5)
+        if self.amounts is not None:
+            block[:, self.amount_column] = self.amounts[positions]
+        return block
+
+class ClusterResult:
+    """
+    Cluster of every row and one profile row per cluster. Clusters are
+    numbered from 0 by decreasing size.
+    """
+
+    def __init__(self, labels, centers, profiles, features):
+        self.labels = labels
+        self.centers = centers
+        self.profiles = profiles
+        self.features = features
+
+    @classmethod
+    def fit(cls, df, n_clusters, features, random_state=0):
+        """
+        Cluster df on features with MiniBatchKMeans.partial_fit over shuffled batches.
+        """
+        encoder = FeatureEncoder(df, features)
+        n_clusters = min(n_clusters, len(df))
+        rng = np.random.default_rng(random_state)
+
+        sample = np.sort(rng.choice(len(df), min(INIT_SAMPLE_SIZE, len(df)), replace=False))
+        init, _ = kmeans_plusplus(encoder.encode(sample), n_clusters, random_state=random_state)
+        model = MiniBatchKMeans(n_clusters=n_clusters, init=init, n_init=1, random_state=random_state)
+        for _ in range(CLUSTER_EPOCHS):
+            order = rng.permutation(len(df))
+            for start in range(0, len(df), CLUSTER_BATCH_SIZE):
+                model.partial_fit(encoder.encode(order[start:start + CLUSTER_BATCH_SIZE]))
+
+        labels, profiles = cls._assign(df, model, encoder)
+        return cls(labels, model.cluster_centers_, profiles, list(features))
+
+    @staticmethod
+    def _assign(df, model, encoder):
+        """
+        Assign every row and build the profiles in the same chunked pass:
+        one bincount per chunk over (cluster, fraud type, risk level) codes
+        plus amount sums per cluster.
+        """
+        n_clusters = model.n_clusters
+        type_codes, fraud_types = _column_codes(df.get('fraud_type'))
+        risk_codes, risk_levels = _column_codes(df.get('risk_level'))
+        amounts = pd.to_numeric(df.get('reported_amount', pd.Series(np.nan, index=df.index)), errors='coerce').to_numpy(dtype=np.float64)
+
+        # A trailing slot per dimension holds missing values
+        shape = (n_clusters, len(fraud_types) + 1, len(risk_levels) + 1)
+        counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+        amount_sums = np.zeros(n_clusters)
+        amount_counts = np.zeros(n_clusters)
+        labels = np.empty(len(df), dtype=np.int16)
+        for start in range(0, len(df), ASSIGN_CHUNK_SIZE):
+            positions = np.arange(start, min(start + ASSIGN_CHUNK_SIZE, len(df)))
+            chunk_labels = model.predict(encoder.encode(positions))
+            labels[positions] = chunk_labels
+
+            types = len(fraud_types) if type_codes is None else np.where(type_codes[positions] >= 0, type_codes[positions], len(fraud_types))
+            risks = len(risk_levels) if risk_codes is None else np.where(risk_codes[positions] >= 0, risk_codes[positions], len(risk_levels))
+            combined = np.ravel_multi_index((chunk_labels, types, risks), shape)
+            counts += np.bincount(combined, minlength=len(counts))
+            chunk_amounts = amounts[positions]
+            known = ~np.isnan(chunk_amounts)
+            amount_sums += np.bincount(chunk_labels[known], weights=chunk_amounts[known], minlength=n_clusters)
+            amount_counts += np.bincount(chunk_labels[known], minlength=n_clusters)
+
+        counts = counts.reshape(shape)
+        sizes = counts.sum(axis=(1, 2))
+        # Renumber clusters by decreasing size
+        order = np.argsort(-sizes, kind='stable')
+        rank = np.empty(n_clusters, dtype=np.int16)
+        rank[order] = np.arange(n_clusters)
+        labels = rank[labels]
+
+        type_counts = counts[order, :len(fraud_types), :].sum(axis=2)
+        risk_counts = counts[order, :, :len(risk_levels)].sum(axis=1)
+        top_types, top_type_counts = [], []
+        for cluster_types in type_counts:
+            best = [i for i in np.argsort(-cluster_types, kind='stable')[:TOP_FRAUD_TYPES] if cluster_types[i] > 0]
+            top_types.append([fraud_types[i] for i in best])
+            top_type_counts.append([int(cluster_types[i]) for i in best])
+        dominant_risk = [risk_levels[row.argmax()] if row.any() else None for row in risk_counts]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_amounts = amount_sums[order] / amount_counts[order]
+
+        profiles = pd.DataFrame({
+            'cluster': np.arange(n_clusters),
+            'size': sizes[order],
+            'share': sizes[order] / max(len(df), 1),
+            'mean_amount': mean_amounts,
+            'top_fraud_types': top_types,
+            'top_fraud_type_counts': top_type_counts,
+            'dominant_risk_level': dominant_risk,
+        })
+        return labels, profiles
+
+def get_cluster_result(df, n_clusters=5, features=None):
+    """
+    Return the clustering of df for n_clusters and features (column names,
+    see CLUSTER_FEATURES), computing it once per data version.
+    """
+    features = tuple(sorted(f for f in (features or DEFAULT_CLUSTER_FEATURES) if f in df.columns))
+    if not features:
+        raise ValueError("No clustering features present in the data")
+    key = (get_data_version(df), int(n_clusters), features)
+    return _cluster_cache.get_or_build(key, lambda: ClusterResult.fit(df, int(n_clusters), features))
@@ -1,17 +1,116 @@
 import pandas as pd
+import gzip
 import json
 import os
 from datetime import datetime
 import logging
+from utils.categories import encode_categories
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_custom_fraud_data(file_path="attached_assets/fraud_test_data.json"):
+# JSON file load_data() falls back to when there is no database
+DEFAULT_CUSTOM_DATA_PATH = "attached_assets/fraud_test_data.json"
+
+# Records parsed, standardized and handed on per batch when streaming
+CUSTOM_BATCH_SIZE = 50000
+
+# Characters of JSON text read from the file at a time
+READ_BLOCK_SIZE = 1 << 20
+
+def _open_text(file_path):
+    """
+    Open a JSON file for reading as text, decompressing it if it is gzipped.
+    """
+    with open(file_path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    if compressed:
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+def iter_json_records(file_path, block_size=READ_BLOCK_SIZE):
+    """
+    Yield the records of a JSON array or of NDJSON (one JSON value per
+    line) one at a time, gzipped or not.
+
+    The text is read in blocks of block_size characters and each record is
+    decoded as soon as it is complete, so memory holds one block and one
+    record rather than the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with _open_text(file_path) as f:
+        buffer, position, finished = '', 0, False
+        in_array = None
+        while True:
+            # Skip the separators between records: whitespace, commas and the array brackets
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and in_array is None:
+                in_array = buffer[position] == '['
+                if in_array:
+                    position += 1
+                continue
+            if position < len(buffer) and buffer[position] == ']' and in_array:
+                return
+            if position < len(buffer):
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The record continues past the block read so far, unless the file has ended
+                    if finished:
+                        raise
+                else:
+                    # A number or literal at the end of the block may be cut short; read on first
+                    if end < len(buffer) or finished or isinstance(record, (dict, list, str)):
+                        position = end
+                        yield record
+                        continue
+            if finished:
+                if in_array:
+                    raise ValueError(f"Unterminated JSON array in {file_path}")
+                return
+            block = f.read(block_size)
+            finished = not block
+            buffer = buffer[position:] + block
+            position = 0
+
+def iter_custom_fraud_batches(file_path=DEFAULT_CUSTOM_DATA_PATH, batch_size=CUSTOM_BATCH_SIZE):
+    """
+    Stream custom fraud data as standardized DataFrames of at most
+    batch_size cases, numbering ids across batches.
+
+    Parameters:
+    -----------
+    file_path : str
+        JSON array or NDJSON file, optionally gzip-compressed
+    batch_size : int
+        Cases per batch
+
+    Yields:
+    -------
+    pandas.DataFrame
+        Standardized cases (see standardize_fraud_data())
+    """
+    records, loaded = [], 0
+    for record in iter_json_records(file_path):
+        records.append(record)
+        if len(records) >= batch_size:
+            yield standardize_fraud_data(pd.DataFrame(records), start_id=loaded + 1)
+            loaded += len(records)
+            records = []
+            logger.info(f"Parsed {loaded} custom fraud cases from {file_path}")
+    if records:
+        yield standardize_fraud_data(pd.DataFrame(records), start_id=loaded + 1)
+
+def load_custom_fraud_data(file_path=DEFAULT_CUSTOM_DATA_PATH):
     """
     Load custom fraud data from the provided JSON file.
     
+    The file (a JSON array or NDJSON, optionally gzipped) is parsed and
+    standardized in batches, so only standardized columns accumulate
+    rather than the parsed records of the whole file.
+    
     Parameters:
     -----------
     file_path : str
@@ -28,25 +127,44 @@ def load_custom_fraud_data(file_path="attached_assets/fraud_test_data.json"):
             logger.warning(f"Custom data file not found: {file_path}")
             return pd.DataFrame()
             
-        # Load JSON data
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            
-        logger.info(f"Loaded {len(data)} custom fraud cases from {file_path}")
+        batches = list(iter_custom_fraud_batches(file_path))
+        if not batches:
+            return pd.DataFrame()
+        df = batches[0] if len(batches) == 1 else pd.concat(batches, ignore_index=True)
             
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
+        logger.info(f"Loaded {len(df)} custom fraud cases from {file_path}")
         
-        # Standardize column names to match our application schema
-        df = standardize_fraud_data(df)
-        
-        return df
+        # Encoded once all batches are in, so every batch shares the categories
+        return encode_categories(df)
         
     except Exception as e:
         logger.error(f"Error loading custom fraud data: {str(e)}")
         return pd.DataFrame()
+
+def ingest_custom_fraud_data(file_path, engine=None, batch_size=CUSTOM_BATCH_SIZE):
+    """
+    Stream a custom fraud data file into the fraud_cases table, one
+    standardized batch at a time, in constant memory.
+    
+    Parameters:
+    -----------
+    file_path : str
+        JSON array or NDJSON file, optionally gzip-compressed
+    engine : sqlalchemy Engine, optional
+        Engine to use; defaults to the process-wide engine
+    batch_size : int
+        Cases parsed and loaded per batch
         
-def standardize_fraud_data(df):
+    Returns:
+    --------
+    int
+        Number of cases loaded
+    """
+    from utils.bulk_loader import bulk_load_fraud_cases
+    
+    return bulk_load_fraud_cases(iter_custom_fraud_batches(file_path, batch_size), engine=engine, batch_size=batch_size)
+        
+def standardize_fraud_data(df, start_id=1):
     """
     Standardize the columns in the custom fraud data to match the application schema.
     
@@ -54,6 +172,8 @@ def standardize_fraud_data(df):
     -----------
     df : pandas.DataFrame
         DataFrame containing the raw fraud data
+    start_id : int
+        id of the first case (for batches after the first)
         
     Returns:
     --------
@@ -120,7 +240,7 @@ def standardize_fraud_data(df):
         standardized_df['analyst_notes'] = df['analyst_notes']
         
         # Add ID column for database compatibility
-        standardized_df['id'] = range(1, len(standardized_df) + 1)
+        standardized_df['id'] = range(start_id, start_id + len(standardized_df))
     
     return standardized_df
 
@@ -166,6 +286,21 @@ def merge_with_generated_data(custom_df, generated_df, custom_ratio=0.2):
     # Reset IDs for database compatibility
     merged_df['id'] = range(1, len(merged_df) + 1)
     
+    # concat falls back to object columns when the two sides' categories differ
+    encode_categories(merged_df)
+    
     logger.info(f"Merged {len(custom_subset)} custom cases with {len(generated_subset)} generated cases")
     
-    return merged_df
\ No newline at end of file
+    return merged_df
+
+if __name__ == "__main__":
+    # When run directly, stream a custom data file into the database, e.g.
+    #   python -m utils.custom_data_loader export.ndjson.gz --batch-size 50000
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load custom fraud data (JSON array or NDJSON, optionally gzipped) into the database")
+    parser.add_argument('path', help="File to load")
+    parser.add_argument('--batch-size', type=int, default=CUSTOM_BATCH_SIZE, help="Cases parsed and loaded per batch")
+    args = parser.parse_args()
+
+    ingest_custom_fraud_data(args.path, batch_size=args.batch_size)
@@ -7,8 +7,18 @@ from sklearn.metrics.pairwise import cosine_similarity
 import logging
 import os
 import streamlit as st
-from sqlalchemy import text, func, or_
-from utils.db_connection import get_database_connection, get_session, FraudCase, query_to_dataframe, init_database
+from sqlalchemy import text, func, or_, select
+from utils.search_index import get_search_index, update_search_index
+from utils.similarity import get_similarity_engine
+from utils.text_similarity import update_text_model
+from utils.campaigns import update_campaign_index
+from utils.time_cube import get_time_cube, update_time_cube, CUBE_DIMENSIONS
+from utils.data_version import derive_data_version
+from utils.sample_data_generator import generate_sample_fraud_data
+from utils.categories import encode_categories, align_categories, isin_mask
+from utils.snapshot import load_with_snapshot, file_stamp, snapshot_source
+from utils.append_buffer import append_rows
+from utils.db_connection import get_database_connection, get_session, FraudCase, init_database, fetch_dataframe, iter_dataframe_chunks, apply_full_text_search, get_table_version, count_fraud_cases, fetch_deleted_ids, aggregate_time_series
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -20,36 +30,43 @@ def load_data():
     """
     Load fraud data from the database or from custom data files.
     Priority: 1. Database if available, 2. Custom data files, 3. Generated test data
+
+    Database and custom-file results are kept as an on-disk snapshot keyed by
+    the source's version stamp, so a warm start memory-maps the snapshot
+    instead of re-reading the source.
     """
     try:
         # Import here to avoid circular imports
-        from utils.custom_data_loader import load_custom_fraud_data, merge_with_generated_data
+        from utils.custom_data_loader import load_custom_fraud_data, merge_with_generated_data, DEFAULT_CUSTOM_DATA_PATH
         
         # First, check for database connection
-        session = get_session()
+        engine = get_database_connection()
         
-        if session:
-            # Query all fraud cases from database
-            cases = session.query(FraudCase).all()
-            
-            # Convert to DataFrame
-            db_df = query_to_dataframe(cases)
-            
-            # Close session
-            session.close()
+        if engine:
+            # Bulk-read all fraud cases as typed columns (no ORM objects); a
+            # stale snapshot is brought up to date with only the changed rows
+            db_df = load_with_snapshot(
+                snapshot_source('database', engine.url.render_as_string(hide_password=True)),
+                get_table_version(engine),
+                lambda: fetch_fraud_cases(engine),
+                refresher=lambda previous: refresh_data(previous, engine)
+            )
             
             if not db_df.empty:
+                # Snapshots do not keep attrs; mark the frame as database rows again
+                db_df.attrs['source'] = 'database'
                 logger.info(f"Loaded {len(db_df)} records from database")
                 return db_df
         
         # If we get here, either no database connection or no data in database
-        # Try to load custom data from the provided JSON file
-        custom_df = load_custom_fraud_data()
-        
-        if not custom_df.empty:
-            # Merge with some generated data to have a fuller dataset
-            generated_df = generate_test_data(100)
-            return merge_with_generated_data(custom_df, generated_df, custom_ratio=0.3)
+        # Try to load custom data from the provided JSON file; only the file's
+        # rows are snapshotted, as the file stamp versions nothing else
+        if os.path.exists(DEFAULT_CUSTOM_DATA_PATH):
+            custom_df = load_with_snapshot('custom', file_stamp(DEFAULT_CUSTOM_DATA_PATH), load_custom_fraud_data)
+            if not custom_df.empty:
+                # Merge with some generated data to have a fuller dataset
+                generated_df = generate_test_data(100)
+                return merge_with_generated_data(custom_df, generated_df, custom_ratio=0.3)
         
         # If no custom data, use generated test data
         logger.info("No custom data found. Using generated test data.")
@@ -61,96 +78,181 @@ def load_data():
         # Return generated test data as a fallback
         return generate_test_data(200)
 
-def generate_test_data(num_records=100):
+def fetch_fraud_cases(engine=None, statement=None):
+    """
+    Read fraud cases (default: the whole table) ordered by id, with the
+    category columns encoded.
+    """
+    table = FraudCase.__table__
+    if statement is None:
+        statement = select(table)
+    df = encode_categories(fetch_dataframe(statement.order_by(table.c.id), engine=engine))
+    df.attrs['source'] = 'database'
+    return df
+
+def is_database_data(df):
+    """
+    Whether df holds rows of the fraud_cases table (from load_data(),
+    fetch_fraud_cases() or refresh_data()), so queries over it can be run
+    in the database instead.
+    """
+    return df.attrs.get('source') == 'database'
+
+def merge_changed_rows(df, changes):
+    """
+    Merge re-fetched rows into df by id: rows whose id is already present
+    are replaced in place, the rest are appended.
+
+    Returns:
+    --------
+    tuple
+        (merged DataFrame, positions of the changed rows in it)
+    """
+    if changes.empty:
+        return df, np.empty(0, dtype=np.int64)
+
+    changes = changes.copy()
+    # Copy (shallowly) only if categories or rows change; appending to df
+    # itself lets append_rows() reuse the spare capacity behind its columns
+    aligned = df.copy(deep=False)
+    align_categories(aligned, changes)
+
+    ids = df['id'].to_numpy()
+    change_ids = changes['id'].to_numpy()
+    if df['id'].is_monotonic_increasing:
+        # load_data() keeps rows ordered by id, so lookups are binary searches
+        positions = np.searchsorted(ids, change_ids)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == change_ids[found]
+    else:
+        positions = pd.Index(ids).get_indexer(change_ids)
+        found = positions >= 0
+
+    replaced = positions[found]
+    if len(replaced) or not aligned.dtypes.equals(df.dtypes):
+        df = aligned
+    if len(replaced):
+        # Copy-on-write: each replaced column is copied once, never written in place
+        for column in changes.columns.intersection(df.columns):
+            df.iloc[replaced, df.columns.get_loc(column)] = changes[column].to_numpy()[found]
+
+    # Appended rows go into spare capacity behind the frame's columns
+    appended = changes[~found]
+    df = append_rows(df, appended)
+    new_positions = np.arange(len(df) - len(appended), len(df))
+
+    return df, np.concatenate([replaced, new_positions]).astype(np.int64)
+
+def refresh_data(df, engine=None):
+    """
+    Bring a DataFrame from load_data() up to date with the database by
+    fetching only cases added or changed since it was loaded.
+
+    Rows with an id above the frame's highest id or an updated_at after its
+    latest one are fetched (the id and updated_at indexes answer both),
+    merged by id, and the cached search index, text model, campaign
+    index and time-series cube are extended with the changed rows.
+    Appended rows are written into spare capacity behind the frame's
+    columns (see utils.append_buffer; the first refresh copies the frame
+    into such columns once), so a refresh that only adds rows costs about
+    the number of new rows. Replacing rows copies the columns they change.
+
+    Deleted cases are read from the fraud_case_deletions log with the same
+    updated_at high-water mark; if any of them is in the frame, it is
+    reloaded in full. Databases without the log fall back to comparing the
+    frame's length with a count of the table. A change stamped in the same
+    clock tick as the latest one already loaded (or committed by a
+    transaction that started before the last load) is only picked up by a
+    full reload.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Data previously returned by load_data() or refresh_data()
+    engine : sqlalchemy Engine, optional
+        Engine to use; defaults to the process-wide engine
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The refreshed data (df itself if nothing changed)
+    """
+    engine = engine or get_database_connection()
+    if engine is None:
+        return df
+    if df.empty or 'id' not in df.columns or 'updated_at' not in df.columns:
+        return fetch_fraud_cases(engine)
+
+    table = FraudCase.__table__
+    condition = table.c.id > int(df['id'].max())
+    max_updated_at = df['updated_at'].max()
+    if pd.notna(max_updated_at):
+        condition = or_(condition, table.c.updated_at > max_updated_at.to_pydatetime())
+
+    deleted = fetch_deleted_ids(engine, max_updated_at.to_pydatetime() if pd.notna(max_updated_at) else None)
+    if deleted is not None and len(deleted) and df['id'].isin(deleted).any():
+        logger.info("Rows were deleted since the last load; reloading all fraud cases")
+        return fetch_fraud_cases(engine)
+
+    changes = fetch_fraud_cases(engine, select(table).where(condition))
+    merged, positions = merge_changed_rows(df, changes)
+
+    if deleted is None and len(merged) > count_fraud_cases(engine):
+        logger.info("Rows were deleted since the last load; reloading all fraud cases")
+        return fetch_fraud_cases(engine)
+
+    if len(positions):
+        derive_data_version(merged, df, changes)
+        update_search_index(df, merged, positions)
+        update_text_model(df, merged, positions)
+        update_campaign_index(df, merged, positions)
+        update_time_cube(df, merged, positions)
+    logger.info(f"Refreshed data: {len(changes)} new or changed cases, {len(merged)} total")
+    return merged
+
+def iter_fraud_cases(chunk_size=50000, columns=None, df=None):
+    """
+    Iterate over fraud cases in DataFrame chunks of at most chunk_size rows.
+
+    Reads the fraud_cases table through a streaming cursor so batch jobs can
+    walk tables larger than memory. Without a database, chunks of df (or of
+    load_data() if df is None) are yielded instead.
+
+    Parameters:
+    -----------
+    chunk_size : int
+        Maximum number of rows per chunk
+    columns : list of str, optional
+        Columns to read; defaults to all columns
+    df : pandas.DataFrame, optional
+        In-memory data to chunk when no database is configured
+
+    Yields:
+    -------
+    pandas.DataFrame
+        Consecutive chunks ordered by id
+    """
+    engine = get_database_connection()
+
+    if engine:
+        table = FraudCase.__table__
+        selected = [table.c[name] for name in columns] if columns else [table]
+        statement = select(*selected).order_by(table.c.id)
+        yield from iter_dataframe_chunks(statement, engine, chunk_size)
+        return
+
+    if df is None:
+        df = load_data()
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        yield chunk[columns] if columns else chunk
+
+def generate_test_data(num_records=100, seed=None):
     """
     Generate sample test data for the FraudLens application.
     This provides realistic-looking fraud data for testing and demonstration.
     """
-    # Define lists of possible values for categorical fields
-    fraud_types = [
-        "Identity Theft", "Payment Fraud", "Account Takeover", 
-        "Synthetic Identity", "Wire Fraud", "Loan Fraud",
-        "Credit Card Fraud", "Check Fraud", "Money Laundering"
-    ]
-    
-    risk_levels = ["Low", "Medium", "High", "Critical"]
-    
-    statuses = ["Open", "In Progress", "Resolved", "Closed"]
-    
-    regions = [
-        "North America", "Europe", "Asia Pacific", 
-        "Latin America", "Middle East", "Africa"
-    ]
-    
-    detection_methods = [
-        "Automated System", "Manual Review", "Customer Report", 
-        "Fraud Pattern Detection", "Transaction Monitoring", 
-        "AI/ML Detection", "External Tip"
-    ]
-    
-    # Generate random dates within the last 2 years
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=730)  # Approximately 2 years
-    
-    # Create empty DataFrame to store the data
-    df = pd.DataFrame()
-    
-    # Generate case IDs
-    df['case_id'] = [f"CASE-{i:06d}" for i in range(1, num_records + 1)]
-    
-    # Generate detection dates
-    random_days = np.random.randint(0, 730, size=num_records)
-    df['detection_date'] = [end_date - timedelta(days=int(days)) for days in random_days]
-    
-    # Generate fraud types
-    df['fraud_type'] = np.random.choice(fraud_types, size=num_records)
-    
-    # Generate reported amounts (using a log-normal distribution for realistic fraud amounts)
-    mean_amount = 10000  # Mean fraud amount in currency units
-    df['reported_amount'] = np.random.lognormal(
-        mean=np.log(mean_amount), 
-        sigma=1.2, 
-        size=num_records
-    ).round(2)
-    
-    # Generate risk levels (weighted to have more medium/high cases)
-    risk_weights = [0.2, 0.4, 0.3, 0.1]  # Low, Medium, High, Critical
-    df['risk_level'] = np.random.choice(risk_levels, p=risk_weights, size=num_records)
-    
-    # Generate statuses (weighted to have more open/in progress cases)
-    status_weights = [0.4, 0.3, 0.2, 0.1]  # Open, In Progress, Resolved, Closed
-    df['status'] = np.random.choice(statuses, p=status_weights, size=num_records)
-    
-    # Generate regions
-    df['region'] = np.random.choice(regions, size=num_records)
-    
-    # Generate detection methods
-    df['detection_method'] = np.random.choice(detection_methods, size=num_records)
-    
-    # Generate case summaries
-    summary_templates = [
-        "Suspicious {fraud_type} detected on {date} in {region}. Amount: ${amount}. Risk: {risk}.",
-        "Potential {fraud_type} identified through {method} in {region}. Amount involved: ${amount}.",
-        "{method} flagged possible {fraud_type} on {date}. Region: {region}. Amount: ${amount}.",
-        "Customer reported {fraud_type} incident in {region}. Transaction amount: ${amount}.",
-        "{fraud_type} alert triggered by {method}. Amount: ${amount}. Risk level: {risk}."
-    ]
-    
-    # Generate case summaries for each row
-    case_summaries = []
-    for i, row in df.iterrows():
-        template = random.choice(summary_templates)
-        summary = template.format(
-            fraud_type=row['fraud_type'].lower(),
-            date=row['detection_date'].strftime('%Y-%m-%d'),
-            region=row['region'],
-            amount=f"{row['reported_amount']:,.2f}",
-            method=row['detection_method'].lower(),
-            risk=row['risk_level'].lower()
-        )
-        case_summaries.append(summary)
-    
-    df['case_summary'] = case_summaries
+    df = generate_sample_fraud_data(num_records, seed=seed)
     
     # Add dummy ID column for consistency with database schema
     df['id'] = range(1, len(df) + 1)
@@ -165,14 +267,22 @@ def search_fraud_data(df, query, filters=None):
     """
     try:
         # Check if we have a direct database connection
-        session = get_session()
+        engine = get_database_connection()
         
-        if session:
-            # Use SQLAlchemy to query the database directly
-            search_query = session.query(FraudCase)
+        if engine is not None:
+            # Query the database directly; results are read by the columnar
+            # reader, so they have the dtypes of load_data() frames
+            search_query = select(FraudCase.__table__)
             
-            # Apply text search if query is provided
+            # Apply text search if query is provided, through the full-text
+            # index when the database has one
+            ranked_query = None
             if query and query.strip():
+                ranked_query = apply_full_text_search(search_query, query, engine)
+            
+            if ranked_query is not None:
+                search_query = ranked_query
+            elif query and query.strip():
                 search_terms = [f"%{term}%" for term in query.split()]
                 search_conditions = []
                 
@@ -208,46 +318,35 @@ def search_fraud_data(df, query, filters=None):
                         FraudCase.reported_amount.between(min_amount, max_amount)
                     )
             
-            # Execute query
-            results = search_query.all()
-            
-            # Convert to DataFrame
-            result_df = query_to_dataframe(results)
-            
-            # Close session
-            session.close()
-            
-            return result_df
+            # Execute query (ranked matches stay first; ties by id)
+            return fetch_fraud_cases(engine, search_query)
         
-        # Fallback to pandas filtering if no direct database connection
-        if df.empty:
-            return df
-            
-        filtered_df = df.copy()
+        # Fallback to pandas filtering if no direct database connection.
+        # df is the shared cached frame: always return a new (copy-on-write)
+        # frame, never df itself, even when nothing is filtered out
+        filtered_df = df.iloc[:]
+        if filtered_df.empty:
+            return filtered_df
         
-        # Apply text search
-        if query and not filtered_df.empty:
-            query = query.lower()
-            mask = filtered_df['case_id'].str.lower().str.contains(query, na=False)
-            mask |= filtered_df['fraud_type'].str.lower().str.contains(query, na=False)
-            mask |= filtered_df['region'].str.lower().str.contains(query, na=False)
-            mask |= filtered_df['detection_method'].str.lower().str.contains(query, na=False)
-            mask |= filtered_df['case_summary'].str.lower().str.contains(query, na=False)
-            filtered_df = filtered_df[mask]
+        # Apply text search through the in-memory inverted index
+        if query and query.strip():
+            positions = get_search_index(df).search(query)
+            filtered_df = filtered_df.iloc[positions]
         
         # Apply additional filters
         if filters and not filtered_df.empty:
             if filters.get('fraud_type'):
-                filtered_df = filtered_df[filtered_df['fraud_type'].isin(filters['fraud_type'])]
+                filtered_df = filtered_df[isin_mask(filtered_df['fraud_type'], filters['fraud_type'])]
             
             if filters.get('risk_level'):
-                filtered_df = filtered_df[filtered_df['risk_level'].isin(filters['risk_level'])]
+                filtered_df = filtered_df[isin_mask(filtered_df['risk_level'], filters['risk_level'])]
             
             if filters.get('date_range') and all(filters['date_range']):
-                start_date, end_date = filters['date_range']
+                start_date, end_date = pd.Timestamp(filters['date_range'][0]), pd.Timestamp(filters['date_range'][1])
+                detection_date = pd.to_datetime(filtered_df['detection_date'])
                 filtered_df = filtered_df[
-                    (filtered_df['detection_date'] >= start_date) & 
-                    (filtered_df['detection_date'] <= end_date)
+                    (detection_date >= start_date) & 
+                    (detection_date <= end_date)
                 ]
             
             if filters.get('amount_range') and all(filters['amount_range']):
@@ -267,84 +366,77 @@ def search_fraud_data(df, query, filters=None):
 def calculate_similarity(case_id1, case_id2, df):
     """
     Calculate similarity between two fraud cases
+
+    Matching fraud type, region, detection method and risk level add 0.3,
+    0.2, 0.15 and 0.15; the reported amounts add up to 0.2 by their ratio.
+    To score one case against all cases use utils.similarity.most_similar_cases.
     """
-    if df.empty or case_id1 not in df['case_id'].values or case_id2 not in df['case_id'].values:
+    if df.empty or 'case_id' not in df.columns:
         return 0.0
-        
-    # Get case data
-    case1 = df[df['case_id'] == case_id1].iloc[0]
-    case2 = df[df['case_id'] == case_id2].iloc[0]
-    
-    # Calculate similarity based on fraud type, amount, risk level, and region
-    similarity = 0.0
-    
-    # Add similarity for matching fraud types (30% weight)
-    if case1['fraud_type'] == case2['fraud_type']:
-        similarity += 0.3
-    
-    # Add similarity for region (20% weight)
-    if case1['region'] == case2['region']:
-        similarity += 0.2
-    
-    # Add similarity for detection method (15% weight)
-    if case1['detection_method'] == case2['detection_method']:
-        similarity += 0.15
-    
-    # Add similarity for risk level (15% weight)
-    if case1['risk_level'] == case2['risk_level']:
-        similarity += 0.15
-    
-    # Add similarity for reported amount (20% weight)
-    # If both amounts exist, calculate similarity based on relative difference
-    if pd.notna(case1['reported_amount']) and pd.notna(case2['reported_amount']):
-        amount1 = case1['reported_amount']
-        amount2 = case2['reported_amount']
-        
-        if amount1 == 0 and amount2 == 0:
-            similarity += 0.2
-        else:
-            # Calculate relative difference
-            max_amount = max(amount1, amount2)
-            if max_amount > 0:
-                diff = abs(amount1 - amount2) / max_amount
-                # Convert difference to similarity (1.0 - diff), capped at 0.2
-                amount_similarity = max(0, min(1.0 - diff, 1.0)) * 0.2
-                similarity += amount_similarity
-    
-    return similarity
 
-def prepare_time_series_data(df, time_unit='month'):
+    engine = get_similarity_engine(df)
+    first, second = engine.positions([case_id1, case_id2])
+    if first < 0 or second < 0:
+        return 0.0
+    return engine.similarity(first, second)
+
+def prepare_time_series_data(df, time_unit='month', by=None, filters=None, start_date=None, end_date=None, in_database=False, median=True):
     """
     Prepare time series data for trend analysis
+    
+    Answered from the rollup cube of df (built once per data version, see
+    utils/time_cube.py), so each call costs the number of cube cells
+    rather than cases. df is not modified. The cube holds no medians:
+    amount_median takes one pass over the cases, so callers that do not
+    show it should pass median=False.
+    
+    With in_database=True and df loaded from the database, the aggregation
+    runs there instead as one GROUP BY query (see aggregate_time_series()),
+    reflecting the table as it is now rather than as of the last refresh.
+    Only pass it for the full dataset: rows filtered out of df in memory
+    would still be counted.
+    
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The fraud data
+    time_unit : str or None
+        'day', 'week', 'month', 'quarter' or 'year'; None for totals per breakdown
+    by : list of str, optional
+        Columns to break the series down by (see CUBE_DIMENSIONS)
+    filters : dict, optional
+        Column -> values to keep
+    start_date, end_date : date-like, optional
+        Inclusive range of detection dates
+    in_database : bool
+        Aggregate in the database when df came from it
+    median : bool
+        Include amount_median; with in_database on a database other than
+        PostgreSQL, which lacks a median aggregate, the cube answers instead
+        
+    Returns:
+    --------
+    DataFrame with time_period (unless time_unit is None), the by columns,
+    count, amount_sum, amount_mean, amount_median (if median), amount_min
+    and amount_max
     """
     if df.empty:
         return pd.DataFrame()
     
-    # Make sure detection_date is datetime type
-    df['detection_date'] = pd.to_datetime(df['detection_date'])
-    
-    # Set time grouping based on time_unit
-    if time_unit.lower() == 'day':
-        df['time_group'] = df['detection_date'].dt.date
-    elif time_unit.lower() == 'week':
-        df['time_group'] = df['detection_date'].dt.to_period('W').dt.start_time
-    elif time_unit.lower() == 'month':
-        df['time_group'] = df['detection_date'].dt.to_period('M').dt.start_time
-    elif time_unit.lower() == 'quarter':
-        df['time_group'] = df['detection_date'].dt.to_period('Q').dt.start_time
-    elif time_unit.lower() == 'year':
-        df['time_group'] = df['detection_date'].dt.to_period('Y').dt.start_time
-    
-    # Group data by the time unit
-    time_series = df.groupby('time_group').agg({
-        'case_id': 'count',
-        'reported_amount': ['sum', 'mean', 'median']
-    }).reset_index()
-    
-    # Flatten the column names
-    time_series.columns = ['time_period', 'count', 'amount_sum', 'amount_mean', 'amount_median']
-    
-    return time_series
+    engine = get_database_connection() if in_database and is_database_data(df) else None
+    # Only PostgreSQL has a median aggregate; elsewhere medians come from df
+    if engine is not None and not (median and engine.dialect.name != 'postgresql'):
+        try:
+            return aggregate_time_series(
+                engine, time_unit.lower() if time_unit else None,
+                by=[d for d in (by or []) if d in CUBE_DIMENSIONS],
+                filters={d: values for d, values in (filters or {}).items() if d in CUBE_DIMENSIONS},
+                start_date=start_date, end_date=end_date, median=median
+            )
+        except Exception as e:
+            logger.error(f"Error aggregating time series in the database, using the cube: {str(e)}")
+    
+    return get_time_cube(df).rollup(time_unit.lower() if time_unit else None, by=by, filters=filters, start_date=start_date, end_date=end_date, cases=df if median else None)
 
 def get_case_details(case_id, df):
     """
@@ -391,36 +483,33 @@ def filter_fraud_data(df, filters):
     if df.empty or not filters:
         return df
     
-    filtered_df = df.copy()
+    # Combine all filters into one mask; category filters compare codes
+    mask = np.ones(len(df), dtype=bool)
+    detection_date = None
     
-    # Apply filters
-    if filters.get('fraud_type'):
-        filtered_df = filtered_df[filtered_df['fraud_type'].isin(filters['fraud_type'])]
+    for column in ['fraud_type', 'risk_level', 'region', 'status']:
+        if filters.get(column):
+            mask &= isin_mask(df[column], filters[column])
     
-    if filters.get('risk_level'):
-        filtered_df = filtered_df[filtered_df['risk_level'].isin(filters['risk_level'])]
+    # Campaign labels are numbered within the frame they were computed on, so
+    # they must come with df (with_campaigns() on the full dataset)
+    if filters.get('campaign'):
+        if 'campaign' not in df.columns:
+            raise ValueError("Filtering by campaign needs a 'campaign' column; add it with with_campaigns() before subsetting")
+        mask &= isin_mask(df['campaign'], filters['campaign'])
     
     if filters.get('date_range') and all(filters['date_range']):
-        filtered_df['detection_date'] = pd.to_datetime(filtered_df['detection_date'])
+        detection_date = pd.to_datetime(df['detection_date'])
         start_date, end_date = pd.to_datetime(filters['date_range'][0]), pd.to_datetime(filters['date_range'][1])
-        filtered_df = filtered_df[
-            (filtered_df['detection_date'] >= start_date) & 
-            (filtered_df['detection_date'] <= end_date)
-        ]
+        mask &= ((detection_date >= start_date) & (detection_date <= end_date)).to_numpy()
     
     if filters.get('amount_range') and all([x is not None for x in filters['amount_range']]):
         min_amount, max_amount = filters['amount_range']
-        filtered_df = filtered_df[
-            (filtered_df['reported_amount'] >= min_amount) & 
-            (filtered_df['reported_amount'] <= max_amount)
-        ]
-    
-    if filters.get('region'):
-        filtered_df = filtered_df[filtered_df['region'].isin(filters['region'])]
-    
-    if filters.get('status'):
-        filtered_df = filtered_df[filtered_df['status'].isin(filters['status'])]
+        mask &= ((df['reported_amount'] >= min_amount) & (df['reported_amount'] <= max_amount)).to_numpy()
     
+    filtered_df = df[mask]
+    if detection_date is not None:
+        filtered_df = filtered_df.assign(detection_date=detection_date[mask])
     return filtered_df
 
 # Alias for backward compatibility
@@ -0,0 +1,171 @@
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Columns that identify a row's content version; hashed when present
+VERSION_COLUMNS = ['id', 'case_id', 'updated_at']
+
+# id(df) -> (weak reference, shape/columns key, storage key, version, pin)
+_fingerprints = {}
+_fingerprint_lock = threading.Lock()
+
+def get_data_version(df):
+    """
+    Return a short stamp identifying a fraud dataset.
+
+    The stamp changes when rows are added, removed, reordered or (once an
+    updated_at column is present) modified, so it can key caches of
+    structures derived from the data such as search indexes. It is computed
+    once per DataFrame object and reused while the object is unchanged:
+    writing into df in place (df.loc[...] = ...) gives it a new stamp,
+    whichever column is written.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+
+    Returns:
+    --------
+    str
+        Hex digest of the identifying columns
+    """
+    if df is None or df.empty:
+        return 'empty'
+
+    cached = _cached_version(df)
+    if cached is not None:
+        return cached
+
+    digest = hashlib.blake2b(repr(_shape_key(df)).encode(), digest_size=8)
+    columns = [c for c in VERSION_COLUMNS if c in df.columns]
+    for column in columns:
+        digest.update(pd.util.hash_pandas_object(df[column], index=False).values.tobytes())
+    if not columns:
+        digest.update(pd.util.hash_pandas_object(df.index).values.tobytes())
+    # Written in place since its last stamp: the hashed columns may not
+    # show the edit, so chain the old stamp into the new one
+    previous = _previous_version(df)
+    if previous is not None:
+        digest.update(previous.encode())
+    return _remember_version(df, digest.hexdigest())
+
+def derive_data_version(df, parent, changes=None):
+    """
+    Give df a version derived from parent's version and the changed rows,
+    without hashing all of df.
+
+    For a df built by applying changes (replaced or appended rows) to
+    parent, as the incremental refresh does, or by adding columns computed
+    from parent (changes None). Returns the new version, or None if
+    parent's version was never computed, in which case df's version is
+    computed from scratch when first asked for.
+    """
+    parent_version = _cached_version(parent)
+    if parent_version is None:
+        return None
+
+    digest = hashlib.blake2b(repr(_shape_key(df)).encode(), digest_size=8)
+    digest.update(parent_version.encode())
+    if changes is None:
+        return _remember_version(df, digest.hexdigest())
+    for column in [c for c in VERSION_COLUMNS if c in changes.columns]:
+        digest.update(pd.util.hash_pandas_object(changes[column], index=False).values.tobytes())
+    return _remember_version(df, digest.hexdigest())
+
+def peek_data_version(df):
+    """
+    Return df's version if it has already been computed, else None.
+    """
+    return _cached_version(df)
+
+def _shape_key(df):
+    return (df.shape, tuple(df.columns))
+
+def _storage_key(df):
+    """
+    Identity of the arrays holding df's columns.
+
+    A shallow copy of df is kept with its stamp (the pin), so under
+    copy-on-write an in-place write to df must first copy the arrays it
+    writes to: the key changes with any edit, not just with the shape.
+    """
+    key = []
+    for _, values in df.items():
+        if isinstance(values.dtype, np.dtype):
+            key.append(values.to_numpy().__array_interface__['data'][0])
+        else:
+            key.append(id(values.array))
+    return tuple(key)
+
+def _fingerprint(df):
+    with _fingerprint_lock:
+        cached = _fingerprints.get(id(df))
+    if cached and cached[0]() is df:
+        return cached
+    return None
+
+def _cached_version(df):
+    if df is None or df.empty:
+        return 'empty'
+    cached = _fingerprint(df)
+    if cached and cached[1] == _shape_key(df) and cached[2] == _storage_key(df):
+        return cached[3]
+    return None
+
+def _previous_version(df):
+    """
+    df's stale stamp, if it had one before being modified in place.
+    """
+    cached = _fingerprint(df)
+    return cached[3] if cached else None
+
+def _remember_version(df, version):
+    key = id(df)
+    with _fingerprint_lock:
+        _fingerprints[key] = (weakref.ref(df), _shape_key(df), _storage_key(df), version, df.copy(deep=False))
+    weakref.finalize(df, _fingerprints.pop, key, None)
+    return version
+
+class VersionedCache:
+    """
+    Small thread-safe LRU cache for structures derived from a dataset version,
+    shared by every session in the process.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_or_build(self, key, builder):
+        """
+        Return the cached value for key, calling builder() to create it on a miss.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, builder())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
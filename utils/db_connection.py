@@ -1,10 +1,19 @@
 import os
+import re
+import threading
+import time
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, Text, Enum
+from sqlalchemy import create_engine, select, func, cast, inspect, literal_column, or_, text, Column, Index, Integer, String, Float, Date, DateTime, Text, Enum
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import streamlit as st
 import logging
+from utils.categories import encode_categories
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +22,25 @@ logger = logging.getLogger(__name__)
 # Create SQLAlchemy Base
 Base = declarative_base()
 
+# SQLite expression for the current time with millisecond resolution;
+# CURRENT_TIMESTAMP only has whole seconds
+SQLITE_NOW_MS = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+class current_timestamp(FunctionElement):
+    """
+    Current time as a column default, at millisecond resolution on SQLite.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(current_timestamp)
+def _compile_current_timestamp(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+@compiles(current_timestamp, 'sqlite')
+def _compile_current_timestamp_sqlite(element, compiler, **kw):
+    return f"({SQLITE_NOW_MS})"
+
 # Define Fraud Case model
 class FraudCase(Base):
     __tablename__ = 'fraud_cases'
@@ -20,19 +48,136 @@ class FraudCase(Base):
     id = Column(Integer, primary_key=True)
     case_id = Column(String(50), unique=True, nullable=False)
     detection_date = Column(Date, nullable=False)
-    fraud_type = Column(String(100), nullable=False)
-    reported_amount = Column(Float)
-    risk_level = Column(String(20))
-    status = Column(String(20))
+    fraud_type = Column(String(100), nullable=False, index=True)
+    reported_amount = Column(Float, index=True)
+    risk_level = Column(String(20), index=True)
+    status = Column(String(20), index=True)
     region = Column(String(100))
     detection_method = Column(String(100))
     case_summary = Column(Text)
-    
+    # Set by the database on insert and (through a trigger) on every update,
+    # so refresh_data() can fetch only rows changed since the last load
+    updated_at = Column(DateTime, server_default=current_timestamp(), index=True)
+
+    # Composite indexes for the date-bounded filters used by search and trends.
+    # Their leading columns also serve detection_date-only and region-only filters.
+    __table_args__ = (
+        Index('ix_fraud_cases_detection_date_fraud_type', 'detection_date', 'fraud_type'),
+        Index('ix_fraud_cases_region_detection_date', 'region', 'detection_date'),
+    )
+
+class FraudCaseDeletion(Base):
+    __tablename__ = 'fraud_case_deletions'
+
+    # One row per case deleted from fraud_cases, written by a trigger, so
+    # refresh_data() finds deletions through the same updated_at high-water
+    # mark as changes instead of counting the table
+    id = Column(Integer, primary_key=True)
+    fraud_case_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, server_default=current_timestamp(), index=True)
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait for a connection.
+    The totals are exposed through get_pool_metrics().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wait_lock = threading.Lock()
+        self.checkout_count = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._wait_lock:
+                self.checkout_count += 1
+                self.total_wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+
+# Process-wide engine registry, keyed by database URL
+_engines = {}
+_session_factories = {}
+_engine_lock = threading.Lock()
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Ignoring invalid integer for {name}: {value!r}")
+        return default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_pool_settings():
+    """
+    Read connection pool settings from environment variables.
+
+    DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_RECYCLE, DATABASE_POOL_PRE_PING and
+    DATABASE_STATEMENT_TIMEOUT_MS sit next to DATABASE_URL.
+    """
+    return {
+        'pool_size': _env_int('DATABASE_POOL_SIZE', 10),
+        'max_overflow': _env_int('DATABASE_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DATABASE_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DATABASE_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _env_bool('DATABASE_POOL_PRE_PING', True),
+        'statement_timeout_ms': _env_int('DATABASE_STATEMENT_TIMEOUT_MS', 0),
+    }
+
+
+def _create_pooled_engine(database_url):
+    """
+    Build the single engine used for database_url in this process.
+    """
+    settings = get_pool_settings()
+    url = make_url(database_url)
+    engine_kwargs = {'pool_pre_ping': settings['pool_pre_ping']}
+    connect_args = {}
+
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # In-memory SQLite keeps its own single-connection pool
+        pass
+    else:
+        engine_kwargs.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings['pool_size'],
+            max_overflow=settings['max_overflow'],
+            pool_timeout=settings['pool_timeout'],
+            pool_recycle=settings['pool_recycle'],
+        )
+
+    if settings['statement_timeout_ms'] > 0 and url.get_backend_name() == 'postgresql':
+        connect_args['options'] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+
+    if connect_args:
+        engine_kwargs['connect_args'] = connect_args
+
+    return create_engine(database_url, **engine_kwargs)
+
+
 # Database connection function
 def get_database_connection():
     """
-    Create a connection to the database using environment variables.
-    Returns SQLAlchemy engine.
+    Return the process-wide SQLAlchemy engine for DATABASE_URL.
+    The engine and its connection pool are created once and reused.
     """
     try:
         # Try to get database URL from environment variable
@@ -44,10 +189,17 @@ def get_database_connection():
             if 'db_connection_error' not in st.session_state:
                 st.session_state.db_connection_error = True
             return None
-            
-        # Create SQLAlchemy engine
-        engine = create_engine(database_url)
-        logger.info("Database connection established")
+
+        engine = _engines.get(database_url)
+        if engine is not None:
+            return engine
+
+        with _engine_lock:
+            engine = _engines.get(database_url)
+            if engine is None:
+                engine = _create_pooled_engine(database_url)
+                _engines[database_url] = engine
+                logger.info("Database connection pool established")
         return engine
         
     except Exception as e:
@@ -56,15 +208,61 @@ def get_database_connection():
             st.session_state.db_connection_error = True
         return None
 
+def get_pool_metrics():
+    """
+    Report connection pool usage for the current DATABASE_URL engine.
+
+    Returns:
+    --------
+    dict
+        Pool size, checked-out and overflow connections, plus checkout wait times.
+        Empty if no engine has been created yet.
+    """
+    engine = _engines.get(os.environ.get('DATABASE_URL'))
+    if engine is None:
+        return {}
+
+    pool = engine.pool
+    metrics = {'pool_class': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            pool_size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._wait_lock:
+            checkouts = pool.checkout_count
+            metrics.update(
+                checkouts=checkouts,
+                total_wait_seconds=pool.total_wait_time,
+                avg_wait_seconds=pool.total_wait_time / checkouts if checkouts else 0.0,
+                max_wait_seconds=pool.max_wait_time,
+            )
+    return metrics
+
+def dispose_engines():
+    """
+    Close every pooled engine, e.g. after forking or when DATABASE_URL changes.
+    """
+    with _engine_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _session_factories.clear()
+
 def init_database():
     """
-    Initialize the database by creating all tables defined in the models.
+    Initialize the database by creating all tables defined in the models,
+    then bring existing deployments up to date with upgrade_schema().
     """
     engine = get_database_connection()
     if engine:
         try:
             # Create tables
             Base.metadata.create_all(engine)
+            upgrade_schema(engine)
             logger.info("Database tables created successfully")
             return True
         except Exception as e:
@@ -72,13 +270,406 @@ def init_database():
             return False
     return False
 
+def upgrade_schema(engine):
+    """
+    Idempotently add schema objects that create_all() skips for tables that
+    already exist, such as columns and indexes added after the first deployment.
+    """
+    add_updated_at_column(engine)
+    add_deletion_log(engine)
+
+    for index in FraudCase.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    create_full_text_index(engine)
+    create_trigram_index(engine)
+
+def add_updated_at_column(engine):
+    """
+    Add fraud_cases.updated_at to tables created before it existed and
+    install the trigger that stamps it on every update.
+
+    PostgreSQL: a BEFORE UPDATE trigger sets it to now() unless the
+    statement sets it explicitly.
+    SQLite: ALTER TABLE cannot add a non-constant default, so existing rows
+    are backfilled and AFTER INSERT / AFTER UPDATE triggers stamp rows.
+    """
+    dialect = engine.dialect.name
+    columns = {column['name'] for column in inspect(engine).get_columns('fraud_cases')}
+    try:
+        with engine.begin() as connection:
+            if dialect == 'postgresql':
+                if 'updated_at' not in columns:
+                    connection.execute(text(
+                        "ALTER TABLE fraud_cases ADD COLUMN updated_at TIMESTAMP DEFAULT now()"
+                    ))
+                connection.execute(text(
+                    "CREATE OR REPLACE FUNCTION fraud_cases_touch_updated_at() RETURNS trigger AS $$ "
+                    "BEGIN IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN "
+                    "NEW.updated_at := now(); END IF; RETURN NEW; END $$ LANGUAGE plpgsql"
+                ))
+                connection.execute(text("DROP TRIGGER IF EXISTS fraud_cases_touch_updated_at ON fraud_cases"))
+                connection.execute(text(
+                    "CREATE TRIGGER fraud_cases_touch_updated_at BEFORE UPDATE ON fraud_cases "
+                    "FOR EACH ROW EXECUTE FUNCTION fraud_cases_touch_updated_at()"
+                ))
+            elif dialect == 'sqlite':
+                if 'updated_at' not in columns:
+                    connection.execute(text("ALTER TABLE fraud_cases ADD COLUMN updated_at DATETIME"))
+                    connection.execute(text(f"UPDATE fraud_cases SET updated_at = {SQLITE_NOW_MS}"))
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_touch_insert AFTER INSERT ON fraud_cases "
+                    "WHEN new.updated_at IS NULL BEGIN "
+                    f"UPDATE fraud_cases SET updated_at = {SQLITE_NOW_MS} WHERE id = new.id; END"
+                ))
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_touch_update AFTER UPDATE ON fraud_cases "
+                    "WHEN new.updated_at IS old.updated_at BEGIN "
+                    f"UPDATE fraud_cases SET updated_at = {SQLITE_NOW_MS} WHERE id = new.id; END"
+                ))
+            elif 'updated_at' not in columns:
+                connection.execute(text("ALTER TABLE fraud_cases ADD COLUMN updated_at TIMESTAMP"))
+        return True
+    except Exception as e:
+        logger.warning(f"Could not add updated_at tracking; refreshes will reload the table: {str(e)}")
+        return False
+
+# Engine -> whether the deletion log trigger exists
+_deletion_log_support = {}
+
+def add_deletion_log(engine):
+    """
+    Create fraud_case_deletions and the AFTER DELETE trigger that records
+    every deleted case in it (PostgreSQL and SQLite). TRUNCATE fires no
+    row triggers, so a truncated table is only noticed by a full reload.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ('postgresql', 'sqlite'):
+        return False
+    try:
+        FraudCaseDeletion.__table__.create(bind=engine, checkfirst=True)
+        with engine.begin() as connection:
+            if dialect == 'postgresql':
+                connection.execute(text(
+                    "CREATE OR REPLACE FUNCTION fraud_cases_log_delete() RETURNS trigger AS $$ "
+                    "BEGIN INSERT INTO fraud_case_deletions (fraud_case_id, deleted_at) "
+                    "VALUES (OLD.id, now()); RETURN OLD; END $$ LANGUAGE plpgsql"
+                ))
+                connection.execute(text("DROP TRIGGER IF EXISTS fraud_cases_log_delete ON fraud_cases"))
+                connection.execute(text(
+                    "CREATE TRIGGER fraud_cases_log_delete AFTER DELETE ON fraud_cases "
+                    "FOR EACH ROW EXECUTE FUNCTION fraud_cases_log_delete()"
+                ))
+            else:
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_log_delete AFTER DELETE ON fraud_cases BEGIN "
+                    "INSERT INTO fraud_case_deletions (fraud_case_id, deleted_at) "
+                    f"VALUES (old.id, {SQLITE_NOW_MS}); END"
+                ))
+        _deletion_log_support.pop(engine, None)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not add the deletion log; refreshes will count the table to detect deletes: {str(e)}")
+        return False
+
+def has_deletion_log(engine):
+    """
+    Check (once per engine) whether add_deletion_log() has run on this database.
+    """
+    if engine not in _deletion_log_support:
+        supported = False
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    supported = connection.execute(text(
+                        "SELECT 1 FROM pg_trigger WHERE tgname = 'fraud_cases_log_delete'"
+                    )).first() is not None
+                elif engine.dialect.name == 'sqlite':
+                    supported = connection.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'fraud_cases_log_delete'"
+                    )).first() is not None
+        except Exception:
+            supported = False
+        _deletion_log_support[engine] = supported
+    return _deletion_log_support[engine]
+
+def fetch_deleted_ids(engine, since=None):
+    """
+    Ids of cases deleted at or after since (all logged deletions if None),
+    read through the deleted_at index; None without a deletion log.
+    """
+    if not has_deletion_log(engine):
+        return None
+    table = FraudCaseDeletion.__table__
+    statement = select(table.c.fraud_case_id)
+    if since is not None:
+        statement = statement.where(table.c.deleted_at >= since)
+    with engine.connect() as connection:
+        return np.asarray(connection.execute(statement).scalars().all(), dtype=np.int64)
+
+# Columns covered by full-text search, in the order they are indexed
+FULL_TEXT_COLUMNS = ['case_id', 'fraud_type', 'region', 'detection_method', 'case_summary']
+
+# Engine -> whether the full-text / trigram index exists
+_full_text_support = {}
+_trigram_support = {}
+
+def _search_document_sql():
+    """
+    SQL expression concatenating the searchable columns of fraud_cases.
+    """
+    return " || ' ' || ".join(f"coalesce({name}, '')" for name in FULL_TEXT_COLUMNS)
+
+def create_full_text_index(engine):
+    """
+    Create the full-text search structures for fraud_cases.
+
+    PostgreSQL: a generated tsvector column (kept current by the database on
+    insert and update) with a GIN index.
+    SQLite: an external-content FTS5 table with the trigram tokenizer, so
+    MATCH finds substrings as ILIKE '%term%' did, kept in sync by triggers.
+    A table created with another tokenizer is rebuilt.
+    Other dialects keep using ILIKE search.
+    """
+    dialect = engine.dialect.name
+    try:
+        if dialect == 'postgresql':
+            document = _search_document_sql()
+            with engine.begin() as connection:
+                connection.execute(text(
+                    "ALTER TABLE fraud_cases ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                    f"GENERATED ALWAYS AS (to_tsvector('english', {document})) STORED"
+                ))
+                connection.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_fraud_cases_search_vector "
+                    "ON fraud_cases USING GIN (search_vector)"
+                ))
+        elif dialect == 'sqlite':
+            columns = ', '.join(FULL_TEXT_COLUMNS)
+            new_values = ', '.join(f"new.{name}" for name in FULL_TEXT_COLUMNS)
+            old_values = ', '.join(f"old.{name}" for name in FULL_TEXT_COLUMNS)
+            with engine.begin() as connection:
+                existing = connection.execute(text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'fraud_cases_fts'"
+                )).scalar()
+                if existing is not None and 'trigram' in existing:
+                    return True
+                if existing is not None:
+                    # Word-tokenized table from an earlier version: only matched whole words and prefixes
+                    for trigger in ('insert', 'delete', 'update'):
+                        connection.execute(text(f"DROP TRIGGER IF EXISTS fraud_cases_fts_{trigger}"))
+                    connection.execute(text("DROP TABLE fraud_cases_fts"))
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE fraud_cases_fts USING fts5({columns}, "
+                    "content='fraud_cases', content_rowid='id', tokenize='trigram')"
+                ))
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_fts_insert AFTER INSERT ON fraud_cases BEGIN "
+                    f"INSERT INTO fraud_cases_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+                ))
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_fts_delete AFTER DELETE ON fraud_cases BEGIN "
+                    f"INSERT INTO fraud_cases_fts(fraud_cases_fts, rowid, {columns}) "
+                    f"VALUES ('delete', old.id, {old_values}); END"
+                ))
+                connection.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS fraud_cases_fts_update AFTER UPDATE ON fraud_cases BEGIN "
+                    f"INSERT INTO fraud_cases_fts(fraud_cases_fts, rowid, {columns}) "
+                    f"VALUES ('delete', old.id, {old_values}); "
+                    f"INSERT INTO fraud_cases_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+                ))
+                # Index rows that existed before the FTS table was created
+                connection.execute(text("INSERT INTO fraud_cases_fts(fraud_cases_fts) VALUES ('rebuild')"))
+        else:
+            return False
+        _full_text_support.pop(engine, None)
+        return True
+    except Exception as e:
+        logger.warning(f"Full-text search index unavailable, falling back to ILIKE search: {str(e)}")
+        return False
+
+def create_trigram_index(engine):
+    """
+    Create a pg_trgm GIN index over the searchable columns (PostgreSQL only),
+    so ILIKE '%fragment%' substring searches can use an index.
+    """
+    if engine.dialect.name != 'postgresql':
+        return False
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_fraud_cases_search_trgm "
+                f"ON fraud_cases USING GIN (({_search_document_sql()}) gin_trgm_ops)"
+            ))
+        _trigram_support.pop(engine, None)
+        return True
+    except Exception as e:
+        logger.warning(f"Trigram index unavailable (is pg_trgm installed?): {str(e)}")
+        return False
+
+def has_trigram_index(engine):
+    """
+    Check (once per engine) whether create_trigram_index() has run on this database.
+    """
+    if engine not in _trigram_support:
+        supported = False
+        if engine.dialect.name == 'postgresql':
+            try:
+                indexes = inspect(engine).get_indexes('fraud_cases')
+                supported = any(index['name'] == 'ix_fraud_cases_search_trgm' for index in indexes)
+            except Exception:
+                supported = False
+        _trigram_support[engine] = supported
+    return _trigram_support[engine]
+
+def has_full_text_index(engine):
+    """
+    Check (once per engine) whether create_full_text_index() has run on this database.
+    """
+    if engine not in _full_text_support:
+        dialect = engine.dialect.name
+        try:
+            inspector = inspect(engine)
+            if dialect == 'postgresql':
+                columns = {c['name'] for c in inspector.get_columns('fraud_cases')}
+                supported = 'search_vector' in columns
+            elif dialect == 'sqlite':
+                with engine.connect() as connection:
+                    definition = connection.execute(text(
+                        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'fraud_cases_fts'"
+                    )).scalar()
+                supported = definition is not None and 'trigram' in definition
+            else:
+                supported = False
+        except Exception:
+            supported = False
+        _full_text_support[engine] = supported
+    return _full_text_support[engine]
+
+def _full_text_terms(query):
+    """
+    Split a search string into terms, each a list of lowercase alphanumeric tokens.
+    Punctuation is dropped so the result is safe to embed in FTS query syntax.
+    """
+    terms = []
+    for term in query.split():
+        tokens = re.findall(r'[0-9a-z]+', term.lower())
+        if tokens:
+            terms.append(tokens)
+    return terms
+
+def _escape_like(term):
+    """
+    Escape LIKE wildcards so a search term is matched literally.
+    """
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def apply_full_text_search(search_query, query, engine):
+    """
+    Restrict a query on fraud_cases (an ORM query or a Core select) to
+    full-text matches for query, best matches first.
+
+    Terms are OR'ed together and match as substrings of a column, as in the
+    ILIKE search. On SQLite the trigram FTS5 table answers the substring
+    match; terms shorter than a trigram fall back to the ILIKE search.
+    On PostgreSQL a term also matches when every word inside it (e.g.
+    "CASE" and "0012" in "CASE-0012") is a word prefix in the tsvector, and
+    the substring match is served by the pg_trgm index when it exists.
+
+    Returns:
+    --------
+    sqlalchemy.orm.Query, sqlalchemy Select or None
+        The ranked query, or None if no full-text index is available
+    """
+    terms = _full_text_terms(query)
+    if not terms or not has_full_text_index(engine):
+        return None
+
+    if engine.dialect.name == 'postgresql':
+        ts_query = ' | '.join('(' + ' & '.join(f"{token}:*" for token in tokens) + ')' for tokens in terms)
+        search_vector = literal_column('fraud_cases.search_vector')
+        matched = func.to_tsquery('english', ts_query)
+        condition = search_vector.op('@@')(matched)
+        # Word fragments and partial case IDs: substring match, served by the
+        # pg_trgm index when there is one and by a scan (as before) otherwise
+        document = literal_column(f"({_search_document_sql()})")
+        condition = or_(condition, *(
+            document.ilike(f"%{_escape_like(term)}%", escape='\\') for term in query.split()
+        ))
+        return search_query.filter(condition).order_by(func.ts_rank(search_vector, matched).desc())
+
+    # Trigram MATCH cannot find substrings shorter than three characters
+    raw_terms = query.split()
+    if any(len(term) < 3 for term in raw_terms):
+        return None
+    fts_query = ' OR '.join('"' + term.replace('"', '""') + '"' for term in raw_terms)
+    matches = text(
+        "SELECT rowid AS id, bm25(fraud_cases_fts) AS rank "
+        "FROM fraud_cases_fts WHERE fraud_cases_fts MATCH :fts_query"
+    ).bindparams(fts_query=fts_query).columns(id=Integer, rank=Float).subquery('fts_matches')
+    return search_query.join(matches, matches.c.id == FraudCase.id).order_by(matches.c.rank)
+
+def count_fraud_cases(engine):
+    """
+    Number of rows in fraud_cases (a full scan on PostgreSQL and SQLite).
+    """
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(FraudCase.__table__)).scalar()
+
+def get_table_stats(engine):
+    """
+    Highest id and latest updated_at of fraud_cases, plus a deletion
+    marker: the highest fraud_case_deletions id, or the row count on
+    databases without the deletion log.
+
+    Each maximum is its own scalar subquery, so PostgreSQL and SQLite read
+    it from the end of the primary key or updated_at index instead of
+    scanning the table; only the count fallback scans.
+    """
+    table = FraudCase.__table__
+    if has_deletion_log(engine):
+        deletions = FraudCaseDeletion.__table__
+        marker = select(func.max(deletions.c.id)).scalar_subquery()
+    else:
+        marker = select(func.count()).select_from(table).scalar_subquery()
+    with engine.connect() as connection:
+        return tuple(connection.execute(select(
+            select(func.max(table.c.id)).scalar_subquery(),
+            select(func.max(table.c.updated_at)).scalar_subquery(),
+            marker,
+        )).one())
+
+def get_table_version(engine=None):
+    """
+    Return a stamp of the fraud_cases contents (highest id, latest
+    updated_at and deletion marker from get_table_stats, plus the database
+    URL), used to key on-disk snapshots of the table. Inserts raise the
+    id, updates (through the updated_at trigger) the timestamp, and
+    deletes the marker.
+
+    Returns:
+    --------
+    str or None
+        The stamp, or None if no engine is available
+    """
+    engine = engine or get_database_connection()
+    if engine is None:
+        return None
+    max_id, max_updated_at, deletions = get_table_stats(engine)
+    url = engine.url.render_as_string(hide_password=True)
+    return f"{url}|{max_id}|{max_updated_at}|{deletions}"
+
 def get_session():
     """
     Create a database session.
     """
     engine = get_database_connection()
     if engine:
-        Session = sessionmaker(bind=engine)
+        Session = _session_factories.get(engine)
+        if Session is None:
+            Session = sessionmaker(bind=engine)
+            _session_factories[engine] = Session
         return Session()
     return None
 
@@ -99,4 +690,231 @@ def query_to_dataframe(query_results):
             del row['_sa_instance_state']
             
     # Convert to DataFrame
-    return pd.DataFrame(data)
\ No newline at end of file
+    return pd.DataFrame(data)
+
+# Dtype of Date and DateTime columns in bulk reads, as in frames built in memory
+DATETIME_DTYPE = 'datetime64[us]'
+
+def _column_dtype(column_type):
+    """
+    Map a SQLAlchemy column type to the NumPy dtype used for bulk reads.
+
+    The raw cursor skips SQLAlchemy's result processors, so the conversion
+    is decided here from the column type: dates and timestamps arrive as
+    date/datetime objects from psycopg2 but as ISO strings from SQLite, and
+    both become DATETIME_DTYPE.
+    """
+    if isinstance(column_type, Integer):
+        return np.int64
+    if isinstance(column_type, Float):
+        return np.float64
+    if isinstance(column_type, (Date, DateTime)):
+        return DATETIME_DTYPE
+    return object
+
+def _to_numpy_column(values, dtype):
+    """
+    Convert one column of fetched values into a typed NumPy array.
+    """
+    if dtype is np.int64:
+        try:
+            return np.array(values, dtype=np.int64)
+        except TypeError:
+            # NULLs in an integer column: fall back to float with NaN
+            return np.array(values, dtype=np.float64)
+    if dtype is np.float64:
+        # NumPy converts None to NaN for float arrays
+        return np.array(values, dtype=np.float64)
+    if dtype == DATETIME_DTYPE:
+        # Parses ISO strings and converts date/datetime objects alike; NULL becomes NaT
+        return np.array(values, dtype=DATETIME_DTYPE)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+def _iter_column_batches(statement, engine, batch_size):
+    """
+    Execute a Core statement on a raw DBAPI cursor and yield one list of
+    NumPy arrays per fetched batch. Rows are never materialized as ORM
+    objects, SQLAlchemy Row objects or dicts.
+    """
+    dtypes = [_column_dtype(c.type) for c in statement.selected_columns]
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if engine.dialect.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    raw_connection = engine.raw_connection()
+    try:
+        if engine.dialect.driver == 'psycopg2':
+            # Named cursor = server-side cursor, so only batch_size rows are in flight
+            cursor = raw_connection.cursor(name=f"fraudlens_bulk_{id(statement):x}")
+            cursor.itersize = batch_size
+        else:
+            cursor = raw_connection.cursor()
+        cursor.execute(str(compiled), params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = zip(*rows)
+            yield [_to_numpy_column(values, dtype) for values, dtype in zip(columns, dtypes)]
+        cursor.close()
+    finally:
+        raw_connection.close()
+
+def fetch_dataframe(statement=None, engine=None, batch_size=50000):
+    """
+    Bulk-read a Core select into a DataFrame built from typed NumPy columns.
+
+    Parameters:
+    -----------
+    statement : sqlalchemy Select, optional
+        Statement to run; defaults to every column of fraud_cases
+    engine : sqlalchemy Engine, optional
+        Engine to use; defaults to the process-wide engine
+    batch_size : int
+        Rows fetched from the driver per round trip
+
+    Returns:
+    --------
+    pandas.DataFrame
+        Query results, or an empty DataFrame if no engine is available
+    """
+    engine = engine or get_database_connection()
+    if engine is None:
+        return pd.DataFrame()
+    if statement is None:
+        statement = select(FraudCase.__table__)
+
+    frames = list(iter_dataframe_chunks(statement, engine, batch_size))
+
+    if not frames:
+        # Typed empty columns, so empty results have the dtypes of the others
+        # (pandas infers str for text columns only from their values)
+        return pd.DataFrame({
+            c.name: pd.Series(_to_numpy_column((), _column_dtype(c.type)), dtype='str' if isinstance(c.type, String) else None)
+            for c in statement.selected_columns
+        })
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+def iter_dataframe_chunks(statement, engine, chunk_size=50000):
+    """
+    Stream a Core select as DataFrames of at most chunk_size rows.
+
+    Only one chunk of driver rows is held at a time (server-side cursor on
+    PostgreSQL), so memory stays bounded regardless of table size.
+    """
+    names = [c.name for c in statement.selected_columns]
+    for arrays in _iter_column_batches(statement, engine, chunk_size):
+        yield pd.DataFrame(dict(zip(names, arrays)))
+
+# Time units answered by aggregate_time_series(); periods start on the
+# first day of the unit, weeks on Monday (as pandas' weekly periods)
+TIME_SERIES_UNITS = ['day', 'week', 'month', 'quarter', 'year']
+
+def _period_start(column, time_unit, dialect):
+    """
+    SQL expression for the first day of the time_unit period holding a date.
+
+    The unit and date modifiers are rendered inline rather than bound, so
+    the expression compiles to the same text in the select list and the
+    GROUP BY clause.
+    """
+    if time_unit not in TIME_SERIES_UNITS:
+        raise ValueError(f"Unknown time unit: {time_unit}")
+    if dialect == 'postgresql':
+        truncated = func.date_trunc(literal_column(f"'{time_unit}'"), cast(column, DateTime))
+        return cast(truncated, Date)
+    if dialect != 'sqlite':
+        raise NotImplementedError(f"Time series aggregation is not supported on {dialect}")
+
+    if time_unit == 'day':
+        modifiers = []
+    elif time_unit == 'week':
+        # Next Sunday (or the day itself), then back to that week's Monday
+        modifiers = [literal_column("'weekday 0'"), literal_column("'-6 days'")]
+    elif time_unit == 'quarter':
+        months_into_quarter = (cast(func.strftime(literal_column("'%m'"), column), Integer) - literal_column('1')) % literal_column('3')
+        modifiers = [literal_column("'start of month'"), func.printf(literal_column("'-%d months'"), months_into_quarter)]
+    else:
+        modifiers = [literal_column(f"'start of {time_unit}'")]
+    return func.date(column, *modifiers, type_=Date)
+
+def aggregate_time_series(engine, time_unit='month', by=None, filters=None, start_date=None, end_date=None, median=False):
+    """
+    Aggregate fraud cases per time period and breakdown in the database.
+
+    Runs one GROUP BY query with the filters and date range in its WHERE
+    clause, so only the aggregated rows are transferred (a few hundred for
+    a monthly trend, whatever the table size).
+
+    Parameters:
+    -----------
+    engine : sqlalchemy Engine
+        PostgreSQL or SQLite engine holding fraud_cases
+    time_unit : str or None
+        'day', 'week', 'month', 'quarter' or 'year'; None for totals per breakdown
+    by : list of str, optional
+        Columns to break the series down by
+    filters : dict, optional
+        Column -> values to keep
+    start_date, end_date : date-like, optional
+        Inclusive range of detection dates
+    median : bool
+        Add amount_median, from percentile_cont on PostgreSQL; SQLite has
+        no median aggregate, so the column is NaN there
+
+    Returns:
+    --------
+    pandas.DataFrame
+        time_period (unless time_unit is None), the by columns, count,
+        amount_sum, amount_mean, amount_median (if median), amount_min and
+        amount_max, ordered by period and breakdown; typed and ordered as
+        TimeCube.rollup results
+    """
+    table = FraudCase.__table__
+    amount = table.c.reported_amount
+    keys = []
+    if time_unit is not None:
+        keys.append(_period_start(table.c.detection_date, time_unit, engine.dialect.name).label('time_period'))
+    keys += [table.c[column] for column in (by or []) if column in table.c]
+
+    statement = select(
+        *keys,
+        func.count().label('count'),
+        func.count(amount).label('amount_count'),
+        func.sum(amount).label('amount_sum'),
+        func.min(amount).label('amount_min'),
+        func.max(amount).label('amount_max'),
+    ).select_from(table)
+    if median and engine.dialect.name == 'postgresql':
+        statement = statement.add_columns(func.percentile_cont(0.5).within_group(amount).label('amount_median'))
+    for column, values in (filters or {}).items():
+        if column in table.c and values:
+            statement = statement.where(table.c[column].in_([value for value in values if pd.notna(value)]))
+    if start_date is not None:
+        statement = statement.where(table.c.detection_date >= pd.Timestamp(start_date).date())
+    if end_date is not None:
+        statement = statement.where(table.c.detection_date <= pd.Timestamp(end_date).date())
+    if keys:
+        statement = statement.group_by(*keys)
+
+    # Shared categoricals and second-resolution periods, as the cube returns
+    # them, so breakdowns sort in category order (Low < ... < Critical)
+    result = encode_categories(fetch_dataframe(statement, engine))
+    if time_unit is not None:
+        result['time_period'] = pd.to_datetime(result['time_period']).astype('datetime64[s]')
+    key_names = [key.name for key in keys]
+    if key_names:
+        result = result.sort_values(key_names, kind='stable').reset_index(drop=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result['amount_mean'] = result['amount_sum'].to_numpy(dtype=np.float64) / result['amount_count'].to_numpy(dtype=np.float64)
+    result['count'] = result['count'].astype(np.int64)
+    measures = ['count', 'amount_sum', 'amount_mean', 'amount_min', 'amount_max']
+    if median:
+        result['amount_median'] = result['amount_median'].astype(np.float64) if 'amount_median' in result.columns else np.nan
+        measures.insert(3, 'amount_median')
+    return result[key_names + measures]
@@ -0,0 +1,247 @@
+import hashlib
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+import logging
+from utils.data_version import get_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Holt-Winters forecasts (additive ETS with a damped trend and additive
+# seasonality) for many series at once. The series are stacked as rows of
+# one array and every candidate parameter set is run through the smoothing
+# recursion together, one time step at a time, so fitting hundreds of
+# series costs one vectorized pass instead of one optimizer run each.
+# Fitted states are cached per (data version, time unit, series values);
+# forecasts for a new horizon or confidence reuse them.
+
+# pandas period and season length (periods per year, None for no
+# seasonality) of each time unit
+PERIOD_FREQUENCIES = {'day': 'D', 'week': 'W', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+SEASON_LENGTHS = {'day': 7, 'week': 52, 'month': 12, 'quarter': 4, 'year': None}
+
+# Candidate smoothing parameters: alpha for the level, beta as a share of
+# alpha for the trend, gamma as a share of 1 - alpha for the season and
+# phi, the trend damping per period (below 1 levels long horizons off)
+ALPHA_GRID = np.array([0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.95])
+BETA_SHARES = np.array([0.0, 0.05, 0.1, 0.2, 0.4])
+GAMMA_SHARES = np.array([0.0, 0.1, 0.2, 0.4])
+PHI_GRID = np.array([0.9, 0.98, 1.0])
+
+# Most recent periods used for fitting
+MAX_FIT_PERIODS = 156
+
+# Series fitted per block; bounds the (series x candidates x season) state array
+FIT_BLOCK_SIZE = 256
+
+# Fitted models for the most recent (data version, time unit, series)
+_model_cache = VersionedCache(max_entries=16)
+
+def _parameter_grid(seasonal):
+    """
+    (alpha, beta, gamma, phi) of every candidate, as four flat arrays.
+    """
+    gamma_shares = GAMMA_SHARES if seasonal else np.zeros(1)
+    alpha, beta_share, gamma_share, phi = np.meshgrid(ALPHA_GRID, BETA_SHARES, gamma_shares, PHI_GRID, indexing='ij')
+    alpha = alpha.ravel()
+    return alpha, alpha * beta_share.ravel(), (1 - alpha) * gamma_share.ravel(), phi.ravel()
+
+def _fit_block(values, season_length, alpha, beta, gamma, phi):
+    """
+    Run every candidate over a block of series and keep the best per series.
+
+    Missing observations (NaN) leave the states to their one-step
+    prediction and add nothing to the squared error.
+
+    Returns:
+    --------
+    tuple
+        (best candidate index, level, trend, season (series x season_length),
+        residual standard deviation), one entry per series
+    """
+    num_series, num_periods = values.shape
+    observed = ~np.isnan(values)
+    filled = np.where(observed, values, 0.0)
+
+    # Initial states from the first two seasons: their mean change per period
+    # as the trend, and the detrended deviations within the first as the season
+    def season_mean(start):
+        window = slice(start, min(start + season_length, num_periods))
+        counts = observed[:, window].sum(axis=1)
+        return np.where(counts > 0, filled[:, window].sum(axis=1) / np.maximum(counts, 1), np.nan)
+
+    first = season_mean(0)
+    first = np.where(np.isnan(first), 0.0, first)
+    second = season_mean(season_length) if num_periods > season_length else np.full(num_series, np.nan)
+    trend = np.where(np.isnan(second), 0.0, (second - first) / season_length)
+    # The first season's mean sits at its middle; the level starts one period before it
+    offsets = np.arange(season_length) - (season_length - 1) / 2
+    initial_level = first - trend * (offsets[0] - 1)
+    initial_season = np.zeros((num_series, season_length))
+    width = min(season_length, num_periods)
+    if season_length > 1:
+        detrended = filled[:, :width] - first[:, np.newaxis] - trend[:, np.newaxis] * offsets[:width]
+        initial_season[:, :width] = np.where(observed[:, :width], detrended, 0.0)
+
+    candidates = len(alpha)
+    level = np.repeat(initial_level[:, np.newaxis], candidates, axis=1)
+    trend = np.repeat(trend[:, np.newaxis], candidates, axis=1)
+    season = np.repeat(initial_season[:, np.newaxis, :], candidates, axis=1)
+    squared_error = np.zeros((num_series, candidates))
+
+    for t in range(num_periods):
+        slot = t % season_length
+        damped_trend = phi * trend
+        error = filled[:, t, np.newaxis] - (level + damped_trend + season[:, :, slot])
+        error *= observed[:, t, np.newaxis]
+        squared_error += error * error
+        level = level + damped_trend + alpha * error
+        trend = damped_trend + beta * error
+        season[:, :, slot] += gamma * error
+
+    best = np.argmin(squared_error, axis=1)
+    rows = np.arange(num_series)
+    # Level, trend and up to season_length - 1 initial seasonal states are estimated
+    parameters = 3 + (season_length - 1 if season_length > 1 else 0)
+    degrees = np.maximum(observed.sum(axis=1) - parameters, 1)
+    sigma = np.sqrt(squared_error[rows, best] / degrees)
+    return best, level[rows, best], trend[rows, best], season[rows, best], sigma
+
+class HoltWinters:
+    """
+    Fitted Holt-Winters states of a set of series on a common period grid,
+    with the parameters and residual spread chosen for each series.
+    """
+
+    def __init__(self, columns, last_period, time_unit, season_length, parameters, level, trend, season, sigma, num_periods):
+        self.columns = columns
+        self.last_period = last_period
+        self.time_unit = time_unit
+        self.season_length = season_length
+        self.parameters = parameters
+        self.level = level
+        self.trend = trend
+        self.season = season
+        self.sigma = sigma
+        self.num_periods = num_periods
+
+    @classmethod
+    def fit(cls, series, time_unit='month', fill_value=None):
+        """
+        Fit every column of series (indexed by period start, one row per
+        period) in vectorized blocks. Periods missing from the index and
+        NaN values count as fill_value, or as missing observations when
+        fill_value is None.
+        """
+        unit = time_unit.lower()
+        if unit not in PERIOD_FREQUENCIES:
+            raise ValueError(f"Unknown time unit: {time_unit}")
+        periods = pd.PeriodIndex(pd.DatetimeIndex(series.index), freq=PERIOD_FREQUENCIES[unit])
+        full_range = pd.period_range(periods.min(), periods.max(), freq=PERIOD_FREQUENCIES[unit])
+        series = series.set_axis(periods).reindex(full_range).tail(MAX_FIT_PERIODS)
+        if fill_value is not None:
+            series = series.fillna(fill_value)
+        values = series.to_numpy(dtype=np.float64).T
+
+        # The season only counts once two full seasons are available
+        season_length = SEASON_LENGTHS[unit] or 1
+        if len(series) < 2 * season_length:
+            season_length = 1
+        alpha, beta, gamma, phi = _parameter_grid(season_length > 1)
+
+        num_series = values.shape[0]
+        best = np.empty(num_series, dtype=np.int64)
+        level, trend, sigma = np.empty(num_series), np.empty(num_series), np.empty(num_series)
+        season = np.empty((num_series, season_length))
+        for start in range(0, num_series, FIT_BLOCK_SIZE):
+            block = slice(start, start + FIT_BLOCK_SIZE)
+            best[block], level[block], trend[block], season[block], sigma[block] = _fit_block(
+                values[block], season_length, alpha, beta, gamma, phi
+            )
+
+        parameters = pd.DataFrame({'alpha': alpha[best], 'beta': beta[best], 'gamma': gamma[best], 'phi': phi[best],
+                                   'sigma': sigma}, index=series.columns)
+        return cls(series.columns, full_range[-1], unit, season_length, parameters, level, trend, season, sigma, len(series))
+
+    def forecast(self, horizon, confidence=0.8):
+        """
+        Point forecasts and prediction intervals for the next horizon periods.
+
+        Returns:
+        --------
+        tuple
+            (forecast, lower, upper) DataFrames indexed by period start, one
+            column per series
+        """
+        steps = np.arange(1, horizon + 1)
+        alpha, beta, gamma, phi = (self.parameters[name].to_numpy()[:, np.newaxis] for name in ['alpha', 'beta', 'gamma', 'phi'])
+        # Sum of the damping factors over the first h periods
+        damping = np.cumsum(phi ** steps, axis=1)
+        slots = (self.num_periods + steps - 1) % self.season_length
+        forecast = self.level[:, np.newaxis] + self.trend[:, np.newaxis] * damping + self.season[:, slots]
+
+        # h-step variance of additive ETS: sigma^2 (1 + sum of c_j^2 for j < h)
+        seasonal_step = (steps % self.season_length == 0) & (self.season_length > 1)
+        weights = alpha + beta * damping + gamma * seasonal_step
+        cumulative = np.concatenate([np.zeros((len(alpha), 1)), np.cumsum(weights ** 2, axis=1)[:, :-1]], axis=1)
+        spread = NormalDist().inv_cdf(0.5 + confidence / 2) * self.sigma[:, np.newaxis] * np.sqrt(1 + cumulative)
+
+        index = pd.period_range(self.last_period + 1, periods=horizon).start_time
+        frame = lambda values: pd.DataFrame(values.T, index=index, columns=self.columns)
+        return frame(forecast), frame(forecast - spread), frame(forecast + spread)
+
+def complete_periods(series, time_unit, start_date=None, end_date=None):
+    """
+    Rows of series (indexed by period start) whose period lies within
+    start_date and end_date (default today), so a period the data only
+    partly covers does not skew the fit.
+    """
+    periods = pd.DatetimeIndex(series.index).to_period(PERIOD_FREQUENCIES[time_unit.lower()])
+    end = pd.Timestamp(end_date if end_date is not None else pd.Timestamp.today()).normalize()
+    keep = periods.end_time.normalize() <= end
+    if start_date is not None:
+        keep &= periods.start_time >= pd.Timestamp(start_date).normalize()
+    return series[keep]
+
+def _series_key(series, time_unit, fill_value):
+    digest = hashlib.blake2b(f"{time_unit}|{fill_value}".encode(), digest_size=8)
+    digest.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+    digest.update(repr(list(series.columns)).encode())
+    return digest.hexdigest()
+
+def forecast_series(df, series, time_unit='month', horizon=6, confidence=0.8, fill_value=None, non_negative=True):
+    """
+    Forecast each column of series, fitting once per data version and series.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data the series were computed from (keys the cache)
+    series : pandas.DataFrame
+        One column per series, indexed by period start; NaN for periods
+        without an observation
+    time_unit : str
+        'day', 'week', 'month', 'quarter' or 'year'
+    horizon : int
+        Periods to forecast
+    confidence : float
+        Coverage of the prediction interval, e.g. 0.8
+    fill_value : float, optional
+        Value of missing periods (0 for counts and sums); None fits around them
+    non_negative : bool
+        Clip forecasts and intervals at zero (counts and amounts)
+
+    Returns:
+    --------
+    tuple
+        (forecast, lower, upper) DataFrames indexed by period start
+    """
+    unit = time_unit.lower()
+    key = (get_data_version(df), _series_key(series, unit, fill_value))
+    model = _model_cache.get_or_build(key, lambda: HoltWinters.fit(series, unit, fill_value))
+    forecast, lower, upper = model.forecast(horizon, confidence)
+    if non_negative:
+        forecast, lower, upper = forecast.clip(lower=0), lower.clip(lower=0), upper.clip(lower=0)
+    return forecast, lower, upper
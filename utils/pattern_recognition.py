@@ -6,72 +6,137 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics.pairwise import cosine_similarity
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.similarity import get_neighbor_index
+from utils.clustering import get_cluster_result
+from utils.anomaly import get_anomaly_scores
+from utils.association_rules import get_association_rules
 
-def identify_patterns(df, n_clusters=5):
+# Cases plotted per cluster visualization
+CLUSTER_PLOT_SAMPLE_SIZE = 5000
+
+# Cases plotted per anomaly visualization (flagged cases first)
+ANOMALY_PLOT_SAMPLE_SIZE = 5000
+
+# Rules drawn in the association rules network
+RULE_PLOT_LIMIT = 30
+
+def identify_patterns(df, n_clusters=5, features=None):
     """
     Identify patterns in fraud data using clustering
     
+    Clusters are found with MiniBatchKMeans over the encoded features (see
+    utils.clustering) and cached per data version, k and feature set.
+    
     Parameters:
     -----------
     df : pandas DataFrame
         The fraud data
     n_clusters : int
         Number of clusters to identify
+    features : list of str, optional
+        Columns to cluster on (see utils.clustering.CLUSTER_FEATURES);
+        defaults to fraud type, amount and risk level
         
     Returns:
     --------
-    DataFrame with cluster assignments
+    DataFrame with cluster assignments (0 is the largest cluster)
     """
-    # This function would perform actual pattern recognition on real data
-    # For now, return an empty DataFrame with appropriate structure
     if df.empty:
         return pd.DataFrame(columns=['case_id', 'cluster'])
     
-    return pd.DataFrame()
+    result = get_cluster_result(df, n_clusters, features)
+    return pd.DataFrame({'case_id': df['case_id'].to_numpy(), 'cluster': result.labels}, index=df.index)
+
+def cluster_profiles(df, n_clusters=5, features=None):
+    """
+    Profile of each cluster found by identify_patterns()
+    
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The fraud data
+    n_clusters : int
+        Number of clusters to identify
+    features : list of str, optional
+        Columns to cluster on, as for identify_patterns()
+        
+    Returns:
+    --------
+    DataFrame with cluster, size, share, mean_amount, top_fraud_types
+    (list, most common first), top_fraud_type_counts and
+    dominant_risk_level, largest cluster first
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['cluster', 'size', 'share', 'mean_amount', 'top_fraud_types',
+                                     'top_fraud_type_counts', 'dominant_risk_level'])
+    
+    return get_cluster_result(df, n_clusters, features).profiles
 
-def calculate_case_similarity(df, case_id):
+def calculate_case_similarity(df, case_id, min_similarity=0.0):
     """
     Calculate similarity between a case and all other cases
     
+    Uses the nearest-neighbour index over fraud type, region, detection
+    method, risk level, log amount and detection date (see
+    utils.similarity.NeighborIndex), built once per dataset version.
+    
     Parameters:
     -----------
     df : pandas DataFrame
         The fraud data
     case_id : str
         ID of the case to compare
+    min_similarity : float
+        Only return cases scoring at least this (0 to 1)
         
     Returns:
     --------
-    DataFrame with similarity scores
+    DataFrame with similarity scores, most similar first
     """
-    # This function would calculate actual similarities on real data
-    # For now, return an empty DataFrame with appropriate structure
+    columns = ['case_id', 'similarity_score']
     if df.empty:
-        return pd.DataFrame(columns=['case_id', 'similarity_score'])
+        return pd.DataFrame(columns=columns)
+    
+    index = get_neighbor_index(df)
+    position = index.positions([case_id])[0]
+    if position < 0:
+        return pd.DataFrame(columns=columns)
     
-    return pd.DataFrame()
+    rows, scores = index.query(position, min_similarity=min_similarity)
+    return pd.DataFrame({'case_id': index.case_ids[rows], 'similarity_score': scores.astype(np.float64)})
 
-def detect_anomalies(df, contamination=0.05):
+def detect_anomalies(df, contamination=0.05, method='Isolation Forest', n_jobs=-1):
     """
     Detect anomalous fraud cases
     
+    The model is trained on a sample of the cases, scores every case and is
+    cached per data version and method (in memory and on disk), so changing
+    only the contamination re-thresholds the existing scores.
+    
     Parameters:
     -----------
     df : pandas DataFrame
         The fraud data
     contamination : float
         Expected proportion of outliers in the data
+    method : str
+        'Isolation Forest', 'One-Class SVM' or 'Local Outlier Factor'
+    n_jobs : int
+        Worker processes for training and scoring (-1 for all cores)
         
     Returns:
     --------
-    DataFrame with anomaly scores
+    DataFrame with anomaly scores (higher is more anomalous), one row per case
     """
-    # This function would perform actual anomaly detection on real data
-    # For now, return an empty DataFrame with appropriate structure
     if df.empty:
         return pd.DataFrame(columns=['case_id', 'is_anomaly', 'anomaly_score'])
     
-    return pd.DataFrame()
+    result = get_anomaly_scores(df, method, n_jobs=n_jobs)
+    return pd.DataFrame({
+        'case_id': df['case_id'].to_numpy(),
+        'is_anomaly': result.flags(contamination),
+        'anomaly_score': result.scores.astype(np.float64)
+    }, index=df.index)
 
 def visualize_clusters(df, clusters):
     """
@@ -88,29 +153,213 @@ def visualize_clusters(df, clusters):
     --------
     Plotly figure
     """
-    # Create empty figure
-    fig = go.Figure()
+    if df.empty or clusters is None or len(clusters) == 0:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Fraud Patterns Clusters",
+            template="plotly_dark",
+            height=600,
+            margin=dict(l=40, r=40, t=40, b=40)
+        )
+        fig.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Visualization will appear when data is loaded",
+            showarrow=False,
+            font=dict(size=14)
+        )
+        return fig
+    
+    # Plot a fixed random sample: a scatter of every case would not render
+    plot_df = pd.DataFrame({
+        'case_id': df['case_id'].to_numpy(),
+        'detection_date': pd.to_datetime(df['detection_date']).to_numpy(),
+        'reported_amount': df['reported_amount'].to_numpy(),
+        'fraud_type': df['fraud_type'].astype(object).to_numpy(),
+        'cluster': np.asarray(clusters) + 1,
+    })
+    if len(plot_df) > CLUSTER_PLOT_SAMPLE_SIZE:
+        plot_df = plot_df.sample(CLUSTER_PLOT_SAMPLE_SIZE, random_state=0)
+    plot_df['cluster'] = 'Cluster ' + plot_df['cluster'].astype(str)
     
-    # Set layout
+    fig = px.scatter(
+        plot_df.sort_values('cluster'),
+        x='detection_date',
+        y='reported_amount',
+        color='cluster',
+        hover_data=['case_id', 'fraud_type'],
+        log_y=True,
+        opacity=0.7
+    )
     fig.update_layout(
         title="Fraud Patterns Clusters",
         template="plotly_dark",
         height=600,
-        margin=dict(l=40, r=40, t=40, b=40)
+        margin=dict(l=40, r=40, t=40, b=40),
+        xaxis_title="Detection Date",
+        yaxis_title="Reported Amount ($)"
     )
     
-    # Add annotation
-    fig.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Visualization will appear when data is loaded",
-        showarrow=False,
-        font=dict(size=14)
+    return fig
+
+def visualize_anomalies(df, anomalies):
+    """
+    Create a visualization of the detected anomalies
+    
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The fraud data
+    anomalies : pandas DataFrame
+        Output of detect_anomalies for df
+        
+    Returns:
+    --------
+    Plotly figure
+    """
+    if df.empty or anomalies is None or anomalies.empty:
+        fig = go.Figure()
+        fig.update_layout(
+            title="Anomaly Detection Results",
+            template="plotly_dark",
+            height=500,
+            margin=dict(l=40, r=40, t=40, b=40)
+        )
+        fig.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Visualization will appear when data is loaded",
+            showarrow=False,
+            font=dict(size=14)
+        )
+        return fig
+    
+    # Plot the top-scoring anomalies and a fixed random sample of the rest
+    plot_df = pd.DataFrame({
+        'case_id': df['case_id'].to_numpy(),
+        'detection_date': pd.to_datetime(df['detection_date']).to_numpy(),
+        'reported_amount': df['reported_amount'].to_numpy(),
+        'fraud_type': df['fraud_type'].astype(object).to_numpy(),
+        'anomaly_score': anomalies['anomaly_score'].to_numpy(),
+        'is_anomaly': anomalies['is_anomaly'].to_numpy(),
+    })
+    flagged = plot_df[plot_df['is_anomaly']].nlargest(ANOMALY_PLOT_SAMPLE_SIZE // 2, 'anomaly_score')
+    normal = plot_df[~plot_df['is_anomaly']]
+    if len(normal) > ANOMALY_PLOT_SAMPLE_SIZE - len(flagged):
+        normal = normal.sample(ANOMALY_PLOT_SAMPLE_SIZE - len(flagged), random_state=0)
+    plot_df = pd.concat([normal, flagged])
+    plot_df['status'] = np.where(plot_df['is_anomaly'], 'Anomaly', 'Normal')
+    
+    fig = px.scatter(
+        plot_df,
+        x='detection_date',
+        y='reported_amount',
+        color='status',
+        color_discrete_map={'Normal': '#636EFA', 'Anomaly': '#EF553B'},
+        hover_data=['case_id', 'fraud_type', 'anomaly_score'],
+        log_y=True,
+        opacity=0.7
+    )
+    fig.update_layout(
+        title="Anomaly Detection Results",
+        template="plotly_dark",
+        height=500,
+        margin=dict(l=40, r=40, t=40, b=40),
+        xaxis_title="Detection Date",
+        yaxis_title="Reported Amount ($)"
+    )
+    
+    return fig
+
+def find_association_rules(df, min_support=0.1, min_confidence=0.5):
+    """
+    Find association rules between case attributes
+    
+    Frequent itemsets are mined once per data version and support (see
+    utils/association_rules.py); a new confidence only filters their rules.
+    
+    Parameters:
+    -----------
+    df : pandas DataFrame
+        The fraud data
+    min_support : float
+        Minimum share of cases a rule's items must occur in together
+    min_confidence : float
+        Minimum share of cases matching the antecedent that match the consequent
+        
+    Returns:
+    --------
+    DataFrame with antecedent, consequent, support, confidence and lift,
+    highest lift first
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['antecedent', 'consequent', 'support', 'confidence', 'lift'])
+    
+    return get_association_rules(df, min_support).filter(min_confidence)
+
+def visualize_rules(rules):
+    """
+    Create a network visualization of association rules
+    
+    Parameters:
+    -----------
+    rules : pandas DataFrame
+        Output of find_association_rules
+        
+    Returns:
+    --------
+    Plotly figure
+    """
+    fig = go.Figure()
+    fig.update_layout(
+        title="Association Rules Network",
+        template="plotly_dark",
+        height=500,
+        margin=dict(l=40, r=40, t=40, b=40),
+        showlegend=False,
+        xaxis=dict(visible=False),
+        yaxis=dict(visible=False)
     )
+    if rules is None or rules.empty:
+        fig.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Visualization will appear when rules are found",
+            showarrow=False,
+            font=dict(size=14)
+        )
+        return fig
+    
+    # Items on a circle, one edge per antecedent item and consequent item of the top rules
+    top_rules = rules.head(RULE_PLOT_LIMIT)
+    items = sorted({item for column in ['antecedent', 'consequent'] for row in top_rules[column] for item in row})
+    angles = 2 * np.pi * np.arange(len(items)) / max(len(items), 1)
+    positions = {item: (np.cos(angle), np.sin(angle)) for item, angle in zip(items, angles)}
+    
+    for rule in top_rules.itertuples():
+        for source in rule.antecedent:
+            for target in rule.consequent:
+                fig.add_annotation(
+                    x=positions[target][0], y=positions[target][1],
+                    ax=positions[source][0], ay=positions[source][1],
+                    xref="x", yref="y", axref="x", ayref="y",
+                    showarrow=True, arrowhead=2, arrowwidth=1 + min(rule.lift, 5) / 2,
+                    opacity=0.3 + 0.7 * rule.confidence, arrowcolor="#EF553B",
+                    text=""
+                )
+    fig.add_trace(go.Scatter(
+        x=[positions[item][0] for item in items],
+        y=[positions[item][1] for item in items],
+        mode='markers+text',
+        text=items,
+        textposition='top center',
+        marker=dict(size=14, color='#636EFA'),
+        hoverinfo='text'
+    ))
     
     return fig
 
-def find_similar_cases(df, case_id, n=5):
+def find_similar_cases(df, case_id, n=5, min_similarity=0.0):
     """
     Find cases most similar to a given case
     
@@ -122,14 +371,23 @@ def find_similar_cases(df, case_id, n=5):
         ID of the case to find similar cases for
     n : int
         Number of similar cases to return
+    min_similarity : float
+        Only return cases scoring at least this (0 to 1)
         
     Returns:
     --------
-    DataFrame with similar cases
+    DataFrame with similar cases: their rows of df plus a similarity_score
+    column, most similar first
     """
-    # This function would find actual similar cases in real data
-    # For now, return an empty DataFrame with appropriate structure
     if df.empty:
         return pd.DataFrame(columns=['case_id', 'similarity_score'])
     
-    return pd.DataFrame()
+    index = get_neighbor_index(df)
+    position = index.positions([case_id])[0]
+    if position < 0:
+        return pd.DataFrame(columns=list(df.columns) + ['similarity_score'])
+    
+    rows, scores = index.query(position, k=n, min_similarity=min_similarity)
+    similar = df.iloc[rows].reset_index(drop=True)
+    similar['similarity_score'] = scores.astype(np.float64)
+    return similar
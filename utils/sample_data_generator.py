@@ -1,116 +1,328 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+import itertools
+import string
 import logging
 from sqlalchemy import text
 from utils.db_connection import get_session, get_database_connection, FraudCase, init_database
+from utils.bulk_loader import bulk_load_fraud_cases
+from utils.categories import categorical_from_codes
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def generate_sample_fraud_data(num_records=100):
+# Possible values for the categorical fields
+FRAUD_TYPES = [
+    "Identity Theft", "Payment Fraud", "Account Takeover", 
+    "Synthetic Identity", "Wire Fraud", "Loan Fraud",
+    "Credit Card Fraud", "Check Fraud", "Money Laundering"
+]
+
+RISK_LEVELS = ["Low", "Medium", "High", "Critical"]
+RISK_WEIGHTS = [0.2, 0.4, 0.3, 0.1]  # weighted to have more medium/high cases
+
+STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+STATUS_WEIGHTS = [0.4, 0.3, 0.2, 0.1]  # weighted to have more open/in progress cases
+
+REGIONS = [
+    "North America", "Europe", "Asia Pacific", 
+    "Latin America", "Middle East", "Africa"
+]
+
+DETECTION_METHODS = [
+    "Automated System", "Manual Review", "Customer Report", 
+    "Fraud Pattern Detection", "Transaction Monitoring", 
+    "AI/ML Detection", "External Tip"
+]
+
+SUMMARY_TEMPLATES = [
+    "Suspicious {fraud_type} detected on {date} in {region}. Amount: ${amount}. Risk: {risk}.",
+    "Potential {fraud_type} identified through {method} in {region}. Amount involved: ${amount}.",
+    "{method} flagged possible {fraud_type} on {date}. Region: {region}. Amount: ${amount}.",
+    "Customer reported {fraud_type} incident in {region}. Transaction amount: ${amount}.",
+    "{fraud_type} alert triggered by {method}. Amount: ${amount}. Risk level: {risk}."
+]
+
+# Values substituted for the categorical summary placeholders
+SUMMARY_VALUES = {
+    'fraud_type': [value.lower() for value in FRAUD_TYPES],
+    'region': REGIONS,
+    'method': [value.lower() for value in DETECTION_METHODS],
+    'risk': [value.lower() for value in RISK_LEVELS],
+}
+
+_THREE_DIGITS = np.array([f"{i:03d}" for i in range(1000)], dtype=object)
+_PLAIN_DIGITS = np.array([str(i) for i in range(1000)], dtype=object)
+_CENTS = np.array([f".{i:02d}" for i in range(100)], dtype=object)
+
+def _format_case_ids(ids):
+    """
+    Format a contiguous range of ids as CASE-000001 strings without a per-row format() call.
+    """
+    thousands, rest = np.divmod(ids, 1000)
+    first = int(thousands[0]) if len(ids) else 0
+    prefixes = np.array(
+        [f"CASE-{i:03d}" for i in range(first, int(thousands.max(initial=first)) + 1)],
+        dtype=object
+    )
+    return prefixes[thousands - first] + _THREE_DIGITS[rest]
+
+def _format_amounts(amounts):
+    """
+    Format amounts like f"{amount:,.2f}" by gathering digit groups from lookup tables.
+    """
+    cents = np.rint(np.asarray(amounts) * 100).astype(np.int64)
+    dollars, cents = np.divmod(cents, 100)
+    thousands, rest = np.divmod(dollars, 1000)
+    prefixes = np.array(
+        [f"{i:,}," for i in range(int(thousands.max(initial=0)) + 1)],
+        dtype=object
+    )
+    formatted = np.where(thousands > 0, prefixes[thousands] + _THREE_DIGITS[rest], _PLAIN_DIGITS[rest])
+    return formatted + _CENTS[cents]
+
+def _template_segments(template):
+    """
+    Split a summary template into static segments (literal text and
+    categorical placeholders) and the per-row date/amount placeholders between them.
+    """
+    segments = []
+    static, fields = '', []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        static += literal
+        if field is None:
+            continue
+        if field in SUMMARY_VALUES:
+            static += '{' + field + '}'
+            fields.append(field)
+        else:
+            segments.append(('static', static, fields))
+            segments.append(('row', field, None))
+            static, fields = '', []
+    segments.append(('static', static, fields))
+    return segments
+
+def _render_summaries(template_codes, codes, row_text):
+    """
+    Fill SUMMARY_TEMPLATES for every row.
+
+    Each static segment is rendered once per combination of its categorical
+    codes and gathered by a mixed-radix index, so a row only costs a few
+    string concatenations with its date and amount text.
+    """
+    summaries = np.empty(len(template_codes), dtype=object)
+    for number, template in enumerate(SUMMARY_TEMPLATES):
+        rows = np.flatnonzero(template_codes == number)
+        if not len(rows):
+            continue
+        result = None
+        for kind, segment, fields in _template_segments(template):
+            if kind == 'row':
+                part = row_text[segment][rows]
+            else:
+                choices = [SUMMARY_VALUES[field] for field in fields]
+                rendered = np.array([
+                    segment.format(**dict(zip(fields, combination)))
+                    for combination in itertools.product(*choices)
+                ], dtype=object)
+                index = np.zeros(len(rows), dtype=np.int64)
+                for field, values in zip(fields, choices):
+                    index = index * len(values) + codes[field][rows]
+                part = rendered[index]
+            result = part if result is None else result + part
+        summaries[rows] = result
+    return summaries
+
+class SampleDataGenerator:
+    """
+    Seeded, vectorized generator of synthetic fraud cases.
+
+    Detection dates follow a daily intensity with a weekly cycle, a yearly
+    peak around the holiday season, a gentle upward trend and short bursts
+    (fraud campaigns) concentrated on one fraud type and region. The profile
+    is drawn once per generator, so successive chunks share the same trends
+    and carry consecutive case IDs.
+
+    With a fixed seed and end_date, the same sequence of generate() calls
+    returns identical data.
+    """
+
+    def __init__(self, seed=None, end_date=None, days=730, bursts_per_year=6):
+        self.rng = np.random.default_rng(seed)
+        self.days = days
+        end_day = pd.Timestamp(end_date or datetime.now()).normalize()
+        self.start_day = end_day - pd.Timedelta(days=days - 1)
+        self.next_id = 1
+        self._build_profile(bursts_per_year)
+
+    def _build_profile(self, bursts_per_year):
+        """
+        Draw the daily case intensity and the burst calendar.
+        """
+        rng = self.rng
+        dates = pd.date_range(self.start_day, periods=self.days, freq='D')
+        self.date_text = np.asarray(dates.strftime('%Y-%m-%d'), dtype=object)
+
+        weekly = np.where(dates.dayofweek >= 5, 0.6, 1.0)  # fewer detections at weekends
+        yearly = 1 + 0.25 * np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - 340) / 365.25)
+        trend = np.linspace(0.8, 1.2, self.days)
+        intensity = weekly * yearly * trend
+
+        num_bursts = rng.poisson(bursts_per_year * self.days / 365)
+        starts = rng.integers(0, self.days, num_bursts)
+        lengths = rng.integers(2, 8, num_bursts)
+        strengths = rng.uniform(2, 6, num_bursts)
+        self.burst_fraud_type = rng.integers(0, len(FRAUD_TYPES), num_bursts)
+        self.burst_region = rng.integers(0, len(REGIONS), num_bursts)
+
+        # Share of a burst day's cases that belong to its campaign
+        self.burst_of_day = np.full(self.days, -1)
+        self.burst_share = np.zeros(self.days)
+        for burst, (start, length, strength) in enumerate(zip(starts, lengths, strengths)):
+            days = slice(start, start + length)
+            intensity[days] *= 1 + strength
+            self.burst_of_day[days] = burst
+            self.burst_share[days] = strength / (1 + strength)
+
+        self.day_weights = intensity / intensity.sum()
+
+    def generate(self, num_records):
+        """
+        Generate the next num_records cases.
+
+        Returns:
+        --------
+        pandas.DataFrame
+            Cases with the fraud_cases columns (without id), category
+            columns encoded with the shared dictionary
+        """
+        rng = self.rng
+        ids = np.arange(self.next_id, self.next_id + num_records)
+        self.next_id += num_records
+
+        day = rng.choice(self.days, size=num_records, p=self.day_weights)
+        seconds = rng.integers(0, 86400, num_records)
+
+        codes = {
+            'fraud_type': rng.integers(0, len(FRAUD_TYPES), num_records),
+            'region': rng.integers(0, len(REGIONS), num_records),
+            'method': rng.integers(0, len(DETECTION_METHODS), num_records),
+            'risk': rng.choice(len(RISK_LEVELS), size=num_records, p=RISK_WEIGHTS),
+        }
+        status = rng.choice(len(STATUSES), size=num_records, p=STATUS_WEIGHTS)
+
+        # Cases on burst days mostly belong to that day's campaign
+        campaign = rng.random(num_records) < self.burst_share[day]
+        burst = self.burst_of_day[day[campaign]]
+        codes['fraud_type'][campaign] = self.burst_fraud_type[burst]
+        codes['region'][campaign] = self.burst_region[burst]
+
+        # Log-normal amounts for realistic fraud amounts around 10,000
+        amounts = rng.lognormal(mean=np.log(10000), sigma=1.2, size=num_records).round(2)
+
+        summaries = _render_summaries(
+            rng.integers(0, len(SUMMARY_TEMPLATES), num_records),
+            codes,
+            {'date': self.date_text[day], 'amount': _format_amounts(amounts)}
+        )
+
+        return pd.DataFrame({
+            'case_id': _format_case_ids(ids),
+            'detection_date': self.start_day + pd.to_timedelta(day * 86400 + seconds, unit='s'),
+            'fraud_type': categorical_from_codes('fraud_type', codes['fraud_type'], FRAUD_TYPES),
+            'reported_amount': amounts,
+            'risk_level': categorical_from_codes('risk_level', codes['risk'], RISK_LEVELS),
+            'status': categorical_from_codes('status', status, STATUSES),
+            'region': categorical_from_codes('region', codes['region'], REGIONS),
+            'detection_method': categorical_from_codes('detection_method', codes['method'], DETECTION_METHODS),
+            'case_summary': summaries,
+        })
+
+    def iter_chunks(self, num_records, chunk_size=100000):
+        """
+        Yield num_records cases as DataFrames of at most chunk_size rows.
+        """
+        for start in range(0, num_records, chunk_size):
+            yield self.generate(min(chunk_size, num_records - start))
+
+def generate_sample_fraud_data(num_records=100, seed=None, end_date=None):
     """
     Generate sample fraud data for testing and development.
     In a production environment, this would be replaced by real data from various sources.
+
+    Parameters:
+    -----------
+    num_records : int
+        Number of cases to generate
+    seed : int, optional
+        Random seed for reproducible data
+    end_date : datetime, optional
+        Last day of the two-year detection window; defaults to today
     """
-    # Define lists of possible values for categorical fields
-    fraud_types = [
-        "Identity Theft", "Payment Fraud", "Account Takeover", 
-        "Synthetic Identity", "Wire Fraud", "Loan Fraud",
-        "Credit Card Fraud", "Check Fraud", "Money Laundering"
-    ]
-    
-    risk_levels = ["Low", "Medium", "High", "Critical"]
-    
-    statuses = ["Open", "In Progress", "Resolved", "Closed"]
-    
-    regions = [
-        "North America", "Europe", "Asia Pacific", 
-        "Latin America", "Middle East", "Africa"
-    ]
-    
-    detection_methods = [
-        "Automated System", "Manual Review", "Customer Report", 
-        "Fraud Pattern Detection", "Transaction Monitoring", 
-        "AI/ML Detection", "External Tip"
-    ]
-    
-    # Generate random dates within the last 2 years
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=730)  # Approximately 2 years
-    
-    # Create empty DataFrame to store the data
-    df = pd.DataFrame()
-    
-    # Generate case IDs
-    df['case_id'] = [f"CASE-{i:06d}" for i in range(1, num_records + 1)]
-    
-    # Generate detection dates
-    df['detection_date'] = [
-        start_date + (end_date - start_date) * random.random()
-        for _ in range(num_records)
-    ]
-    
-    # Generate fraud types
-    df['fraud_type'] = [random.choice(fraud_types) for _ in range(num_records)]
-    
-    # Generate reported amounts (using a log-normal distribution for realistic fraud amounts)
-    mean_amount = 10000  # Mean fraud amount in currency units
-    df['reported_amount'] = np.random.lognormal(
-        mean=np.log(mean_amount), 
-        sigma=1.2, 
-        size=num_records
-    ).round(2)
-    
-    # Generate risk levels (weighted to have more medium/high cases)
-    risk_weights = [0.2, 0.4, 0.3, 0.1]  # Low, Medium, High, Critical
-    df['risk_level'] = [
-        np.random.choice(risk_levels, p=risk_weights)
-        for _ in range(num_records)
-    ]
-    
-    # Generate statuses (weighted to have more open/in progress cases)
-    status_weights = [0.4, 0.3, 0.2, 0.1]  # Open, In Progress, Resolved, Closed
-    df['status'] = [
-        np.random.choice(statuses, p=status_weights)
-        for _ in range(num_records)
-    ]
-    
-    # Generate regions
-    df['region'] = [random.choice(regions) for _ in range(num_records)]
-    
-    # Generate detection methods
-    df['detection_method'] = [random.choice(detection_methods) for _ in range(num_records)]
-    
-    # Generate case summaries
-    summary_templates = [
-        "Suspicious {fraud_type} detected on {date} in {region}. Amount: ${amount}. Risk: {risk}.",
-        "Potential {fraud_type} identified through {method} in {region}. Amount involved: ${amount}.",
-        "{method} flagged possible {fraud_type} on {date}. Region: {region}. Amount: ${amount}.",
-        "Customer reported {fraud_type} incident in {region}. Transaction amount: ${amount}.",
-        "{fraud_type} alert triggered by {method}. Amount: ${amount}. Risk level: {risk}."
-    ]
-    
-    df['case_summary'] = [
-        random.choice(summary_templates).format(
-            fraud_type=row['fraud_type'].lower(),
-            date=row['detection_date'].strftime('%Y-%m-%d'),
-            region=row['region'],
-            amount=f"{row['reported_amount']:,.2f}",
-            method=row['detection_method'].lower(),
-            risk=row['risk_level'].lower()
-        )
-        for _, row in df.iterrows()
-    ]
-    
-    return df
+    return SampleDataGenerator(seed=seed, end_date=end_date).generate(num_records)
+
+def iter_sample_fraud_data(num_records, chunk_size=100000, seed=None, end_date=None):
+    """
+    Yield num_records sample cases in chunks of at most chunk_size rows,
+    so datasets larger than memory can be written or loaded incrementally.
+    """
+    return SampleDataGenerator(seed=seed, end_date=end_date).iter_chunks(num_records, chunk_size)
+
+def write_sample_data(path, num_records, chunk_size=100000, seed=None, end_date=None):
+    """
+    Stream sample cases to a Parquet (.parquet) or CSV (.csv) file chunk by chunk.
+
+    Returns:
+    --------
+    int
+        Number of rows written
+    """
+    chunks = iter_sample_fraud_data(num_records, chunk_size, seed=seed, end_date=end_date)
+    written = 0
 
-def load_sample_data_to_database(num_records=100):
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif path.endswith('.csv'):
+        for number, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+            written += len(chunk)
+    else:
+        raise ValueError(f"Unsupported output format for {path}; use .parquet or .csv")
+
+    logger.info(f"Wrote {written} sample fraud cases to {path}")
+    return written
+
+def load_sample_data_to_database(num_records=100, batch_size=10000, seed=None):
     """
     Generate sample data and load it into the database.
     
+    Parameters:
+    -----------
+    num_records : int
+        Number of sample cases to generate
+    batch_size : int
+        Rows per bulk insert batch
+    seed : int, optional
+        Random seed for reproducible data
+    
     Returns:
     --------
     bool
@@ -122,9 +334,6 @@ def load_sample_data_to_database(num_records=100):
             logger.error("Failed to initialize database")
             return False
         
-        # Generate sample data
-        df = generate_sample_fraud_data(num_records)
-        
         # Get database session
         session = get_session()
         if not session:
@@ -139,28 +348,15 @@ def load_sample_data_to_database(num_records=100):
             session.close()
             return True
         
-        # Convert DataFrame to list of FraudCase objects
-        fraud_cases = []
-        for _, row in df.iterrows():
-            fraud_case = FraudCase(
-                case_id=row['case_id'],
-                detection_date=row['detection_date'].date(),
-                fraud_type=row['fraud_type'],
-                reported_amount=float(row['reported_amount']),
-                risk_level=row['risk_level'],
-                status=row['status'],
-                region=row['region'],
-                detection_method=row['detection_method'],
-                case_summary=row['case_summary']
-            )
-            fraud_cases.append(fraud_case)
+        session.close()
         
-        # Add all fraud cases to the database
-        session.add_all(fraud_cases)
-        session.commit()
+        # Generate sample data chunk by chunk so large loads stay within memory
+        chunks = iter_sample_fraud_data(num_records, chunk_size=max(batch_size, 100000), seed=seed)
         
-        logger.info(f"Successfully loaded {len(fraud_cases)} sample fraud cases into the database")
-        session.close()
+        # Insert in batches (COPY on PostgreSQL) instead of one ORM object per row
+        loaded = bulk_load_fraud_cases(chunks, batch_size=batch_size)
+        
+        logger.info(f"Successfully loaded {loaded} sample fraud cases into the database")
         return True
         
     except Exception as e:
@@ -168,5 +364,18 @@ def load_sample_data_to_database(num_records=100):
         return False
 
 if __name__ == "__main__":
-    # When run directly, generate and load sample data
-    load_sample_data_to_database(100)
\ No newline at end of file
+    # When run directly, generate sample data into the database or a file, e.g.
+    #   python -m utils.sample_data_generator --rows 10000000 --output cases.parquet --seed 42
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic fraud cases")
+    parser.add_argument('--rows', type=int, default=100, help="Number of cases to generate")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible data")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="Rows generated per chunk")
+    parser.add_argument('--output', help="Parquet or CSV file to write instead of loading the database")
+    args = parser.parse_args()
+
+    if args.output:
+        write_sample_data(args.output, args.rows, chunk_size=args.chunk_size, seed=args.seed)
+    else:
+        load_sample_data_to_database(args.rows, seed=args.seed)
\ No newline at end of file
@@ -0,0 +1,377 @@
+import re
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+import logging
+from utils.data_version import get_data_version, peek_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Columns indexed for free-text search; tags and analyst_notes come from custom data
+SEARCH_COLUMNS = [
+    'case_id', 'fraud_type', 'region', 'detection_method',
+    'case_summary', 'tags', 'analyst_notes'
+]
+
+# Words, keeping hyphen/underscore compounds such as case IDs together
+TOKEN_PATTERN = re.compile(r'[0-9a-z]+(?:[-_][0-9a-z]+)*')
+
+# Indexes for the most recent dataset versions
+_index_cache = VersionedCache(max_entries=4)
+
+# Changed rows beyond this share of the dataset trigger a full index rebuild
+DELTA_REBUILD_RATIO = 0.1
+
+def tokenize_query(text):
+    """
+    Split a search string into lowercase tokens, keeping compounds like "case-0012" whole.
+    """
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+def _tokenize_values(values):
+    """
+    Tokenize an array of distinct field values.
+
+    Returns a Series of tokens indexed by the position of the value they came
+    from. Compounds such as "case-000123" are indexed whole and as their
+    parts, so "000123" also finds the case.
+    """
+    tokens = pd.Series(np.asarray(values, dtype=object)).astype(str).str.lower()
+    tokens = tokens.str.findall(TOKEN_PATTERN).explode().dropna()
+    compounds = tokens[tokens.str.contains('[-_]', regex=True)]
+    if not compounds.empty:
+        parts = compounds.str.split('[-_]', regex=True).explode()
+        tokens = pd.concat([tokens, parts])
+    return tokens.astype(object)
+
+def intersect_sorted(a, b):
+    """
+    Intersect two sorted, duplicate-free row-id arrays by binary-searching the
+    smaller one into the larger one.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    positions = np.searchsorted(b, a)
+    positions[positions == len(b)] = len(b) - 1
+    return a[b[positions] == a]
+
+def union_sorted(a, b):
+    """
+    Merge two sorted, duplicate-free row-id arrays.
+    """
+    if len(a) == 0:
+        return b
+    if len(b) == 0:
+        return a
+    return np.union1d(a, b)
+
+def _trigram_codes(chars):
+    """
+    Encode every 3-character window of a code-point matrix as one int64.
+    Windows that run into the zero padding are returned as -1.
+    """
+    first, second, third = chars[:, :-2], chars[:, 1:-1], chars[:, 2:]
+    codes = (first.astype(np.int64) << 42) | (second.astype(np.int64) << 21) | third.astype(np.int64)
+    codes[third == 0] = -1
+    return codes
+
+class TrigramIndex:
+    """
+    Trigram index over the search vocabulary for substring matching.
+
+    Maps each trigram to the sorted ids of vocabulary tokens containing it.
+    A substring query intersects the posting lists of its trigrams and then
+    verifies the few candidate tokens, instead of scanning every token.
+    """
+
+    # Tokens longer than this are kept aside and always verified directly
+    MAX_TOKEN_LENGTH = 32
+
+    def __init__(self, vocabulary, trigrams, offsets, token_ids, long_tokens):
+        self.vocabulary = vocabulary
+        self.trigrams = trigrams
+        self.offsets = offsets
+        self.token_ids = token_ids
+        self.long_tokens = long_tokens
+
+    @classmethod
+    def build(cls, vocabulary):
+        """
+        Build the trigram index for a sorted vocabulary list.
+        """
+        words = np.asarray(vocabulary, dtype=f'U{cls.MAX_TOKEN_LENGTH}') if vocabulary else np.empty(0, dtype='U3')
+        lengths = np.fromiter((len(token) for token in vocabulary), dtype=np.int64, count=len(vocabulary))
+        long_tokens = np.flatnonzero(lengths > cls.MAX_TOKEN_LENGTH)
+
+        width = max(words.dtype.itemsize // 4, 3)
+        chars = np.zeros((len(words), width), dtype=np.uint32)
+        if len(words):
+            chars[:, :words.dtype.itemsize // 4] = words.view(np.uint32).reshape(len(words), -1)
+        codes = _trigram_codes(chars)
+
+        rows, _ = np.nonzero(codes >= 0)
+        keys = codes[codes >= 0]
+        order = np.lexsort((rows, keys))
+        keys, rows = keys[order], rows[order]
+        # The same trigram can repeat inside a token; keep each (trigram, token) once
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys, rows = keys[keep], rows[keep]
+
+        trigrams, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        return cls(np.asarray(vocabulary, dtype=object), trigrams, offsets, rows.astype(np.int32), long_tokens)
+
+    def _postings(self, code):
+        position = np.searchsorted(self.trigrams, code)
+        if position == len(self.trigrams) or self.trigrams[position] != code:
+            return np.empty(0, dtype=np.int32)
+        return self.token_ids[self.offsets[position]:self.offsets[position + 1]]
+
+    def find_tokens(self, substring):
+        """
+        Sorted vocabulary ids of tokens containing substring (at least 3 characters).
+        """
+        chars = np.zeros((1, len(substring)), dtype=np.uint32)
+        chars[0] = np.frombuffer(substring.encode('utf-32-le'), dtype=np.uint32)
+        codes = np.unique(_trigram_codes(chars)[0])
+
+        lists = sorted((self._postings(code) for code in codes), key=len)
+        candidates = lists[0]
+        for token_ids in lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = intersect_sorted(candidates, token_ids)
+
+        if len(substring) > 3 and len(candidates):
+            # Every trigram matched, but not necessarily contiguously: verify
+            words = self.vocabulary[candidates].astype(str)
+            candidates = candidates[np.char.find(words, substring) >= 0]
+        if len(self.long_tokens):
+            long_matches = [t for t in self.long_tokens if substring in self.vocabulary[t]]
+            if long_matches:
+                candidates = np.union1d(candidates, np.asarray(long_matches, dtype=np.int32))
+        return candidates
+
+class InvertedIndex:
+    """
+    Token-level inverted index over a fraud DataFrame.
+
+    The vocabulary is kept sorted and each token's posting list (row positions
+    into the indexed DataFrame) is a sorted int32 slice of one flat array, so
+    a prefix lookup is a single contiguous slice.
+    """
+
+    def __init__(self, vocabulary, offsets, postings, num_rows):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.num_rows = num_rows
+        self.trigrams = TrigramIndex.build(vocabulary)
+
+    @classmethod
+    def build(cls, df, columns=None):
+        """
+        Build the index for the given columns (default SEARCH_COLUMNS present in df).
+        """
+        columns = [c for c in (columns or SEARCH_COLUMNS) if c in df.columns]
+        num_rows = len(df)
+
+        # Tokenize each distinct value once; token Series are indexed by value code
+        column_codes = []
+        column_tokens = []
+        for column in columns:
+            codes, uniques = pd.factorize(df[column])
+            column_codes.append(codes)
+            column_tokens.append(_tokenize_values(uniques))
+
+        all_tokens = pd.concat(column_tokens) if column_tokens else pd.Series([], dtype=object)
+        # sort=True numbers tokens in vocabulary order, so a prefix is a contiguous id range
+        token_ids, vocabulary = pd.factorize(all_tokens, sort=True)
+        vocabulary = [str(token) for token in vocabulary]
+
+        pair_tokens = []
+        pair_rows = []
+        position = 0
+        for codes, tokens in zip(column_codes, column_tokens):
+            ids = token_ids[position:position + len(tokens)]
+            value_codes = tokens.index.to_numpy()
+            position += len(tokens)
+
+            # Expand (value code -> token ids) to (row -> token ids)
+            order = np.argsort(value_codes, kind='stable')
+            flat_tokens = ids[order]
+            counts = np.bincount(value_codes, minlength=codes.max() + 1 if len(codes) else 0)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+            rows = np.flatnonzero(codes >= 0)
+            row_codes = codes[rows]
+            per_row = counts[row_codes]
+            total = int(per_row.sum())
+            if total == 0:
+                continue
+            within = np.arange(total) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+            pair_tokens.append(flat_tokens[np.repeat(starts[row_codes], per_row) + within])
+            pair_rows.append(np.repeat(rows, per_row))
+
+        if pair_tokens:
+            width = max(num_rows, 1)
+            keys = np.concatenate(pair_tokens).astype(np.int64) * width + np.concatenate(pair_rows)
+            keys.sort()
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            tokens = keys // width
+            postings = (keys % width).astype(np.int32)
+        else:
+            tokens = np.empty(0, dtype=np.int64)
+            postings = np.empty(0, dtype=np.int32)
+        offsets = np.searchsorted(tokens, np.arange(len(vocabulary) + 1)).astype(np.int64)
+
+        logger.info(f"Built search index: {len(vocabulary)} tokens, {len(postings)} postings, {num_rows} rows")
+        return cls(vocabulary, offsets, postings, num_rows)
+
+    def token_range(self, prefix):
+        """
+        Vocabulary positions [start, stop) of tokens starting with prefix.
+        """
+        start = bisect_left(self.vocabulary, prefix)
+        stop = bisect_left(self.vocabulary, prefix + '\U0010ffff', lo=start)
+        return start, stop
+
+    def _rows_for_tokens(self, starts, stops):
+        """
+        Sorted, unique row positions for the vocabulary slices [starts[i], stops[i]).
+        """
+        slices = [self.postings[self.offsets[a]:self.offsets[b]] for a, b in zip(starts, stops)]
+        if not slices:
+            return np.empty(0, dtype=np.int32)
+        if len(slices) == 1 and stops[0] - starts[0] == 1:
+            # A single token's posting list is already sorted and unique
+            return slices[0]
+        rows = np.concatenate(slices)
+        if len(rows) * 16 > self.num_rows:
+            # Dense union: marking a bitmap beats sorting the concatenated postings
+            mask = np.zeros(self.num_rows, dtype=bool)
+            mask[rows] = True
+            return np.flatnonzero(mask).astype(np.int32)
+        return np.unique(rows)
+
+    def lookup_prefix(self, prefix):
+        """
+        Sorted row positions containing a token that starts with prefix.
+        """
+        start, stop = self.token_range(prefix)
+        if start == stop:
+            return np.empty(0, dtype=np.int32)
+        return self._rows_for_tokens([start], [stop])
+
+    def lookup_substring(self, substring):
+        """
+        Sorted row positions containing a token that contains substring
+        (at least 3 characters), found through the trigram index.
+        """
+        token_ids = self.trigrams.find_tokens(substring)
+        return self._rows_for_tokens(token_ids, token_ids + 1)
+
+    def lookup(self, token):
+        """
+        Row positions matching a query token: substring match for tokens of
+        three or more characters, prefix match for shorter ones.
+        """
+        if len(token) >= 3:
+            return self.lookup_substring(token)
+        return self.lookup_prefix(token)
+
+    def search(self, query, operator='and'):
+        """
+        Row positions of cases matching a free-text query.
+
+        Each query token is matched as a substring (or, below three characters,
+        a prefix) of indexed tokens; results for the tokens are combined with
+        AND (intersection) or OR (union).
+
+        Returns:
+        --------
+        numpy.ndarray
+            Sorted row positions into the indexed DataFrame
+        """
+        tokens = tokenize_query(query)
+        if not tokens:
+            return np.arange(self.num_rows)
+
+        # Intersect the rarest postings first so the working set shrinks fastest
+        matches = sorted((self.lookup(token) for token in tokens), key=len)
+        result = matches[0]
+        combine = intersect_sorted if operator == 'and' else union_sorted
+        for rows in matches[1:]:
+            if operator == 'and' and len(result) == 0:
+                break
+            result = combine(result, rows)
+        return result
+
+class DeltaIndex:
+    """
+    An InvertedIndex over a dataset plus a small index over rows that were
+    appended or replaced since, so an incremental refresh only tokenizes
+    the changed rows.
+
+    Base rows keep their positions; replaced base rows are masked out of
+    base results and found through the delta index instead.
+    """
+
+    def __init__(self, base, delta, changed_positions, num_rows):
+        self.base = base
+        self.delta = delta
+        self.changed_positions = changed_positions
+        self.stale = changed_positions[changed_positions < base.num_rows]
+        self.num_rows = num_rows
+
+    def search(self, query, operator='and'):
+        """
+        Row positions of cases matching a free-text query (see InvertedIndex.search).
+        """
+        base_rows = self.base.search(query, operator)
+        if len(self.stale):
+            base_rows = base_rows[~np.isin(base_rows, self.stale, assume_unique=True)]
+        delta_rows = self.changed_positions[self.delta.search(query, operator)]
+        return union_sorted(base_rows, delta_rows.astype(base_rows.dtype, copy=False))
+
+def update_search_index(old_df, new_df, changed_positions, columns=None):
+    """
+    Register an index for new_df built from old_df's cached index plus an
+    index over the changed rows only.
+
+    new_df must keep old_df's rows at the same positions, with changed rows
+    replaced in place or appended; changed_positions are their positions in
+    new_df. If old_df has no cached index, or the accumulated changes exceed
+    DELTA_REBUILD_RATIO of the rows, nothing is registered and the next
+    get_search_index() call rebuilds from scratch.
+    """
+    columns_key = tuple(columns or SEARCH_COLUMNS)
+    old_version = peek_data_version(old_df)
+    previous = _index_cache.get((old_version, columns_key)) if old_version else None
+    if previous is None:
+        return None
+
+    base = previous.base if isinstance(previous, DeltaIndex) else previous
+    changed = np.asarray(changed_positions, dtype=np.int64)
+    if isinstance(previous, DeltaIndex):
+        changed = np.union1d(previous.changed_positions, changed)
+    else:
+        changed = np.unique(changed)
+    if len(changed) > DELTA_REBUILD_RATIO * len(new_df):
+        return None
+
+    delta = InvertedIndex.build(new_df.iloc[changed], columns)
+    index = DeltaIndex(base, delta, changed, len(new_df))
+    return _index_cache.put((get_data_version(new_df), columns_key), index)
+
+def get_search_index(df, columns=None):
+    """
+    Return the inverted index for df, building it once per dataset version.
+    """
+    key = (get_data_version(df), tuple(columns or SEARCH_COLUMNS))
+    return _index_cache.get_or_build(key, lambda: InvertedIndex.build(df, columns))
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import logging
+from utils.data_version import get_data_version, VersionedCache
+from utils.forecasting import PERIOD_FREQUENCIES, complete_periods
+from utils.time_cube import get_time_cube
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seasonality of many time series at once. The series of a breakdown are
+# rows of one 2-D array: each row is detrended, its autocorrelation at
+# every lag comes from one batched FFT, and the highest autocorrelation
+# peak gives the dominant period and its strength. Seasonal profiles
+# average the detrended values per calendar phase (weekday, month, ...)
+# with one matrix product. Results are cached per rollup-cube key.
+
+# Calendar phase of each period per time unit, and the phase labels
+PHASES = {
+    'day': (lambda index: index.dayofweek, ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']),
+    'week': (lambda index: index.isocalendar().week.to_numpy() - 1, [f"W{week}" for week in range(1, 54)]),
+    'month': (lambda index: index.month - 1, ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']),
+    'quarter': (lambda index: index.quarter - 1, ['Q1', 'Q2', 'Q3', 'Q4']),
+}
+
+# Fewest complete periods worth testing (at least two cycles of a 4-period season)
+MIN_PERIODS = 8
+
+# Autocorrelation at the dominant period above which a series counts as
+# seasonal (and above the 95% white-noise bound 1.96 / sqrt(periods))
+SEASONAL_STRENGTH = 0.3
+
+# Seasonality for the most recent (data version, rollup) keys
+_seasonality_cache = VersionedCache(max_entries=16)
+
+def _detrend(values):
+    """
+    Rows of values minus their least-squares line.
+    """
+    steps = np.arange(values.shape[1]) - (values.shape[1] - 1) / 2
+    centered = values - values.mean(axis=1, keepdims=True)
+    slopes = centered @ steps / (steps @ steps)
+    return centered - slopes[:, np.newaxis] * steps
+
+def autocorrelation(values):
+    """
+    Autocorrelation of every row at lags 0 to periods - 1, from one FFT of
+    the zero-padded rows (rows without variance get zeros).
+    """
+    num_periods = values.shape[1]
+    spectrum = np.fft.rfft(values, n=2 * num_periods, axis=1)
+    covariance = np.fft.irfft(spectrum * spectrum.conj(), n=2 * num_periods, axis=1)[:, :num_periods]
+    variance = covariance[:, :1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(variance > 0, covariance / variance, 0.0)
+
+def dominant_periods(values):
+    """
+    Dominant period (lag with the highest autocorrelation peak, up to half
+    the series) and its autocorrelation per row of detrended values.
+    """
+    acf = autocorrelation(values)
+    num_periods = values.shape[1]
+    lags = np.arange(2, max(num_periods // 2, 2) + 1)
+    lags = lags[lags < num_periods - 1]
+    if len(lags) == 0:
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values))
+    # Local maxima only, so a slowly decaying autocorrelation is not a season
+    peaks = (acf[:, lags] > acf[:, lags - 1]) & (acf[:, lags] >= acf[:, lags + 1])
+    candidates = np.where(peaks, acf[:, lags], -np.inf)
+    best = np.argmax(candidates, axis=1)
+    strength = candidates[np.arange(len(values)), best]
+    found = np.isfinite(strength)
+    return np.where(found, lags[best], 0), np.where(found, strength, 0.0)
+
+class Seasonality:
+    """
+    Dominant period and strength of each series, and its average relative
+    deviation per calendar phase.
+    """
+
+    def __init__(self, summary, profiles):
+        self.summary = summary
+        self.profiles = profiles
+
+    @classmethod
+    def detect(cls, series, time_unit, fill_value=0):
+        """
+        Detect the seasonality of every column of series (indexed by period
+        start). Missing periods count as fill_value, or as the column's mean
+        when fill_value is None.
+        """
+        unit = time_unit.lower()
+        columns = series.columns
+        if unit not in PHASES or len(series) < MIN_PERIODS:
+            return cls(pd.DataFrame(columns=['period', 'strength', 'seasonal', 'peak', 'low']),
+                       pd.DataFrame(columns=columns))
+
+        periods = pd.period_range(series.index.min(), series.index.max(), freq=PERIOD_FREQUENCIES[unit])
+        series = series.set_axis(pd.DatetimeIndex(series.index).to_period(PERIOD_FREQUENCIES[unit]))
+        series = series.reindex(periods)
+        series = series.fillna(series.mean() if fill_value is None else fill_value).fillna(0)
+        values = series.to_numpy(dtype=np.float64).T
+        detrended = _detrend(values)
+        period, strength = dominant_periods(detrended)
+        threshold = max(SEASONAL_STRENGTH, 1.96 / np.sqrt(values.shape[1]))
+
+        # Mean detrended value per phase (one-hot phases x periods product), relative to the series mean
+        phase_of, labels = PHASES[unit]
+        phases = np.asarray(phase_of(periods.start_time))
+        one_hot = np.zeros((len(phases), len(labels)))
+        one_hot[np.arange(len(phases)), phases] = 1
+        counts = one_hot.sum(axis=0)
+        present = counts > 0
+        means = values.mean(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profiles = (detrended @ one_hot[:, present]) / counts[present] / np.abs(means)
+        profiles[~np.isfinite(profiles)] = np.nan
+        phase_labels = np.asarray(labels)[present]
+
+        ranked = np.where(np.isnan(profiles), -np.inf, profiles)
+        lowest = np.where(np.isnan(profiles), np.inf, profiles)
+        summary = pd.DataFrame({
+            'period': period,
+            'strength': strength,
+            'seasonal': strength >= threshold,
+            'peak': phase_labels[np.argmax(ranked, axis=1)],
+            'low': phase_labels[np.argmin(lowest, axis=1)],
+        }, index=columns)
+        return cls(summary, pd.DataFrame(profiles.T, index=phase_labels, columns=columns))
+
+    def ranked(self):
+        """
+        Summary rows ordered from most to least seasonal.
+        """
+        return self.summary.sort_values('strength', ascending=False, kind='stable')
+
+def get_seasonality(df, time_unit='month', by=None, measure='count', end_date=None):
+    """
+    Return the Seasonality of the measure per time_unit period (overall, or
+    one series per combination of the by columns), from the rollup cube
+    of df over the periods it fully covers. Cached per data version and
+    rollup.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+    time_unit : str
+        'day', 'week', 'month' or 'quarter'
+    by : list of str, optional
+        Columns to break the series down by
+    measure : str
+        Rollup measure, e.g. 'count' or 'amount_sum'
+    end_date : date-like, optional
+        Last detection date considered
+
+    Returns:
+    --------
+    Seasonality
+    """
+    unit = time_unit.lower()
+    by = list(by or [])
+    end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+    key = (get_data_version(df), unit, tuple(by), measure, end)
+
+    def build():
+        cube = get_time_cube(df)
+        if len(cube.days) == 0:
+            return Seasonality.detect(pd.DataFrame(), unit)
+        rollup = cube.rollup(unit, by=by, end_date=end)
+        series = rollup.pivot(index='time_period', columns=by, values=measure) if by else rollup.set_index('time_period')[[measure]]
+        last_day = cube.days.max() if end is None else min(cube.days.max(), end)
+        # Periods without cases have no average amount rather than a zero one
+        fill_value = None if measure == 'amount_mean' else 0
+        return Seasonality.detect(complete_periods(series, unit, cube.days.min(), last_day), unit, fill_value)
+
+    return _seasonality_cache.get_or_build(key, build)
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+import logging
+from utils.data_version import get_data_version
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One copy of the fraud dataset per process, shared read-only by every
+# Streamlit session and page. Sessions keep only their filters and
+# selections and call get_shared_data() on each run.
+
+# Seconds between background refreshes; set FRAUDLENS_REFRESH_INTERVAL=0 to disable
+DEFAULT_REFRESH_INTERVAL = 300
+
+_shared_dataset = None
+_shared_dataset_lock = threading.Lock()
+
+class SharedDataset:
+    """
+    Process-wide handle on the current version of a dataset.
+
+    The DataFrame is loaded once, on first use, and replaced as a whole
+    when refreshed: readers holding the previous version keep a consistent
+    frame, and no version is ever modified after it is published. Callers
+    must treat the frame as read-only and copy before adding columns.
+    """
+
+    def __init__(self, loader, refresher=None, refresh_interval=0):
+        self.loader = loader
+        self.refresher = refresher
+        self.refresh_interval = refresh_interval
+        self._data = None
+        self._version = 0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self):
+        """
+        Return the current DataFrame, loading it on first use.
+        """
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    self._publish(self.loader())
+                    self._start_background_refresh()
+                data = self._data
+        return data
+
+    @property
+    def version(self):
+        """
+        Number of versions published so far (0 before the first load).
+        """
+        return self._version
+
+    @property
+    def loaded_at(self):
+        """
+        time.time() at which the current version was published, or None.
+        """
+        return self._loaded_at
+
+    def refresh(self):
+        """
+        Bring the dataset up to date and publish the result if it changed.
+
+        Uses refresher(current) when given (e.g. an incremental refresh) and
+        reloads in full otherwise. Concurrent callers wait for one refresh.
+        """
+        with self._lock:
+            current = self._data
+            if current is None:
+                self._publish(self.loader())
+            elif self.refresher is not None:
+                updated = self.refresher(current)
+                if updated is not current:
+                    self._publish(updated)
+            else:
+                self._publish(self.loader())
+            return self._data
+
+    def close(self):
+        """
+        Stop the background refresh thread, if running.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _publish(self, data):
+        # Compute the data version once here rather than in the first session to ask
+        get_data_version(data)
+        self._data = data
+        self._version += 1
+        self._loaded_at = time.time()
+        logger.info(f"Published shared dataset version {self._version} ({len(data)} rows)")
+
+    def _start_background_refresh(self):
+        if self.refresh_interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name='shared-dataset-refresh', daemon=True)
+        self._thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Background refresh of shared dataset failed: {str(e)}")
+
+def _refresh_fraud_data(df):
+    from utils.data_processing import refresh_data
+
+    # Custom-file and generated data have no updated_at and never change
+    if 'updated_at' not in df.columns:
+        return df
+    return refresh_data(df)
+
+def get_shared_dataset():
+    """
+    Return the process-wide SharedDataset of fraud cases.
+
+    It loads with load_data() and refreshes incrementally from the database
+    every FRAUDLENS_REFRESH_INTERVAL seconds (default DEFAULT_REFRESH_INTERVAL).
+    """
+    global _shared_dataset
+    if _shared_dataset is not None:
+        return _shared_dataset
+
+    with _shared_dataset_lock:
+        if _shared_dataset is None:
+            from utils.data_processing import load_data
+
+            interval = os.environ.get('FRAUDLENS_REFRESH_INTERVAL', '')
+            try:
+                refresh_interval = int(interval) if interval else DEFAULT_REFRESH_INTERVAL
+            except ValueError:
+                logger.warning(f"Ignoring invalid FRAUDLENS_REFRESH_INTERVAL={interval!r}")
+                refresh_interval = DEFAULT_REFRESH_INTERVAL
+            _shared_dataset = SharedDataset(load_data, _refresh_fraud_data, refresh_interval)
+    return _shared_dataset
+
+def get_shared_data():
+    """
+    Return the current shared fraud DataFrame (read-only).
+    """
+    return get_shared_dataset().get()
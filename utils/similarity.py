@@ -0,0 +1,556 @@
+import numpy as np
+import pandas as pd
+import logging
+from utils.data_version import get_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Weight of an exact match per categorical field; the amounts' ratio carries AMOUNT_WEIGHT
+SIMILARITY_WEIGHTS = {
+    'fraud_type': 0.3,
+    'region': 0.2,
+    'detection_method': 0.15,
+    'risk_level': 0.15,
+}
+AMOUNT_WEIGHT = 0.2
+
+# Above this many combinations of field values, score the fields one by one
+MAX_COMBINED_CODES = 1 << 20
+
+# Queries x cases scored per block in top_k; bounds its memory and keeps blocks in cache
+SCORE_BLOCK_SIZE = 1 << 20
+
+# Squared-distance cost, in the neighbour index, of an order of magnitude
+# between reported amounts and of a year between detection dates
+AMOUNT_DISTANCE_WEIGHT = 0.1
+DATE_DISTANCE_WEIGHT = 0.1
+
+# Engines and neighbour indexes for the most recent dataset versions
+_engine_cache = VersionedCache(max_entries=4)
+_neighbor_cache = VersionedCache(max_entries=4)
+
+class _EncodedCases:
+    """
+    The categorical similarity fields of a DataFrame as integer codes, folded
+    into one combined code per row, with rows grouped by combined code.
+    """
+
+    def __init__(self, case_ids, codes, cardinalities):
+        self.case_ids = case_ids
+        self.codes = codes
+        self.cardinalities = cardinalities
+        self.num_rows = len(case_ids)
+        self.weights = np.array([SIMILARITY_WEIGHTS[c] for c in SIMILARITY_WEIGHTS if c in codes], dtype=np.float32)
+
+        # Missing values get their own slot (the last one), which never matches
+        sizes = [cardinalities[c] + 1 for c in codes]
+        self._combined = None
+        if codes and int(np.prod(sizes, dtype=np.int64)) <= MAX_COMBINED_CODES:
+            slots = [np.where(column_codes < 0, size - 1, column_codes) for column_codes, size in zip(codes.values(), sizes)]
+            self._combined = np.ravel_multi_index(slots, sizes).astype(np.int32)
+            # Rows grouped by combined code, so queries can visit only the promising groups
+            self._group_rows = np.argsort(self._combined, kind='stable').astype(np.int32)
+            self._group_sizes = np.bincount(self._combined, minlength=int(np.prod(sizes)))
+            self._group_starts = np.concatenate([[0], np.cumsum(self._group_sizes)[:-1]])
+        self._sizes = sizes
+        self._lookup = None
+
+    @staticmethod
+    def _encode(df):
+        """
+        Case IDs, codes and cardinalities of the similarity fields of df.
+        """
+        codes = {}
+        cardinalities = {}
+        for column in SIMILARITY_WEIGHTS:
+            if column not in df.columns:
+                continue
+            series = df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                column_codes = series.cat.codes.to_numpy()
+                cardinalities[column] = len(series.cat.categories)
+            else:
+                column_codes, uniques = pd.factorize(series)
+                cardinalities[column] = len(uniques)
+            codes[column] = column_codes.astype(np.int32)
+        case_ids = df['case_id'].to_numpy() if 'case_id' in df.columns else np.arange(len(df))
+        return case_ids, codes, cardinalities
+
+    def positions(self, case_ids):
+        """
+        Row positions of case_ids (the first row for a duplicated ID), -1 where unknown.
+        """
+        if self._lookup is None:
+            ids = pd.Index(self.case_ids)
+            first = ~ids.duplicated()
+            self._lookup = (pd.Index(ids[first]), np.flatnonzero(first))
+        index, rows = self._lookup
+        found = index.get_indexer(np.asarray(case_ids, dtype=object))
+        return np.where(found >= 0, rows[found], -1)
+
+    def _slot_weights(self, position):
+        """
+        Per field, the weight of each value slot against the case at position:
+        the field's weight for the case's own value, 0 elsewhere.
+        """
+        slot_weights = []
+        for column_codes, size, weight in zip(self.codes.values(), self._sizes, self.weights):
+            table = np.zeros(size, dtype=np.float32)
+            if column_codes[position] >= 0:
+                table[column_codes[position]] = weight
+            slot_weights.append(table)
+        return slot_weights
+
+    def _combination_weights(self, position, slot_weights=None):
+        """
+        Matched weight of every combined code against the case at position.
+        """
+        if slot_weights is None:
+            slot_weights = self._slot_weights(position)
+        table = slot_weights[0]
+        for column_table in slot_weights[1:]:
+            table = np.add.outer(table, column_table).ravel()
+        return table
+
+    def _matched_weights(self, position):
+        """
+        Matched weight of every row against the case at position.
+        """
+        if not self.codes:
+            return np.zeros(self.num_rows, dtype=np.float32)
+
+        slot_weights = self._slot_weights(position)
+        if self._combined is None:
+            scores = np.zeros(self.num_rows, dtype=np.float32)
+            for column_codes, table in zip(self.codes.values(), slot_weights):
+                # code -1 picks the last slot, which is the never-matching missing slot
+                scores += table[column_codes]
+            return scores
+
+        return self._combination_weights(position, slot_weights)[self._combined]
+
+    def _rows_of_groups(self, groups):
+        """
+        Row positions of every row in the given combined-code groups.
+        """
+        sizes = self._group_sizes[groups]
+        offsets = np.repeat(self._group_starts[groups] - (np.cumsum(sizes) - sizes), sizes)
+        return self._group_rows[offsets + np.arange(len(offsets))].astype(np.int64)
+
+class SimilarityEngine(_EncodedCases):
+    """
+    Scores fraud cases against all cases at once with the weights of
+    calculate_similarity: exact matches on fraud type, region, detection
+    method and risk level, plus the ratio of the smaller to the larger
+    reported amount.
+
+    The categorical fields are integer-coded and folded into one code per
+    row, so scoring a case is one lookup into a small per-query weight
+    table and a few array operations on the amounts. top_k scores only the
+    rows that can still make the top k.
+    """
+
+    def __init__(self, case_ids, codes, cardinalities, amounts):
+        super().__init__(case_ids, codes, cardinalities)
+        self.amounts = amounts
+        # Vector scoring reads float32 copies: half the memory traffic, ample for a ratio
+        self._amounts32 = amounts.astype(np.float32)
+
+    @classmethod
+    def build(cls, df):
+        """
+        Encode the similarity fields of df.
+        """
+        if 'reported_amount' in df.columns:
+            amounts = pd.to_numeric(df['reported_amount'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            amounts = np.full(len(df), np.nan)
+        return cls(*cls._encode(df), amounts)
+
+    def similarity(self, first, second):
+        """
+        Similarity of the cases at two positions, as a float.
+        """
+        score = 0.0
+        for column, column_codes in self.codes.items():
+            if column_codes[first] >= 0 and column_codes[first] == column_codes[second]:
+                score += SIMILARITY_WEIGHTS[column]
+        amount1, amount2 = self.amounts[first], self.amounts[second]
+        # A missing amount on either side leaves the amount term out
+        if np.isnan(amount1) or np.isnan(amount2):
+            return float(score)
+        if amount1 == 0 and amount2 == 0:
+            score += AMOUNT_WEIGHT
+        elif max(amount1, amount2) > 0:
+            score += max(0.0, min(amount1, amount2) / max(amount1, amount2)) * AMOUNT_WEIGHT
+        return float(score)
+
+    def score(self, position):
+        """
+        Similarity of the case at position to every case, as a float32 array.
+        """
+        scores = self._matched_weights(position)
+        scores += self._amount_scores(self.amounts[position])
+        return scores
+
+    def score_batch(self, positions):
+        """
+        Similarity of each case in positions to every case, as a
+        (len(positions), num_rows) float32 matrix computed in one pass.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        scores = self._batch_matched_weights(positions)
+        scores += self._batch_amount_scores(self.amounts[positions])
+        return scores
+
+    def top_k(self, positions, k=5, exclude_self=True):
+        """
+        The k most similar cases to each case in positions.
+
+        Queries are processed in blocks: the candidate rows of every query
+        in a block are scored together (see _candidate_block) into one
+        (queries x candidates) matrix, and argpartition along its rows finds
+        each query's k-th score at once.
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (rows, scores), each of shape (len(positions), k), ordered by
+            decreasing score then position; rows are positions into the
+            engine's DataFrame
+        """
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+        k = max(0, min(k, self.num_rows - (1 if exclude_self else 0)))
+        rows = np.empty((len(positions), k), dtype=np.int64)
+        top_scores = np.empty((len(positions), k), dtype=np.float32)
+        if k == 0 or len(positions) == 0:
+            return rows, top_scores
+
+        block_queries = max(1, SCORE_BLOCK_SIZE // max(self.num_rows, 1))
+        for start in range(0, len(positions), block_queries):
+            batch = positions[start:start + block_queries]
+            candidates, scores = self._candidate_block(batch, k + (1 if exclude_self else 0))
+            if exclude_self:
+                scores[candidates == batch[:, np.newaxis]] = -np.inf
+            # argpartition finds each query's k-th score; rows tied with it are then taken in position order
+            kth = np.argpartition(scores, -k, axis=1)[:, -k:]
+            cutoff = np.take_along_axis(scores, kth, axis=1).min(axis=1)
+            query_of, columns = np.nonzero(scores >= cutoff[:, np.newaxis])
+            best_rows = candidates[query_of, columns]
+            best_scores = scores[query_of, columns]
+            order = np.lexsort((best_rows, -best_scores, query_of))
+            # nonzero lists each query's rows together; keep the first k of each
+            firsts = np.searchsorted(query_of[order], np.arange(len(batch)))
+            picked = order[firsts[:, np.newaxis] + np.arange(k)]
+            rows[start:start + len(batch)] = best_rows[picked]
+            top_scores[start:start + len(batch)] = best_scores[picked]
+        return rows, top_scores
+
+    def _candidate_block(self, positions, k):
+        """
+        Rows that can reach the k best scores for each case in positions,
+        with their scores, as two (len(positions), width) matrices; rows
+        past a query's candidates are -1 with score -inf.
+
+        The k-th best categorical score is a lower bound on the k-th best total,
+        and the amount adds at most AMOUNT_WEIGHT, so only groups of rows whose
+        categorical score is within AMOUNT_WEIGHT of it need scoring.
+        """
+        if self._combined is None:
+            candidates = np.broadcast_to(np.arange(self.num_rows), (len(positions), self.num_rows))
+            return candidates, self.score_batch(positions)
+
+        masks = self._batch_match_masks(positions)
+        # Categorical scores depend only on which fields match: count the rows
+        # per query and match mask, then accumulate from the best mask down;
+        # the score where k rows are reached is the k-th best categorical score
+        mask_scores = self._mask_scores()
+        by_score = np.argsort(-mask_scores, kind='stable')
+        num_masks = len(mask_scores)
+        keys = masks + num_masks * np.arange(len(positions), dtype=np.int64)[:, np.newaxis]
+        mask_sizes = np.bincount(keys.ravel(), weights=np.tile(self._group_sizes, len(positions)), minlength=num_masks * len(positions))
+        at_or_above = np.cumsum(mask_sizes.reshape(len(positions), num_masks)[:, by_score], axis=1)
+        reached = np.minimum((at_or_above < k).sum(axis=1), num_masks - 1)
+        threshold = mask_scores[by_score[reached]]
+        tables = mask_scores[masks]
+        selected = (tables >= (threshold - AMOUNT_WEIGHT - 1e-6)[:, np.newaxis]) & (self._group_sizes > 0)
+        query_of_group, groups = np.nonzero(selected)
+
+        # Candidates of all queries as one flat array, scored in one pass
+        sizes = self._group_sizes[groups]
+        candidates = self._rows_of_groups(groups)
+        query_of = np.repeat(query_of_group, sizes)
+        flat_scores = np.repeat(tables[query_of_group, groups], sizes)
+        flat_scores += self._pair_amount_scores(self._amounts32[candidates], self.amounts[positions][query_of])
+
+        # Spread into one row per query, padded to the longest
+        counts = np.bincount(query_of, minlength=len(positions))
+        width = counts.max()
+        cells = np.arange(len(candidates)) + np.repeat(width * np.arange(len(positions)) - (np.cumsum(counts) - counts), counts)
+        block_rows = np.full(len(positions) * width, -1, dtype=np.int64)
+        scores = np.full(len(positions) * width, -np.inf, dtype=np.float32)
+        block_rows[cells] = candidates
+        scores[cells] = flat_scores
+        return block_rows.reshape(-1, width), scores.reshape(-1, width)
+
+    def _batch_match_masks(self, positions):
+        """
+        Fields matched by every combined code against each case in
+        positions, as a (len(positions), num_codes) matrix of bit masks
+        (bit i for the i-th field).
+        """
+        masks = np.zeros((len(positions), 1), dtype=np.uint8)
+        for bit, (column_codes, size) in enumerate(zip(self.codes.values(), self._sizes)):
+            query_codes = column_codes[positions]
+            slot_bits = np.zeros((len(positions), size), dtype=np.uint8)
+            known = query_codes >= 0
+            slot_bits[np.flatnonzero(known), query_codes[known]] = 1 << bit
+            masks = (masks[:, :, np.newaxis] | slot_bits[:, np.newaxis, :]).reshape(len(positions), -1)
+        return masks
+
+    def _mask_scores(self):
+        """
+        Matched weight of each bit mask of _batch_match_masks.
+        """
+        bits = (np.arange(1 << len(self.weights))[:, np.newaxis] >> np.arange(len(self.weights))) & 1
+        return (bits * self.weights).sum(axis=1, dtype=np.float32)
+
+    def _batch_matched_weights(self, positions):
+        """
+        Matched weight of every row against each case in positions, as a
+        (len(positions), num_rows) float32 matrix.
+        """
+        scores = np.zeros((len(positions), self.num_rows), dtype=np.float32)
+        if not self.codes:
+            return scores
+
+        if self._combined is None:
+            for column_codes, weight in zip(self.codes.values(), self.weights):
+                query_codes = column_codes[positions]
+                matches = column_codes[np.newaxis, :] == query_codes[:, np.newaxis]
+                matches &= (query_codes >= 0)[:, np.newaxis]
+                scores += matches * weight
+            return scores
+
+        # One match mask table per query over all combined codes, then one gather
+        masks = np.take(self._batch_match_masks(positions), self._combined, axis=1)
+        return np.take(self._mask_scores(), masks, out=scores)
+
+    def _batch_amount_scores(self, query_amounts):
+        """
+        _amount_scores for several query amounts at once, as a
+        (len(query_amounts), num_rows) float32 matrix.
+        """
+        return self._pair_amount_scores(self._amounts32[np.newaxis, :], query_amounts[:, np.newaxis])
+
+    @staticmethod
+    def _pair_amount_scores(amounts, query_amounts):
+        """
+        Amount term between amounts and query_amounts, element by element
+        (broadcasting), as float32.
+        """
+        query_amounts = query_amounts.astype(np.float32)
+        larger = np.maximum(amounts, query_amounts)
+        scores = np.zeros(larger.shape, dtype=np.float32)
+        with np.errstate(invalid='ignore'):
+            np.divide(np.minimum(amounts, query_amounts), larger, out=scores, where=larger > 0)
+            scores[(amounts == 0) & (query_amounts == 0)] = 1
+        # Missing amounts on either side give NaN, which fmax turns into 0
+        scores[np.isnan(larger)] = np.nan
+        np.fmin(np.fmax(scores, 0, out=scores), 1, out=scores)
+        scores *= AMOUNT_WEIGHT
+        return scores
+
+    def _amount_scores(self, amount, amounts=None):
+        amounts = self._amounts32 if amounts is None else amounts.astype(np.float32)
+        if np.isnan(amount):
+            return np.zeros(len(amounts), dtype=np.float32)
+        amount = np.float32(amount)
+        # 1 - |a - b| / max(a, b) is min(a, b) / max(a, b) whenever max(a, b) > 0
+        larger = np.maximum(amounts, amount)
+        if amount > 0:
+            # larger > 0 except for missing amounts, whose NaN ratio fmax turns into 0
+            scores = np.minimum(amounts, amount, out=amounts.copy())
+            scores /= larger
+        else:
+            scores = np.zeros(len(amounts), dtype=np.float32)
+            np.divide(np.minimum(amounts, amount), larger, out=scores, where=larger > 0)
+            if amount == 0:
+                scores[amounts == 0] = 1
+        np.fmin(np.fmax(scores, 0, out=scores), 1, out=scores)
+        scores *= AMOUNT_WEIGHT
+        return scores
+
+class NeighborIndex(_EncodedCases):
+    """
+    Nearest-neighbour index over a feature space of the cases: the
+    categorical similarity fields, the log reported amount and the
+    detection date.
+
+    Similarity is 1 minus the squared distance, floored at 0. A mismatched
+    field costs its SIMILARITY_WEIGHTS weight; an order of magnitude between
+    amounts costs AMOUNT_DISTANCE_WEIGHT, and so does a year between dates
+    (DATE_DISTANCE_WEIGHT).
+
+    Rows are partitioned by their combination of categorical values, so the
+    categorical part of the distance is known per partition before any row
+    is read. Queries visit partitions in order of increasing cost, score
+    their rows on the two continuous features, and stop as soon as no
+    remaining partition can reach the threshold or beat the k-th result.
+    """
+
+    def __init__(self, case_ids, codes, cardinalities, continuous):
+        super().__init__(case_ids, codes, cardinalities)
+        # (num_rows, 2) float32, scaled so squared differences are distance costs
+        self.continuous = continuous
+        self._total_weight = np.float32(self.weights.sum())
+
+    @classmethod
+    def build(cls, df):
+        """
+        Build the feature matrix and partitions for df.
+        """
+        num_rows = len(df)
+        if 'reported_amount' in df.columns:
+            amounts = pd.to_numeric(df['reported_amount'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            amounts = np.full(num_rows, np.nan)
+        if 'detection_date' in df.columns:
+            dates = pd.to_datetime(df['detection_date'], errors='coerce')
+            years = (dates - pd.Timestamp('1970-01-01')).dt.days.to_numpy(dtype=np.float64) / 365.25
+        else:
+            years = np.full(num_rows, np.nan)
+
+        features = [np.log10(1 + np.clip(amounts, 0, None)) * np.sqrt(AMOUNT_DISTANCE_WEIGHT),
+                    years * np.sqrt(DATE_DISTANCE_WEIGHT)]
+        for feature in features:
+            # Missing values sit at the median, a typical distance from everything
+            missing = np.isnan(feature)
+            if missing.any():
+                feature[missing] = np.nanmedian(feature) if not missing.all() else 0.0
+        continuous = np.column_stack(features).astype(np.float32)
+        return cls(*cls._encode(df), continuous)
+
+    def similarities(self, position):
+        """
+        Similarity of the case at position to every case, as a float32 array.
+        """
+        if self._combined is not None:
+            costs = self._combination_costs(position)[self._combined]
+        else:
+            costs = self._total_weight - self._matched_weights(position)
+        distances = costs + self._continuous_distances(position)
+        return np.clip(1 - distances, 0, None)
+
+    def query(self, position, k=None, min_similarity=0.0, exclude_self=True):
+        """
+        Cases with a similarity of at least min_similarity to the case at
+        position, at most k of them if k is given.
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (rows, similarities) ordered by decreasing similarity then position
+        """
+        budget = np.float32(1 - min_similarity) + np.float32(1e-6)
+        if self._combined is None:
+            rows = np.arange(self.num_rows)
+            distances = 1 - self.similarities(position)
+            keep = (distances <= budget) & ~((rows == position) & exclude_self)
+            return self._ordered(rows[keep], distances[keep], k)
+
+        costs = self._combination_costs(position)
+        occupied = self._group_sizes > 0
+        found_rows = []
+        found_distances = []
+        kth_distance = np.inf
+        for cost in np.unique(costs[occupied]):
+            # Every row in these partitions is at least cost away
+            if cost > budget or cost > kth_distance:
+                break
+            rows = self._rows_of_groups(np.flatnonzero(occupied & (costs == cost)))
+            distances = cost + self._continuous_distances(position, rows)
+            keep = distances <= budget
+            if exclude_self:
+                keep &= rows != position
+            found_rows.append(rows[keep])
+            found_distances.append(distances[keep])
+
+            if k is not None:
+                rows = np.concatenate(found_rows)
+                distances = np.concatenate(found_distances)
+                if len(distances) >= k > 0:
+                    # Keep the k nearest plus anything tied with the k-th
+                    kth_distance = distances[np.argpartition(distances, k - 1)[k - 1]]
+                    within = distances <= kth_distance
+                    rows, distances = rows[within], distances[within]
+                found_rows, found_distances = [rows], [distances]
+
+        if not found_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self._ordered(np.concatenate(found_rows), np.concatenate(found_distances), k)
+
+    def _combination_costs(self, position):
+        """
+        Categorical distance of every combined code from the case at position.
+        """
+        return self._total_weight - self._combination_weights(position)
+
+    def _continuous_distances(self, position, rows=None):
+        features = self.continuous if rows is None else self.continuous[rows]
+        differences = features - self.continuous[position]
+        return np.einsum('ij,ij->i', differences, differences)
+
+    @staticmethod
+    def _ordered(rows, distances, k):
+        order = np.lexsort((rows, distances))
+        if k is not None:
+            order = order[:k]
+        return rows[order], np.clip(1 - distances[order], 0, None)
+
+def get_similarity_engine(df):
+    """
+    Return the similarity engine for df, building it once per dataset version.
+    """
+    return _engine_cache.get_or_build(get_data_version(df), lambda: SimilarityEngine.build(df))
+
+def get_neighbor_index(df):
+    """
+    Return the nearest-neighbour index for df, building it once per dataset version.
+    """
+    return _neighbor_cache.get_or_build(get_data_version(df), lambda: NeighborIndex.build(df))
+
+def most_similar_cases(df, case_ids, k=5):
+    """
+    Find the k cases most similar to each of case_ids.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+    case_ids : str or list of str
+        Case(s) to find similar cases for; unknown IDs are skipped
+    k : int
+        Number of similar cases per query case
+
+    Returns:
+    --------
+    pandas.DataFrame
+        query_case_id, case_id and similarity_score, best matches first
+    """
+    columns = ['query_case_id', 'case_id', 'similarity_score']
+    if df is None or df.empty or 'case_id' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    engine = get_similarity_engine(df)
+    case_ids = [case_ids] if isinstance(case_ids, str) else list(case_ids)
+    positions = engine.positions(case_ids)
+    known = positions >= 0
+    rows, scores = engine.top_k(positions[known], k)
+    return pd.DataFrame({
+        'query_case_id': np.repeat(np.asarray(case_ids, dtype=object)[known], rows.shape[1]),
+        'case_id': engine.case_ids[rows.ravel()],
+        'similarity_score': scores.ravel().astype(np.float64),
+    }, columns=columns)
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import glob
+import logging
+from functools import lru_cache
+import pandas as pd
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Snapshots are Arrow IPC files named <source>-<stamp digest>.arrow in this
+# directory; set FRAUDLENS_SNAPSHOT_DIR to an empty string to disable them
+DEFAULT_SNAPSHOT_DIR = '.fraudlens_cache'
+
+def get_snapshot_dir():
+    """
+    Directory holding dataset snapshots, or None if snapshots are disabled.
+    """
+    directory = os.environ.get('FRAUDLENS_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR)
+    return directory or None
+
+def snapshot_source(name, key):
+    """
+    Snapshot source name for one instance of a data source, e.g. one
+    database URL, so snapshots of different databases never mix.
+    """
+    return f"{name}-{hashlib.blake2b(key.encode(), digest_size=4).hexdigest()}"
+
+def file_stamp(path):
+    """
+    Version stamp for a source file: its path, size and modification time.
+    """
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+@lru_cache(maxsize=None)
+def _import_pyarrow():
+    """
+    The pyarrow module, or None (with a warning, logged once) if it is missing.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        logger.warning("pyarrow is not installed; dataset snapshots are disabled")
+        return None
+    return pyarrow
+
+def _snapshot_path(directory, source, stamp):
+    digest = hashlib.blake2b(stamp.encode(), digest_size=8).hexdigest()
+    return os.path.join(directory, f"{source}-{digest}.arrow")
+
+def _latest_snapshot_path(directory, source):
+    paths = glob.glob(os.path.join(directory, f"{source}-*.arrow"))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+def read_snapshot(source, stamp=None):
+    """
+    Memory-map the snapshot of source taken at stamp, or the most recent
+    snapshot of source if stamp is None.
+
+    Returns:
+    --------
+    pandas.DataFrame or None
+        The dataset, or None if there is no such snapshot
+    """
+    directory = get_snapshot_dir()
+    if directory is None:
+        return None
+    if stamp is None:
+        path = _latest_snapshot_path(directory, source)
+    else:
+        path = _snapshot_path(directory, source, stamp)
+    if path is None or not os.path.exists(path):
+        return None
+
+    pa = _import_pyarrow()
+    if pa is None:
+        return None
+
+    try:
+        # Numeric and string buffers stay backed by the mapped file where pandas allows it
+        with pa.memory_map(path, 'r') as source_file:
+            table = pa.ipc.open_file(source_file).read_all()
+        return table.to_pandas(split_blocks=True)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {str(e)}")
+        return None
+
+def write_snapshot(df, source, stamp):
+    """
+    Write df as the snapshot of source at stamp and remove older snapshots
+    of the same source. The file is written under a temporary name and
+    renamed, so readers never see a partial snapshot.
+
+    Returns:
+    --------
+    bool
+        True if the snapshot was written
+    """
+    directory = get_snapshot_dir()
+    if directory is None or stamp is None or df.empty:
+        return False
+
+    pa = _import_pyarrow()
+    if pa is None:
+        return False
+
+    path = _snapshot_path(directory, source, stamp)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(temporary_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temporary_path, path)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning(f"Could not write dataset snapshot {path}: {str(e)}")
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        return False
+
+    for old_path in glob.glob(os.path.join(directory, f"{source}-*.arrow")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    logger.info(f"Wrote {len(df)} rows to dataset snapshot {path}")
+    return True
+
+def load_with_snapshot(source, stamp, loader, refresher=None):
+    """
+    Return the snapshot of source at stamp, or build the dataset and snapshot it.
+
+    On a miss, refresher(previous) is called with the most recent older
+    snapshot when there is one (to apply only what changed since), and
+    loader() otherwise.
+
+    Parameters:
+    -----------
+    source : str
+        Name of the data source, e.g. 'database'
+    stamp : str or None
+        Version stamp of the source; None disables the snapshot
+    loader : callable
+        Returns the full dataset as a DataFrame
+    refresher : callable, optional
+        Brings an older snapshot's DataFrame up to date
+
+    Returns:
+    --------
+    pandas.DataFrame
+        The dataset
+    """
+    if stamp is None:
+        return loader()
+
+    df = read_snapshot(source, stamp)
+    if df is not None:
+        logger.info(f"Loaded {len(df)} records from {source} snapshot")
+        return df
+
+    previous = read_snapshot(source) if refresher is not None else None
+    df = refresher(previous) if previous is not None else loader()
+    write_snapshot(df, source, stamp)
+    return df
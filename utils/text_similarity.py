@@ -0,0 +1,306 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import logging
+from numpy.dtypes import StringDType
+from sklearn.feature_extraction.text import CountVectorizer
+from utils.data_version import get_data_version, peek_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Free-text columns modelled; analyst_notes comes from custom data
+TEXT_COLUMNS = ['case_summary', 'analyst_notes']
+
+# Words only: amounts, dates and IDs in summaries carry no textual similarity,
+# and dropping them lets templated summaries share one vector
+WORD_PATTERN = r'[a-z]{2,}'
+
+# Query cases scored together in top_k with one sparse matrix product
+TEXT_QUERY_BATCH_SIZE = 64
+
+# Models and case_id -> row lookups for the most recent dataset versions
+_model_cache = VersionedCache(max_entries=4)
+_position_cache = VersionedCache(max_entries=4)
+
+# New or changed documents beyond this share of the dataset trigger a refit
+DELTA_REFIT_RATIO = 0.1
+
+def case_texts(df, columns=None):
+    """
+    The modelled text of each case: the text columns joined, lowercased,
+    with everything but letters turned into single spaces. Notes already
+    contained in the summary (as custom data does) are not repeated.
+    """
+    columns = [c for c in (columns or TEXT_COLUMNS) if c in df.columns]
+    if not columns:
+        return pd.Series('', index=df.index, dtype=object)
+
+    texts = df[columns[0]].fillna('').astype(str)
+    for column in columns[1:]:
+        extra = df[column].fillna('').astype(str)
+        # Element-wise substring test over both columns at once
+        repeated = np.strings.find(texts.to_numpy(dtype=StringDType()), extra.to_numpy(dtype=StringDType())) >= 0
+        texts = texts + ' ' + extra.where(~repeated, '')
+    return texts.str.lower().str.replace(r'[^a-z]+', ' ', regex=True).str.strip()
+
+class TextModel:
+    """
+    TF-IDF model of the case texts with each distinct text vectorized once.
+
+    Rows map to distinct documents through codes; matrix holds one
+    L2-normalized TF-IDF row per document, so the dot product of two rows
+    is their cosine similarity. Cases are ranked by scoring a batch of
+    queries against the distinct documents with one sparse product with a
+    term-major copy of the matrix and expanding the best documents to rows.
+    """
+
+    def __init__(self, vectorizer, idf, documents, matrix, codes, num_fitted, num_changed=0):
+        self.vectorizer = vectorizer
+        self.idf = idf
+        # Index of the normalized document texts, aligned with matrix rows
+        self.documents = documents
+        self.matrix = matrix
+        # Term-major copy: scoring a query reads only the postings of its own terms
+        self.postings = sp.csr_matrix(matrix.T)
+        self.codes = codes
+        # Rows the vocabulary and IDF were fitted on; later rows reuse them
+        self.num_fitted = num_fitted
+        # Rows replaced or appended since the fit
+        self.num_changed = num_changed
+        self.num_rows = len(codes)
+        self._groups = None
+
+    @classmethod
+    def build(cls, df, columns=None):
+        """
+        Fit the vocabulary and IDF weights on df and vectorize its texts.
+        """
+        codes, documents = pd.factorize(case_texts(df, columns))
+        vectorizer = CountVectorizer(token_pattern=WORD_PATTERN, lowercase=False, stop_words='english', dtype=np.float32)
+        try:
+            counts = vectorizer.fit_transform(documents)
+        except ValueError:
+            # No words at all (empty texts or stop words only)
+            vectorizer = None
+        if vectorizer is None:
+            matrix = sp.csr_matrix((len(documents), 0), dtype=np.float32)
+            return cls(None, np.zeros(0, dtype=np.float32), pd.Index(documents), matrix, codes.astype(np.int32), len(codes))
+
+        # Document frequencies count rows, so a text shared by many cases weighs accordingly
+        rows_per_document = np.bincount(codes[codes >= 0], minlength=len(documents)).astype(np.float64)
+        document_frequency = (counts > 0).T.astype(np.float64) @ rows_per_document
+        idf = (np.log((1 + len(codes)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return cls(vectorizer, idf, pd.Index(documents), cls._weigh(counts, idf), codes.astype(np.int32), len(codes))
+
+    @staticmethod
+    def _weigh(counts, idf):
+        """
+        TF-IDF weight and L2-normalize a count matrix.
+        """
+        weighted = sp.csr_matrix(counts.multiply(idf[np.newaxis, :]), dtype=np.float32)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sp.csr_matrix(sp.diags(1 / norms).astype(np.float32) @ weighted)
+
+    def transform(self, texts):
+        """
+        TF-IDF vectors of normalized texts with the fitted vocabulary and IDF.
+        """
+        if self.vectorizer is None:
+            return sp.csr_matrix((len(texts), 0), dtype=np.float32)
+        return self._weigh(self.vectorizer.transform(texts), self.idf)
+
+    def with_changes(self, texts, positions, num_rows):
+        """
+        Model for a dataset in which the rows at positions now have texts
+        (replacing or appending rows up to num_rows), reusing the fitted
+        vocabulary and IDF. Texts seen before reuse their vectors.
+        """
+        codes = np.full(num_rows, -1, dtype=np.int32)
+        codes[:self.num_rows] = self.codes
+        texts = pd.Index(texts)
+        found = self.documents.get_indexer(texts)
+        new_texts = pd.Index(texts[found < 0].unique())
+        found[found < 0] = len(self.documents) + new_texts.get_indexer(texts[found < 0])
+        codes[positions] = found
+
+        matrix = self.matrix
+        if len(new_texts):
+            matrix = sp.vstack([matrix, self.transform(new_texts)], format='csr')
+        return TextModel(self.vectorizer, self.idf, self.documents.append(new_texts), matrix, codes,
+                         self.num_fitted, self.num_changed + len(positions))
+
+    def vectors(self, positions):
+        """
+        TF-IDF rows for the cases at positions.
+        """
+        return self.matrix[self.codes[positions]]
+
+    def top_k(self, positions, k=5, exclude_self=True, batch_size=TEXT_QUERY_BATCH_SIZE):
+        """
+        The k cases most text-similar to each case in positions.
+
+        Returns:
+        --------
+        tuple of numpy.ndarray
+            (rows, scores), each of shape (len(positions), k), ordered by
+            decreasing cosine similarity then position
+        """
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+        k = max(0, min(k, self.num_rows - (1 if exclude_self else 0)))
+        rows = np.empty((len(positions), k), dtype=np.int64)
+        scores = np.empty((len(positions), k), dtype=np.float32)
+        document_scores = np.zeros(self.matrix.shape[0], dtype=np.float32)
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start:start + batch_size]
+            batch_scores = self.document_scores(self.vectors(batch))
+            for i, position in enumerate(batch):
+                # Scatter the query's nonzero document scores into a dense row
+                begin, end = batch_scores.indptr[i], batch_scores.indptr[i + 1]
+                document_scores[:] = 0
+                document_scores[batch_scores.indices[begin:end]] = batch_scores.data[begin:end]
+                rows[start + i], scores[start + i] = self._best_rows(document_scores, position if exclude_self else -1, k)
+        return rows, scores
+
+    def document_scores(self, vectors):
+        """
+        Cosine similarity of TF-IDF vectors (queries x terms) to every
+        distinct document, as a sparse (queries x documents) matrix.
+        """
+        # One sparse-sparse product; only the postings of the queries' terms are read
+        return sp.csr_matrix(vectors @ self.postings, dtype=np.float32)
+
+    def _best_rows(self, document_scores, excluded, k):
+        """
+        The k best rows given each distinct document's score, expanding only
+        the documents needed to fill k rows.
+        """
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        group_rows, group_sizes, group_starts = self._row_groups()
+        # Documents no row uses any more (replaced by updates) never rank
+        document_scores = np.where(group_sizes > 0, document_scores, -np.inf)
+        needed = k + (1 if excluded >= 0 else 0)
+        # argpartition finds the score of the document that completes k rows
+        count = min(len(document_scores), needed)
+        best = np.argpartition(-document_scores, count - 1)[:count]
+        best = best[np.argsort(-document_scores[best], kind='stable')]
+        filled = np.searchsorted(np.cumsum(group_sizes[best]), needed)
+        cutoff = document_scores[best[min(filled, len(best) - 1)]]
+        documents = np.flatnonzero(document_scores >= cutoff)
+
+        sizes = group_sizes[documents]
+        offsets = np.repeat(group_starts[documents] - (np.cumsum(sizes) - sizes), sizes)
+        candidates = group_rows[offsets + np.arange(len(offsets))].astype(np.int64)
+        candidate_scores = document_scores[self.codes[candidates]]
+        keep = candidates != excluded
+        candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        order = np.lexsort((candidates, -candidate_scores))[:k]
+        return candidates[order], candidate_scores[order]
+
+    def _row_groups(self):
+        if self._groups is None:
+            valid = self.codes >= 0
+            group_rows = np.flatnonzero(valid)[np.argsort(self.codes[valid], kind='stable')].astype(np.int32)
+            group_sizes = np.bincount(self.codes[valid], minlength=self.matrix.shape[0])
+            group_starts = np.concatenate([[0], np.cumsum(group_sizes)[:-1]])
+            self._groups = (group_rows, group_sizes, group_starts)
+        return self._groups
+
+    def memory_usage(self):
+        """
+        Bytes held by the model's arrays (both matrix layouts, row codes, row groups).
+        """
+        total = 0
+        for matrix in (self.matrix, self.postings):
+            total += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        total += self.codes.nbytes + self.idf.nbytes
+        if self._groups is not None:
+            total += sum(array.nbytes for array in self._groups)
+        return total
+
+def get_text_model(df, columns=None):
+    """
+    Return the TF-IDF model for df, fitting it once per dataset version.
+    """
+    key = (get_data_version(df), tuple(columns or TEXT_COLUMNS))
+    return _model_cache.get_or_build(key, lambda: TextModel.build(df, columns))
+
+def update_text_model(old_df, new_df, changed_positions, columns=None):
+    """
+    Register a model for new_df built from old_df's cached model by
+    vectorizing only the changed rows, with the vocabulary and IDF fitted
+    on old_df.
+
+    new_df must keep old_df's rows at the same positions, with changed rows
+    replaced in place or appended. If old_df has no cached model, or the
+    rows changed or added since the last fit exceed DELTA_REFIT_RATIO of
+    the fitted rows, nothing is registered and the next get_text_model()
+    call refits.
+    """
+    columns_key = tuple(columns or TEXT_COLUMNS)
+    old_version = peek_data_version(old_df)
+    previous = _model_cache.get((old_version, columns_key)) if old_version else None
+    if previous is None:
+        return None
+
+    changed = np.unique(np.asarray(changed_positions, dtype=np.int64))
+    # changed already includes the appended rows, so each counts once
+    if previous.num_changed + len(changed) > DELTA_REFIT_RATIO * previous.num_fitted:
+        return None
+
+    texts = case_texts(new_df.iloc[changed], columns)
+    model = previous.with_changes(texts.to_numpy(dtype=object), changed, len(new_df))
+    return _model_cache.put((get_data_version(new_df), columns_key), model)
+
+def case_positions(df, case_ids):
+    """
+    Row positions in df of case_ids (the first row for a duplicated ID), -1
+    where unknown. The lookup is built once per dataset version.
+    """
+    def build():
+        ids = pd.Index(df['case_id'])
+        first = ~ids.duplicated()
+        return pd.Index(ids[first]), np.flatnonzero(first)
+
+    index, rows = _position_cache.get_or_build(get_data_version(df), build)
+    found = index.get_indexer(np.asarray(case_ids, dtype=object))
+    return np.where(found >= 0, rows[found], -1)
+
+def text_similar_cases(df, case_ids, k=5, columns=None):
+    """
+    Find the k cases whose summary and notes are most similar (TF-IDF
+    cosine similarity) to each of case_ids.
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        The fraud data
+    case_ids : str or list of str
+        Case(s) to find similar cases for; unknown IDs are skipped
+    k : int
+        Number of similar cases per query case
+    columns : list of str, optional
+        Text columns to model; defaults to TEXT_COLUMNS
+
+    Returns:
+    --------
+    pandas.DataFrame
+        query_case_id, case_id and similarity_score, best matches first
+    """
+    result_columns = ['query_case_id', 'case_id', 'similarity_score']
+    if df is None or df.empty or 'case_id' not in df.columns:
+        return pd.DataFrame(columns=result_columns)
+
+    model = get_text_model(df, columns)
+    case_ids = [case_ids] if isinstance(case_ids, str) else list(case_ids)
+    positions = case_positions(df, case_ids)
+    known = positions >= 0
+    rows, scores = model.top_k(positions[known], k)
+    return pd.DataFrame({
+        'query_case_id': np.repeat(np.asarray(case_ids, dtype=object)[known], rows.shape[1]),
+        'case_id': df['case_id'].to_numpy()[rows.ravel()],
+        'similarity_score': scores.ravel().astype(np.float64),
+    }, columns=result_columns)
@@ -0,0 +1,339 @@
+import threading
+import numpy as np
+import pandas as pd
+import logging
+from utils.categories import isin_mask
+from utils.data_version import get_data_version, peek_data_version, VersionedCache
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rollup cube of the fraud cases: one cell per (detection day, fraud_type,
+# region, risk_level, detection_method, status) holding the case count
+# and the count, sum, min and max of reported_amount. Time series and
+# breakdowns are answered by re-aggregating cells instead of cases.
+# Queries touching only some dimensions read a smaller view (the cube
+# aggregated over the other dimensions), derived once from the smallest
+# view that covers them.
+
+CUBE_DIMENSIONS = ['fraud_type', 'region', 'risk_level', 'detection_method', 'status']
+
+# Breakdown and heatmap labels used on the pages and their dimensions
+DIMENSION_LABELS = {
+    'Fraud Type': 'fraud_type',
+    'Region': 'region',
+    'Risk Level': 'risk_level',
+    'Detection Method': 'detection_method',
+    'Status': 'status',
+}
+
+# Measures kept per cell and how cells combine
+CUBE_MEASURES = {
+    'count': 'sum',
+    'amount_count': 'sum',
+    'amount_sum': 'sum',
+    'amount_min': 'min',
+    'amount_max': 'max',
+}
+
+# pandas period per time unit; periods are labelled by their start date
+TIME_UNITS = {
+    'day': None,
+    'week': 'W',
+    'month': 'M',
+    'quarter': 'Q',
+    'year': 'Y',
+}
+
+# Cubes for the most recent dataset versions
+_cube_cache = VersionedCache(max_entries=4)
+
+def _day_values(df):
+    """
+    Detection day of each case as datetime64[D] (NaT when missing or unparseable).
+    """
+    if 'detection_date' not in df.columns:
+        return np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+    return pd.to_datetime(df['detection_date'], errors='coerce').to_numpy().astype('datetime64[D]')
+
+def _aggregate(cells, keys):
+    """
+    Combine cells sharing keys (missing dimension values form their own group).
+    """
+    if not keys:
+        return cells[list(CUBE_MEASURES)].agg(CUBE_MEASURES).to_frame().T
+    grouped = cells.groupby(keys, observed=True, dropna=False, sort=False).agg(CUBE_MEASURES)
+    return grouped.reset_index()
+
+class TimeCube:
+    """
+    Cells of the rollup cube and the views derived from them.
+
+    Cells refer to their day through day_code, an index into days (the
+    sorted distinct detection days); cases without a date have code -1.
+    Dimension columns keep the data's categorical dtypes.
+    """
+
+    def __init__(self, days, dimensions, cells, num_rows):
+        self.days = days
+        self.dimensions = dimensions
+        self.cells = cells
+        self.num_rows = num_rows
+        self._views = {frozenset(dimensions): cells}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, df):
+        dimensions = [d for d in CUBE_DIMENSIONS if d in df.columns]
+        day_codes, days = pd.factorize(_day_values(df), sort=True)
+        amounts = pd.to_numeric(df['reported_amount'], errors='coerce') if 'reported_amount' in df.columns else pd.Series(np.nan, index=df.index)
+
+        frame = pd.DataFrame({'day_code': day_codes.astype(np.int32)}, index=df.index)
+        for dimension in dimensions:
+            frame[dimension] = df[dimension]
+        frame['amount'] = amounts
+        grouped = frame.groupby(['day_code'] + dimensions, observed=True, dropna=False, sort=False)['amount']
+        cells = grouped.agg(['size', 'count', 'sum', 'min', 'max'])
+        cells.columns = list(CUBE_MEASURES)
+        return cls(pd.DatetimeIndex(days.astype('datetime64[s]')), dimensions, cells.reset_index(), len(df))
+
+    def view(self, dimensions):
+        """
+        Cells aggregated over every dimension not in dimensions.
+        """
+        wanted = frozenset(d for d in dimensions if d in self.dimensions)
+        with self._lock:
+            view = self._views.get(wanted)
+            if view is not None:
+                return view
+            # Derive from the smallest view already holding every wanted dimension
+            source = min((v for key, v in self._views.items() if wanted <= key), key=len)
+        view = _aggregate(source, ['day_code'] + [d for d in self.dimensions if d in wanted])
+        with self._lock:
+            self._views[wanted] = view
+        return view
+
+    def rollup(self, time_unit='month', by=None, filters=None, start_date=None, end_date=None, cases=None):
+        """
+        Aggregate the cases per time period and breakdown.
+
+        Cells cannot give a median: pass the cases (the DataFrame the cube
+        describes) to add an amount_median column computed from them, at
+        the cost of one pass over the cases.
+
+        Parameters:
+        -----------
+        time_unit : str or None
+            'day', 'week', 'month', 'quarter' or 'year'; None for no time grouping
+        by : list of str, optional
+            Dimensions to break the results down by
+        filters : dict, optional
+            Dimension -> values to keep
+        start_date, end_date : date-like, optional
+            Inclusive range of detection days
+        cases : pandas.DataFrame, optional
+            The cases of the cube, to compute amount medians from
+
+        Returns:
+        --------
+        pandas.DataFrame
+            time_period (when grouped by time), the by dimensions, count,
+            amount_sum, amount_mean, amount_median (with cases only),
+            amount_min and amount_max, in time order
+        """
+        by = [d for d in (by or []) if d in self.dimensions]
+        filters = {d: values for d, values in (filters or {}).items() if d in self.dimensions and values}
+        cells = self.view(set(by) | set(filters))
+        cells = cells[self._selected(cells, cells['day_code'].to_numpy(), time_unit, filters, start_date, end_date)]
+
+        keys = list(by)
+        if time_unit is not None:
+            period_codes, periods = self._periods(time_unit)
+            cells = cells.assign(period_code=period_codes[cells['day_code'].to_numpy()])
+            keys = ['period_code'] + keys
+        result = _aggregate(cells, keys)
+        if keys:
+            result = result.sort_values(keys, kind='stable')
+        if time_unit is not None:
+            result.insert(0, 'time_period', periods[result.pop('period_code').to_numpy()])
+        result = result.reset_index(drop=True)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = result['amount_sum'].to_numpy(dtype=np.float64) / result['amount_count'].to_numpy(dtype=np.float64)
+        result['amount_mean'] = mean
+        result['count'] = result['count'].astype(np.int64)
+        columns = (['time_period'] if time_unit is not None else []) + by
+        measures = ['count', 'amount_sum', 'amount_mean', 'amount_min', 'amount_max']
+        if cases is not None:
+            result['amount_median'] = self._medians(cases, result, time_unit, by, filters, start_date, end_date)
+            measures.insert(3, 'amount_median')
+        return result[columns + measures]
+
+    def _selected(self, rows, day_codes, time_unit, filters, start_date, end_date):
+        """
+        Mask of the rows (cells or cases, with their day codes) that pass
+        the filters and date range of a rollup.
+        """
+        mask = np.ones(len(rows), dtype=bool)
+        for dimension, values in filters.items():
+            mask &= isin_mask(rows[dimension], values)
+        if start_date is not None or end_date is not None or time_unit is not None:
+            # Cases without a date are left out of date ranges and time series
+            first = self.days.searchsorted(pd.Timestamp(start_date)) if start_date is not None else 0
+            last = self.days.searchsorted(pd.Timestamp(end_date), side='right') if end_date is not None else len(self.days)
+            mask &= (day_codes >= first) & (day_codes < last)
+        return mask
+
+    def _medians(self, cases, result, time_unit, by, filters, start_date, end_date):
+        """
+        Median reported amount of the cases behind each row of a rollup result.
+        """
+        day_codes = self.days.get_indexer(pd.DatetimeIndex(_day_values(cases).astype('datetime64[s]')))
+        selected = self._selected(cases, day_codes, time_unit, filters, start_date, end_date)
+        amounts = pd.to_numeric(cases['reported_amount'], errors='coerce') if 'reported_amount' in cases.columns else pd.Series(np.nan, index=cases.index)
+        frame = pd.DataFrame({'amount': amounts.to_numpy()[selected]})
+        for dimension in by:
+            frame[dimension] = cases[dimension].array[selected]
+        keys = list(by)
+        if time_unit is not None:
+            period_codes, periods = self._periods(time_unit)
+            frame['time_period'] = periods[period_codes[day_codes[selected]]]
+            keys = ['time_period'] + keys
+        if not keys:
+            return np.full(len(result), frame['amount'].median())
+        medians = frame.groupby(keys, observed=True, dropna=False, sort=False)['amount'].median().rename('amount_median').reset_index()
+        return result[keys].merge(medians, on=keys, how='left')['amount_median'].to_numpy()
+
+    def _periods(self, time_unit):
+        """
+        Period of each day (as codes into the sorted period start dates).
+        """
+        unit = time_unit.lower()
+        if unit not in TIME_UNITS:
+            raise ValueError(f"Unknown time unit: {time_unit}")
+        starts = self.days if TIME_UNITS[unit] is None else self.days.to_period(TIME_UNITS[unit]).start_time
+        codes, periods = pd.factorize(starts, sort=True)
+        # Period starts keep the days' second resolution whatever the unit
+        return codes, pd.DatetimeIndex(periods).astype('datetime64[s]')
+
+    def with_changes(self, removed, added, num_rows):
+        """
+        Cube for a dataset in which the cases in removed were replaced by
+        (or extended with) the cases in added, both given as cubes. Only
+        the cells of days touched by the changes are re-aggregated.
+
+        Returns:
+        --------
+        tuple
+            (TimeCube, stale days): the days holding a cell whose min or
+            max amount came from a removed case; their extremes are only
+            exact once rebuilt with with_days_rebuilt()
+        """
+        days = pd.DatetimeIndex(self.days.append(added.days).unique()).sort_values()
+        keys = ['day_code'] + self.dimensions
+        base = self._recoded(self, days)
+
+        parts = [self._recoded(added, days)]
+        if removed is not None:
+            removed_cells = self._recoded(removed, days).copy()
+            for measure in ['count', 'amount_count', 'amount_sum']:
+                removed_cells[measure] = -removed_cells[measure]
+            # Removed cases count towards the sums only; their extremes are checked below
+            extremes = removed_cells[keys + ['amount_min', 'amount_max']]
+            removed_cells[['amount_min', 'amount_max']] = np.nan
+            parts.append(removed_cells)
+        delta = pd.concat(parts, ignore_index=True)
+
+        touched = np.isin(base['day_code'].to_numpy(), pd.unique(delta['day_code'].to_numpy()))
+        changed = _aggregate(self._aligned(pd.concat([base[touched], delta], ignore_index=True)), keys)
+        changed = changed[changed['count'] > 0]
+
+        stale_codes = np.empty(0, dtype=np.int32)
+        if removed is not None:
+            merged = extremes.merge(changed, on=keys, how='inner', suffixes=('_removed', ''))
+            ambiguous = (merged['amount_min_removed'] <= merged['amount_min']) | (merged['amount_max_removed'] >= merged['amount_max'])
+            stale_codes = pd.unique(merged.loc[ambiguous, 'day_code'].to_numpy())
+
+        cells = pd.concat([base[~touched], changed], ignore_index=True)
+        return TimeCube(days, self.dimensions, self._aligned(cells), num_rows), stale_codes
+
+    def with_days_rebuilt(self, df, day_codes):
+        """
+        Cube with the cells of the given days (codes, -1 for undated cases)
+        re-aggregated from the cases of df, the dataset the cube describes.
+        """
+        if len(day_codes) == 0:
+            return self
+        days = self.days.to_numpy().astype('datetime64[D]')
+        wanted = days[day_codes[day_codes >= 0]]
+        day_values = _day_values(df)
+        rows = np.isin(day_values, wanted)
+        if (day_codes < 0).any():
+            rows |= np.isnat(day_values)
+        rebuilt = self._recoded(TimeCube.build(df[rows]), self.days)
+        keep = ~np.isin(self.cells['day_code'].to_numpy(), day_codes)
+        cells = pd.concat([self.cells[keep], rebuilt], ignore_index=True)
+        return TimeCube(self.days, self.dimensions, self._aligned(cells), self.num_rows)
+
+    @staticmethod
+    def _recoded(cube, days):
+        """
+        Cube's cells with day codes into days (a superset of cube.days),
+        copied unless the codes are unchanged.
+        """
+        if days[:len(cube.days)].equals(cube.days):
+            return cube.cells
+        cells = cube.cells.copy()
+        codes = cells['day_code'].to_numpy()
+        mapping = days.get_indexer(cube.days)
+        cells['day_code'] = np.where(codes >= 0, mapping[np.maximum(codes, 0)] if len(mapping) else -1, -1).astype(np.int32)
+        return cells
+
+    def _aligned(self, cells):
+        """
+        Restore categorical dimensions that concat turned into objects
+        (frames whose categories differ), keeping every value.
+        """
+        for dimension in self.dimensions:
+            dtype = self.cells[dimension].dtype
+            if cells[dimension].dtype != dtype and isinstance(dtype, pd.CategoricalDtype):
+                values = pd.unique(cells[dimension].dropna().astype(str))
+                extra = sorted(set(values) - set(dtype.categories))
+                cells[dimension] = cells[dimension].astype(pd.CategoricalDtype(list(dtype.categories) + extra, ordered=dtype.ordered))
+        return cells
+
+    def memory_usage(self):
+        """
+        Bytes held by the cells and the views derived so far.
+        """
+        return sum(int(view.memory_usage(deep=True).sum()) for view in self._views.values())
+
+def get_time_cube(df):
+    """
+    Return the rollup cube of df, building it once per dataset version.
+    """
+    return _cube_cache.get_or_build(get_data_version(df), lambda: TimeCube.build(df))
+
+def update_time_cube(old_df, new_df, changed_positions):
+    """
+    Register a cube for new_df built from old_df's cached cube by removing
+    the replaced cases and adding the changed ones.
+
+    new_df must keep old_df's rows at the same positions, with changed rows
+    replaced in place or appended. If old_df has no cached cube,
+    nothing is registered and the next get_time_cube() call rebuilds.
+    Days where a replaced case held the min or max amount of a cell are
+    re-aggregated from new_df's cases of those days.
+    """
+    old_version = peek_data_version(old_df)
+    previous = _cube_cache.get(old_version) if old_version else None
+    if previous is None:
+        return None
+
+    changed = np.unique(np.asarray(changed_positions, dtype=np.int64))
+    replaced = changed[changed < len(old_df)]
+    columns = [c for c in ['detection_date', 'reported_amount'] + CUBE_DIMENSIONS if c in new_df.columns]
+    removed = TimeCube.build(old_df[columns].iloc[replaced]) if len(replaced) else None
+    cube, stale_days = previous.with_changes(removed, TimeCube.build(new_df[columns].iloc[changed]), len(new_df))
+    return _cube_cache.put(get_data_version(new_df), cube.with_days_rebuilt(new_df, stale_days))
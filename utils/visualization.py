@@ -4,6 +4,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import streamlit as st
+from utils.categories import count_values
+from utils.time_cube import get_time_cube, DIMENSION_LABELS
+from utils.forecasting import forecast_series, complete_periods
 
 def create_overview_chart(df):
     """
@@ -12,13 +15,12 @@ def create_overview_chart(df):
     """
     try:
         if df is not None and not df.empty and 'detection_date' in df.columns:
-            # Make sure detection_date is datetime type
-            df['detection_date'] = pd.to_datetime(df['detection_date'])
-            
-            # Group by month and count cases
-            df_copy = df.copy()
-            df_copy['month'] = df_copy['detection_date'].dt.strftime('%Y-%m')
-            monthly_counts = df_copy.groupby('month').size().reset_index(name='count')
+            # Monthly counts from the rollup cube (built once per data version)
+            monthly = get_time_cube(df).rollup('month')
+            monthly_counts = pd.DataFrame({
+                'month': monthly['time_period'].dt.strftime('%Y-%m'),
+                'count': monthly['count']
+            })
             
             # Create the figure
             fig = px.line(
@@ -110,7 +112,7 @@ def create_fraud_type_chart(df):
     try:
         if df is not None and not df.empty and 'fraud_type' in df.columns:
             # Count cases by fraud type
-            type_counts = df['fraud_type'].value_counts().reset_index()
+            type_counts = count_values(df['fraud_type']).reset_index()
             type_counts.columns = ['fraud_type', 'count']
             
             # Sort by count descending
@@ -153,6 +155,10 @@ def create_fraud_type_chart(df):
 def create_heatmap(df, x_col, y_col, z_col):
     """
     Create a heatmap visualization
+    
+    x_col and y_col are breakdown labels (see DIMENSION_LABELS) and z_col
+    one of "Count", "Average Amount" or "Max Amount"; values come from the
+    rollup cube rather than the cases.
     """
     # Create empty figure
     fig = go.Figure()
@@ -165,14 +171,51 @@ def create_heatmap(df, x_col, y_col, z_col):
         margin=dict(l=40, r=40, t=40, b=40)
     )
     
-    # Add annotation
-    fig.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Visualization will appear when data is loaded",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    x_dimension = DIMENSION_LABELS.get(x_col)
+    y_dimension = DIMENSION_LABELS.get(y_col)
+    measure = {'Count': 'count', 'Average Amount': 'amount_mean', 'Max Amount': 'amount_max'}.get(z_col)
+    message = None
+    if df is None or df.empty or measure is None or x_dimension not in df.columns or y_dimension not in df.columns:
+        message = "Visualization will appear when data is loaded"
+    elif x_dimension == y_dimension:
+        message = "Choose different variables for the two axes"
+    
+    try:
+        if message is None:
+            cells = get_time_cube(df).rollup(None, by=[x_dimension, y_dimension])
+            grid = cells.pivot(index=y_dimension, columns=x_dimension, values=measure)
+            fig.add_trace(
+                go.Heatmap(
+                    z=grid.to_numpy(),
+                    x=grid.columns.astype(str),
+                    y=grid.index.astype(str),
+                    colorscale='Viridis',
+                    colorbar=dict(title=z_col)
+                )
+            )
+            fig.update_layout(
+                xaxis_title=x_col,
+                yaxis_title=y_col,
+                xaxis=dict(tickangle=45)
+            )
+        else:
+            # Add annotation
+            fig.add_annotation(
+                x=0.5, y=0.5,
+                xref="paper", yref="paper",
+                text=message,
+                showarrow=False,
+                font=dict(size=14)
+            )
+    except Exception as e:
+        # Add error annotation
+        fig.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Error creating visualization",
+            showarrow=False,
+            font=dict(size=14, color="red")
+        )
     
     return fig
 
@@ -228,9 +271,13 @@ def create_similarity_network(df, case_id=None):
     
     return fig
 
-def create_trend_forecast(df, forecast_periods=12):
+def create_trend_forecast(df, forecast_periods=12, time_unit='month', confidence=0.8):
     """
     Create a time series forecast visualization
+    
+    Cases per time_unit period with a Holt-Winters forecast of the next
+    forecast_periods periods and its confidence prediction interval,
+    fitted on the periods the data fully covers (see utils/forecasting.py).
     """
     # Create empty figure
     fig = go.Figure()
@@ -246,13 +293,54 @@ def create_trend_forecast(df, forecast_periods=12):
         hovermode="x unified"
     )
     
-    # Add annotation
-    fig.add_annotation(
-        x=0.5, y=0.5,
-        xref="paper", yref="paper",
-        text="Visualization will appear when data is loaded",
-        showarrow=False,
-        font=dict(size=14)
-    )
+    try:
+        if df is not None and not df.empty and 'detection_date' in df.columns:
+            cube = get_time_cube(df)
+            history = cube.rollup(time_unit).set_index('time_period')[['count']]
+            fig.add_trace(go.Scatter(
+                x=history.index,
+                y=history['count'],
+                mode='lines+markers',
+                name="Historical",
+                line=dict(color='#4F8BF9')
+            ))
+            
+            fitted = complete_periods(history, time_unit, cube.days.min(), cube.days.max())
+            if forecast_periods > 0 and len(fitted) >= 2:
+                forecast, lower, upper = forecast_series(df, fitted, time_unit, forecast_periods, confidence, fill_value=0)
+                fig.add_trace(go.Scatter(
+                    x=list(upper.index) + list(lower.index[::-1]),
+                    y=list(upper['count']) + list(lower['count'][::-1]),
+                    fill='toself',
+                    fillcolor='rgba(255, 75, 75, 0.2)',
+                    line=dict(color='rgba(255, 75, 75, 0)'),
+                    hoverinfo='skip',
+                    name=f"{confidence:.0%} interval"
+                ))
+                fig.add_trace(go.Scatter(
+                    x=forecast.index,
+                    y=forecast['count'],
+                    mode='lines+markers',
+                    name="Forecast",
+                    line=dict(color='#FF4B4B', dash='dash')
+                ))
+        else:
+            # Add annotation
+            fig.add_annotation(
+                x=0.5, y=0.5,
+                xref="paper", yref="paper",
+                text="Visualization will appear when data is loaded",
+                showarrow=False,
+                font=dict(size=14)
+            )
+    except Exception as e:
+        # Add error annotation
+        fig.add_annotation(
+            x=0.5, y=0.5,
+            xref="paper", yref="paper",
+            text="Error creating visualization",
+            showarrow=False,
+            font=dict(size=14, color="red")
+        )
     
     return fig